@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark nearest-row alignment of Gemini words/chords against the original linear scan.
+
+Synthetic song with --rows local words and --queries Gemini words (10k x 10k by
+default). The scan is O(N*M) in pure Python, so it is timed on the first --scan
+queries and extrapolated; those picks are also checked against the searchsorted path.
+The banded one-to-one aligner is timed on a --service-words service.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from song_editor.models.lyrics import WordRow
+from song_editor.processing.alignment import align_words, nearest_rows
+from song_editor.services.gemini_client import AltWordTimed
+
+
+def synthetic_words(n: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+	rng = np.random.default_rng(seed)
+	starts = np.cumsum(rng.uniform(0.15, 0.6, size=n))
+	return starts, starts + rng.uniform(0.1, 0.5, size=n)
+
+
+def scan(rows: list[WordRow], alts: list[AltWordTimed]) -> list[int]:
+	"""The original per-item linear scan over all rows, kept here as the reference."""
+	picks = []
+	for alt in alts:
+		alt_mid = 0.5 * (alt.start + alt.end)
+		best_idx = -1
+		best_dist = float("inf")
+		for j, row in enumerate(rows):
+			dist = abs(alt_mid - 0.5 * (row.start + row.end))
+			if dist < best_dist:
+				best_dist = dist
+				best_idx = j
+		picks.append(best_idx)
+	return picks
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--rows", type=int, default=10_000)
+	parser.add_argument("--queries", type=int, default=10_000)
+	parser.add_argument("--scan", type=int, default=500, help="Queries timed with the linear scan")
+	parser.add_argument("--service-words", type=int, default=20_000)
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args()
+
+	starts, ends = synthetic_words(args.rows, 0)
+	rows = [WordRow(f"w{i}", float(s), float(e), 0.9) for i, (s, e) in enumerate(zip(starts, ends))]
+	starts, ends = synthetic_words(args.queries, 1)
+	alts = [AltWordTimed(f"a{i}", float(s), float(e)) for i, (s, e) in enumerate(zip(starts, ends))]
+	print(f"{args.rows} rows x {args.queries} Gemini words")
+
+	sample = alts[: args.scan]
+	t0 = time.perf_counter()
+	ref = scan(rows, sample)
+	scan_s = (time.perf_counter() - t0) * len(alts) / max(1, len(sample))
+
+	fast_s = float("inf")
+	for _ in range(args.repeat):
+		t0 = time.perf_counter()
+		picks = nearest_rows(rows, alts)
+		fast_s = min(fast_s, time.perf_counter() - t0)
+
+	assert picks[: len(sample)].tolist() == ref, "mismatch between linear scan and searchsorted"
+	print(f"scan:         {scan_s * 1000:10.1f} ms  (extrapolated from {len(sample)} queries)")
+	print(f"searchsorted: {fast_s * 1000:10.1f} ms  ({scan_s / max(fast_s, 1e-9):.0f}x)")
+	print()
+
+	rng = np.random.default_rng(2)
+	vocab = ["amazing", "grace", "how", "sweet", "the", "sound", "that", "saved", "a", "wretch", "like", "me"]
+	starts, ends = synthetic_words(args.service_words, 3)
+	rows = [WordRow(vocab[i % len(vocab)], float(s), float(e), 0.9) for i, (s, e) in enumerate(zip(starts, ends))]
+	# Gemini drops ~5% of the words, mishears ~15% and is off by ~0.1 s
+	alts = [
+		AltWordTimed(r.text if rng.random() > 0.15 else "la", r.start + float(rng.normal(0, 0.1)), r.end + float(rng.normal(0, 0.1)))
+		for r in rows if rng.random() > 0.05
+	]
+	alts.sort(key=lambda a: a.start)
+	dp_s = float("inf")
+	for _ in range(args.repeat):
+		t0 = time.perf_counter()
+		mapping = align_words(rows, alts)
+		dp_s = min(dp_s, time.perf_counter() - t0)
+	matched = int((mapping >= 0).sum())
+	print(f"banded DP:    {dp_s * 1000:10.1f} ms  ({len(rows)} rows x {len(alts)} Gemini words, {matched} matched)")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
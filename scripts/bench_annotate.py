@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark word-to-chord annotation against the original loops.
+
+- walk: the sequential "advance while chord.end < midpoint" loop from the pipeline
+- blocks: the block view's scan of every chord for every word of every 20 s block
+  (only run up to --max-block-words, it grows with blocks * words * chords)
+- index: ChordIndex + annotate_words_with_chords (sorted arrays, one searchsorted)
+
+Word counts go up to 100k by default, with roughly one chord per four words.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from song_editor.models.lyrics import WordRow
+from song_editor.processing.alignment import ChordIndex, annotate_words_with_chords
+from song_editor.processing.chords import DetectedChord
+
+
+def synthetic(words: int, seed: int = 0) -> tuple[list[WordRow], list[DetectedChord]]:
+	rng = np.random.default_rng(seed)
+	starts = np.cumsum(rng.uniform(0.15, 0.6, size=words))
+	rows = [WordRow("la", float(s), float(s) + 0.25, 0.9) for s in starts]
+	edges = np.concatenate(([0.0], np.cumsum(rng.uniform(0.8, 2.4, size=max(1, words // 4)))))
+	names = ["C", "G", "Am", "F", "Dm", "Em"]
+	chords = [DetectedChord(names[i % len(names)], float(a), float(b), 0.8) for i, (a, b) in enumerate(zip(edges[:-1], edges[1:]))]
+	return rows, chords
+
+
+def walk(rows: list[WordRow], chords: list[DetectedChord]) -> None:
+	j = 0
+	for row in rows:
+		mid_t = 0.5 * (row.start + row.end)
+		while j + 1 < len(chords) and chords[j].end < mid_t:
+			j += 1
+		row.chord = chords[j].name if chords[j].start - 0.01 <= mid_t <= chords[j].end + 0.01 else None
+
+
+def blocks(rows: list[WordRow], chords: list[DetectedChord]) -> None:
+	total = max(r.end for r in rows)
+	for block_start in range(0, int(total) + 1, 20):
+		block_end = min(block_start + 20.0, total)
+		for word in [w for w in rows if w.start >= block_start and w.end <= block_end]:
+			mid = (word.start + word.end) / 2
+			for chord in chords:
+				if chord.start <= mid <= chord.end:
+					word.chord = chord.name
+					break
+
+
+def timed(fn, *args) -> float:
+	t0 = time.perf_counter()
+	fn(*args)
+	return time.perf_counter() - t0
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--words", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+	parser.add_argument("--max-block-words", type=int, default=10_000)
+	args = parser.parse_args()
+
+	print(f"{'words':>8} {'chords':>7} {'walk ms':>9} {'blocks ms':>10} {'index ms':>9} {'build ms':>9}")
+	for n in args.words:
+		rows, chords = synthetic(n)
+		walk_s = timed(walk, rows, chords)
+		expected = [r.chord for r in rows]
+		block_ms = f"{timed(blocks, rows, chords) * 1000:10.1f}" if n <= args.max_block_words else f"{'-':>10}"
+
+		t0 = time.perf_counter()
+		index = ChordIndex(chords)
+		build_s = time.perf_counter() - t0
+		index_s = timed(annotate_words_with_chords, rows, index)
+		assert [r.chord for r in rows] == expected, "index and walk disagree"
+		print(f"{n:8d} {len(chords):7d} {walk_s * 1000:9.1f} {block_ms} {index_s * 1000:9.1f} {build_s * 1000:9.1f}")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark chord detection stages against the original pure-Python implementations.
+
+- scoring: per-frame template loop vs. single matrix product, on a synthetic
+  chromagram equivalent to a 10-minute recording (22.05 kHz, hop 2048)
+- post-processing: list-based mode filter + segmentation vs. cumulative-count
+  mode filter + run-length encoding, on a synthetic hour-long label track
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from song_editor.processing.chords import ChordDetector, DetectedChord
+
+
+def synthetic_chromagram(minutes: float, sr: int = 22050, hop_length: int = 2048, seed: int = 0) -> np.ndarray:
+	rng = np.random.default_rng(seed)
+	frames = int(minutes * 60 * sr / hop_length)
+	chroma = rng.random((12, frames)) + 1e-6
+	return chroma / np.sum(chroma, axis=0, keepdims=True)
+
+
+def score_loop(detector: ChordDetector, chromagram: np.ndarray) -> tuple[list[str], list[float]]:
+	"""The original nested-loop scoring, kept here as the reference implementation."""
+	templates = list(zip(detector.template_names, detector.template_matrix))
+	best_labels: list[str] = []
+	best_scores: list[float] = []
+	for i in range(chromagram.shape[1]):
+		v = chromagram[:, i]
+		label = "N"
+		score = 0.0
+		for name, tmpl in templates:
+			val = float(np.dot(v, tmpl))
+			if val > score:
+				score = val
+				label = name
+		best_labels.append(label)
+		best_scores.append(score)
+	return best_labels, best_scores
+
+
+def synthetic_codes(minutes: float, sr: int = 22050, hop_length: int = 2048, seed: int = 0) -> np.ndarray:
+	"""Piecewise-constant chord codes with occasional single-frame flicker."""
+	rng = np.random.default_rng(seed)
+	frames = int(minutes * 60 * sr / hop_length)
+	runs = rng.integers(5, 60, size=frames // 5 + 1)
+	codes = np.repeat(rng.integers(0, 25, size=len(runs)), runs)[:frames]
+	flicker = rng.random(frames) < 0.05
+	codes[flicker] = rng.integers(0, 25, size=int(flicker.sum()))
+	return codes
+
+
+def postprocess_loop(detector: ChordDetector, codes: np.ndarray, scores: np.ndarray, times: np.ndarray) -> list[DetectedChord]:
+	"""The original list-based smoothing, segmentation and merge, run on integer codes."""
+	best_labels = codes.tolist()
+	best_scores = scores.tolist()
+	win = 7
+	pad = win // 2
+	labels_sm = best_labels[:]
+	for i in range(len(best_labels)):
+		lo = max(0, i - pad)
+		hi = min(len(best_labels), i + pad + 1)
+		window = best_labels[lo:hi]
+		# The original iterated set(window) of label strings, so ties fell to hash order;
+		# sorting gives the deterministic lowest-code tie-break used by smooth_codes().
+		labels_sm[i] = max(sorted(set(window)), key=window.count)
+	chords: list[DetectedChord] = []
+	current = None
+	start_time = 0.0
+	max_conf = 0.0
+	for i, lab in enumerate(labels_sm):
+		t = float(times[i])
+		conf = best_scores[i]
+		if current is None:
+			current, start_time, max_conf = lab, t, conf
+			continue
+		if lab != current:
+			chords.append(DetectedChord(detector.labels[current], start_time, t, max_conf))
+			current, start_time, max_conf = lab, t, conf
+		else:
+			max_conf = max(max_conf, conf)
+	if current is not None:
+		chords.append(DetectedChord(detector.labels[current], start_time, float(times[-1]), max_conf))
+	merged: list[DetectedChord] = []
+	for ch in chords:
+		if merged and ch.end - ch.start < 0.25 and merged[-1].name == ch.name:
+			prev = merged[-1]
+			merged[-1] = DetectedChord(prev.name, prev.start, ch.end, max(prev.confidence, ch.confidence))
+		else:
+			merged.append(ch)
+	return merged
+
+
+def bench_postprocess(detector: ChordDetector, minutes: float, repeat: int) -> None:
+	codes = synthetic_codes(minutes)
+	scores = np.random.default_rng(1).random(len(codes))
+	times = np.arange(len(codes)) * 2048 / 22050
+	print(f"Label track: {len(codes)} frames ({minutes:g} min)")
+
+	t0 = time.perf_counter()
+	ref = postprocess_loop(detector, codes, scores, times)
+	loop_s = time.perf_counter() - t0
+
+	vec_s = float("inf")
+	for _ in range(repeat):
+		t0 = time.perf_counter()
+		out = detector.segment(detector.smooth_codes(codes), scores, times)
+		vec_s = min(vec_s, time.perf_counter() - t0)
+
+	assert out == ref, "post-processing mismatch between list and array paths"
+	print(f"lists:  {loop_s * 1000:9.2f} ms")
+	print(f"arrays: {vec_s * 1000:9.2f} ms  ({loop_s / max(vec_s, 1e-9):.0f}x)")
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--minutes", type=float, default=10.0)
+	parser.add_argument("--post-minutes", type=float, default=60.0)
+	parser.add_argument("--repeat", type=int, default=3)
+	args = parser.parse_args()
+
+	detector = ChordDetector()
+	chroma = synthetic_chromagram(args.minutes)
+	print(f"Chromagram: {chroma.shape[1]} frames ({args.minutes:g} min)")
+
+	t0 = time.perf_counter()
+	ref_labels, ref_scores = score_loop(detector, chroma)
+	loop_s = time.perf_counter() - t0
+
+	vec_s = float("inf")
+	for _ in range(args.repeat):
+		t0 = time.perf_counter()
+		codes, scores = detector.score_frames(chroma)
+		vec_s = min(vec_s, time.perf_counter() - t0)
+
+	labels = detector.labels[codes].tolist()
+	assert labels == ref_labels, "label mismatch between loop and matrix scoring"
+	assert np.allclose(scores, ref_scores), "score mismatch between loop and matrix scoring"
+
+	print(f"loop:   {loop_s * 1000:9.2f} ms")
+	print(f"matrix: {vec_s * 1000:9.2f} ms  ({loop_s / max(vec_s, 1e-9):.0f}x)")
+	print()
+	bench_postprocess(detector, args.post_minutes, args.repeat)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark WordTimeline against a list of WordRow dataclasses.
+
+Reports memory (tracemalloc, everything allocated while building) and the time to
+annotate chords, select a 20 s block and export ChordPro text, for --words words.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from song_editor.export.ccli import export_ccli
+from song_editor.models.lyrics import WordRow
+from song_editor.models.timeline import WordTimeline
+from song_editor.processing.alignment import ChordIndex, annotate_words_with_chords
+from song_editor.processing.chords import DetectedChord
+from song_editor.processing.transcriber import Word
+
+
+def synthetic(words: int, seed: int = 0) -> tuple[list[Word], list[DetectedChord]]:
+	rng = np.random.default_rng(seed)
+	starts = np.cumsum(rng.uniform(0.15, 0.6, size=words))
+	vocab = ["amazing", "grace", "how", "sweet", "the", "sound", "that", "saved", "a", "wretch", "like", "me"]
+	out = [Word(vocab[i % len(vocab)], float(s), float(s) + 0.25, 0.9) for i, s in enumerate(starts)]
+	edges = np.concatenate(([0.0], np.cumsum(rng.uniform(0.8, 2.4, size=max(1, words // 4)))))
+	names = ["C", "G", "Am", "F", "Dm", "Em"]
+	chords = [DetectedChord(names[i % len(names)], float(a), float(b), 0.8) for i, (a, b) in enumerate(zip(edges[:-1], edges[1:]))]
+	return out, chords
+
+
+def measured(build):
+	tracemalloc.start()
+	value = build()
+	size, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return value, size
+
+
+def timed(fn, *args) -> float:
+	t0 = time.perf_counter()
+	fn(*args)
+	return time.perf_counter() - t0
+
+
+def block(words, t0: float, t1: float):
+	if isinstance(words, WordTimeline):
+		return [words[i] for i in words.between(t0, t1)]
+	return [w for w in words if w.start >= t0 and w.end <= t1]
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--words", type=int, default=100_000)
+	args = parser.parse_args()
+
+	words, chords = synthetic(args.words)
+	index = ChordIndex(chords)
+	rows, rows_bytes = measured(lambda: [WordRow(w.text, w.start, w.end, w.confidence or 0.0) for w in words])
+	timeline, timeline_bytes = measured(lambda: WordTimeline.from_words(words))
+
+	print(f"{args.words} words, {len(chords)} chords")
+	print(f"{'':10} {'MB':>8} {'annotate ms':>12} {'block ms':>9} {'export ms':>10}")
+	with tempfile.TemporaryDirectory() as tmp:
+		for name, seq, size in (("rows", rows, rows_bytes), ("timeline", timeline, timeline_bytes)):
+			annotate_s = timed(annotate_words_with_chords, seq, index)
+			mid = float(words[len(words) // 2].start)
+			block_s = timed(block, seq, mid, mid + 20.0)
+			export_s = timed(export_ccli, os.path.join(tmp, f"{name}.cho"), seq)
+			print(f"{name:10} {size / 1e6:8.1f} {annotate_s * 1000:12.1f} {block_s * 1000:9.1f} {export_s * 1000:10.1f}")
+		with open(os.path.join(tmp, "rows.cho")) as a, open(os.path.join(tmp, "timeline.cho")) as b:
+			assert a.read() == b.read(), "exports differ"
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -28,6 +28,8 @@ setup(
     entry_points={
         "console_scripts": [
             "song-editor=song_editor.app:main",
+            "song-editor-cache=song_editor.cache_cli:main",
+            "song-editor-batch=song_editor.batch:main",
         ],
     },
     classifiers=[
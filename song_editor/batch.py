@@ -0,0 +1,438 @@
+"""
+Headless batch processing for whole song libraries.
+
+Runs separation → transcription → chord detection → export over many files in a
+process pool without importing Qt. Each stage has its own concurrency limit so, for
+example, only a couple of Demucs jobs compete for memory while more workers transcribe.
+Completed files are recorded in a state file so an interrupted run resumes where it
+stopped, and every stage result is stored in the analysis cache.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+STAGES = ("separate", "transcribe", "chords", "export")
+REPORT_STAGES = ("separate", "transcribe", "chords", "transcribe+chords", "export")
+STATE_FILE = ".song_editor_batch_state.jsonl"
+
+# Per-process worker state, set up once by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def discover_audio_files(inputs: Iterable[str]) -> List[str]:
+	"""Expand directories (recursively) and glob patterns into a sorted list of audio files."""
+	from .processing.pipeline import AUDIO_EXTENSIONS
+
+	found: Dict[str, None] = {}
+	for item in inputs:
+		if os.path.isdir(item):
+			for root, _, files in os.walk(item):
+				for name in files:
+					if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+						found[os.path.abspath(os.path.join(root, name))] = None
+		elif any(ch in item for ch in "*?["):
+			for path in glob.glob(item, recursive=True):
+				if os.path.isfile(path) and os.path.splitext(path)[1].lower() in AUDIO_EXTENSIONS:
+					found[os.path.abspath(path)] = None
+		elif os.path.isfile(item):
+			found[os.path.abspath(item)] = None
+	return sorted(found)
+
+
+def _file_fingerprint(path: str) -> Tuple[int, int]:
+	st = os.stat(path)
+	return (st.st_size, st.st_mtime_ns)
+
+
+def load_state(state_path: str) -> Dict[str, Dict[str, Any]]:
+	"""Latest state record per audio path."""
+	state: Dict[str, Dict[str, Any]] = {}
+	if not os.path.exists(state_path):
+		return state
+	with open(state_path, "r", encoding="utf-8") as f:
+		for line in f:
+			try:
+				rec = json.loads(line)
+				state[rec["path"]] = rec
+			except (ValueError, KeyError):
+				continue
+	return state
+
+
+def run_settings(model_size: str, whisper_config: Any, gate: bool, chunk_workers: int) -> Dict[str, Any]:
+	"""Settings that change a file's results, stored in its state record."""
+	return {"model": model_size, "whisper": whisper_config.cache_params(), "gate": gate, "chunk_workers": chunk_workers}
+
+
+def is_done(
+	rec: Optional[Dict[str, Any]],
+	path: str,
+	stages: Iterable[str] = STAGES,
+	settings: Optional[Dict[str, Any]] = None,
+) -> bool:
+	"""Whether the last run of path covered the requested stages with the same settings and its outputs still exist."""
+	if not rec or rec.get("status") != "ok":
+		return False
+	if list(_file_fingerprint(path)) != rec.get("fingerprint"):
+		return False
+	if not set(stages) <= set(rec.get("stages", [])):
+		return False
+	if settings is not None and rec.get("settings") != settings:
+		return False
+	return all(os.path.exists(p) for p in rec.get("outputs", []))
+
+
+def output_paths(audio_path: str, output_dir: Optional[str]) -> Dict[str, str]:
+	base_dir = output_dir or os.path.dirname(audio_path)
+	stem = os.path.splitext(os.path.basename(audio_path))[0]
+	return {
+		"song_data": os.path.join(base_dir, stem + ".song_data"),
+		"cho": os.path.join(base_dir, stem + ".cho"),
+		"mid": os.path.join(base_dir, stem + ".mid"),
+	}
+
+
+def gemini_output_path(audio_path: str, output_dir: Optional[str]) -> str:
+	base_dir = output_dir or os.path.dirname(audio_path)
+	return os.path.join(base_dir, os.path.splitext(os.path.basename(audio_path))[0] + ".gemini.json")
+
+
+def run_gemini(
+	files: List[str],
+	output_dir: Optional[str],
+	concurrency: int,
+	requests_per_minute: Optional[float] = None,
+	force: bool = False,
+) -> int:
+	"""Gemini audio analysis of many songs at once on one event loop; returns the number of failures.
+
+	Chunks of all songs share one limit of concurrency requests in flight. Results are
+	written as <stem>.gemini.json and files that already have one are skipped unless force.
+	"""
+	import asyncio
+	from dataclasses import asdict
+	from .services.gemini_async import AsyncGeminiClient
+
+	todo = [p for p in files if force or not os.path.exists(gemini_output_path(p, output_dir))]
+	if not todo:
+		return 0
+	client = AsyncGeminiClient(max_concurrency=concurrency)
+	if not client.client.ensure_api_key():
+		print("Gemini: GEMINI_API_KEY is not set")
+		return len(todo)
+	print(f"Gemini: analysing {len(todo)} file(s) with up to {concurrency} request(s) in flight", flush=True)
+	started = time.perf_counter()
+	results = asyncio.run(client.analyze_many(todo, requests_per_minute=requests_per_minute))
+	failed = 0
+	for path in todo:
+		words, chords, notes, debug = results[path]
+		if not words:
+			failed += 1
+			reason = debug.strip().splitlines()[-1] if debug.strip() else "no result"
+			print(f"failed {os.path.basename(path)} (gemini: {reason})")
+			continue
+		out = gemini_output_path(path, output_dir)
+		os.makedirs(os.path.dirname(out), exist_ok=True)
+		with open(out, "w", encoding="utf-8") as f:
+			json.dump({
+				"words": [asdict(w) for w in words],
+				"chords": [asdict(c) for c in chords],
+				"notes": [asdict(n) for n in notes],
+			}, f, indent=2)
+		print(f"ok     {os.path.basename(path)} (gemini {len(words)} words)")
+	summary = client.client.metrics_summary().get("audio_chunk")
+	requests = f", {summary['requests']:.0f} requests" if summary else ""
+	print(f"Gemini done in {time.perf_counter() - started:.1f}s: {len(todo) - failed} ok, {failed} failed{requests}")
+	return failed
+
+
+def _init_worker(
+	semaphores: Dict[str, Any],
+	threads: Optional[int],
+	cache_dir: Optional[str],
+	parallel_stages: bool = False,
+	whisper_config: Optional[Any] = None,
+	gate: bool = True,
+	chunk_workers: int = 0,
+) -> None:
+	if threads:
+		for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+			os.environ[var] = str(threads)
+	from .core.analysis_cache import AnalysisCache
+	from .processing.activity import ActivityGate
+	from .processing.chords import ChordDetector
+	from .processing.separate import get_separator
+	from .processing.pipeline import DEMUCS_MODEL
+	from .processing.transcriber import Transcriber, WhisperEngineConfig
+
+	if threads:
+		get_separator(DEMUCS_MODEL).threads = threads
+	whisper_config = whisper_config or WhisperEngineConfig.from_env(cpu_threads=threads)
+	_worker.clear()
+	_worker.update(
+		semaphores=semaphores,
+		threads=threads,
+		parallel_stages=parallel_stages,
+		whisper_config=whisper_config,
+		gate=ActivityGate() if gate else None,
+		chunk_workers=chunk_workers,
+		cache=AnalysisCache(root=cache_dir),
+		transcriber=Transcriber(whisper_config),
+		detector=ChordDetector(),
+	)
+
+
+def _stage_slot(stage: str):
+	sem = _worker["semaphores"].get(stage)
+	return sem if sem is not None else nullcontext()
+
+
+def process_file(
+	audio_path: str,
+	model_size: str,
+	output_dir: Optional[str],
+	stages: Tuple[str, ...],
+	settings: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+	"""Run the requested stages for one file inside a worker; returns a state record."""
+	from .processing import pipeline
+
+	cache = _worker["cache"]
+	timings: Dict[str, float] = {}
+	cached: List[str] = []
+	rec: Dict[str, Any] = {
+		"path": audio_path,
+		"fingerprint": list(_file_fingerprint(audio_path)),
+		"stages": list(stages),
+		"settings": settings,
+		"timings": timings,
+		"cached": cached,
+	}
+	requested = stages
+	try:
+		if "separate" in stages:
+			with _stage_slot("separate"):
+				t0 = time.perf_counter()
+				vocals, instrumental, hit = pipeline.run_separation(audio_path, cache)
+				timings["separate"] = time.perf_counter() - t0
+			if hit:
+				cached.append("separate")
+		else:
+			# Stems from an earlier run, so later stages use (and look up) the same inputs
+			vocals, instrumental = pipeline.cached_stems(audio_path, cache)
+		words = []
+		chords = []
+		activity: Dict[str, Any] = {}
+		if _worker.get("parallel_stages") and "transcribe" in stages and "chords" in stages:
+			# Transcription and chord detection in sibling processes, each on its own stem
+			with _stage_slot("transcribe"), _stage_slot("chords"):
+				t0 = time.perf_counter()
+				words, words_hit, chords, chords_hit = pipeline.run_transcription_and_chords(
+					audio_path, vocals, instrumental, model_size, cache.root,
+					executor=pipeline.get_stage_pool(_worker.get("threads")),
+					config=_worker["whisper_config"],
+					gate=_worker["gate"],
+					report=activity,
+					chunk_workers=_worker["chunk_workers"],
+				)
+				timings["transcribe+chords"] = time.perf_counter() - t0
+			cached.extend(stage for stage, hit in (("transcribe", words_hit), ("chords", chords_hit)) if hit)
+			stages = tuple(s for s in stages if s not in ("transcribe", "chords"))
+		if "transcribe" in stages:
+			with _stage_slot("transcribe"):
+				t0 = time.perf_counter()
+				words, hit = pipeline.run_transcription(
+					audio_path, vocals, _worker["transcriber"], model_size, cache,
+					gate=_worker["gate"], report=activity, chunk_workers=_worker["chunk_workers"],
+				)
+				timings["transcribe"] = time.perf_counter() - t0
+			if hit:
+				cached.append("transcribe")
+		if "chords" in stages:
+			with _stage_slot("chords"):
+				t0 = time.perf_counter()
+				chords, hit = pipeline.run_chords(audio_path, instrumental, _worker["detector"], cache)
+				timings["chords"] = time.perf_counter() - t0
+			if hit:
+				cached.append("chords")
+		outputs: List[str] = []
+		if "export" in stages:
+			# Exporting without transcribe/chords uses the results of an earlier run
+			if "transcribe" not in requested:
+				words = pipeline.cached_words(
+					audio_path, vocals, _worker["transcriber"].config, model_size, cache,
+					gate=_worker["gate"], chunk_workers=_worker["chunk_workers"],
+				)
+				if words is None:
+					raise RuntimeError("no cached transcription to export; include the transcribe stage")
+			if "chords" not in requested:
+				chords = pipeline.cached_chords(audio_path, instrumental, _worker["detector"], cache)
+				if chords is None:
+					raise RuntimeError("no cached chords to export; include the chords stage")
+			from .export.ccli import export_ccli
+			from .export.midi_export import export_midi
+			from .models.song_data_importer import SongDataImporter
+
+			t0 = time.perf_counter()
+			rows = pipeline.join_words_and_chords(words, chords)
+			paths = output_paths(audio_path, output_dir)
+			os.makedirs(os.path.dirname(paths["song_data"]), exist_ok=True)
+			if not SongDataImporter().export_song_data(pipeline.build_song_data(audio_path, rows, chords), paths["song_data"]):
+				raise RuntimeError(f"failed to write {paths['song_data']}")
+			export_ccli(paths["cho"], rows)
+			export_midi(paths["mid"], rows, chords)
+			outputs = list(paths.values())
+			timings["export"] = time.perf_counter() - t0
+		rec.update(status="ok", outputs=outputs, words=len(words), chords=len(chords))
+		if activity:
+			rec["skipped_seconds"] = activity["skipped_seconds"]
+	except Exception as e:
+		rec.update(status="failed", error=f"{type(e).__name__}: {e}")
+	return rec
+
+
+def _format_record(rec: Dict[str, Any]) -> str:
+	parts = []
+	for stage in REPORT_STAGES:
+		if stage in rec.get("timings", {}):
+			label = stage + ("*" if stage in rec.get("cached", []) else "")
+			parts.append(f"{label} {rec['timings'][stage]:.1f}s")
+	if "skipped_seconds" in rec:
+		parts.append(f"{rec['skipped_seconds']:.0f}s non-vocal skipped")
+	detail = ", ".join(parts)
+	if rec.get("status") != "ok":
+		detail = rec.get("error", "")
+	return f"{rec['status']:<6} {os.path.basename(rec['path'])} ({detail})"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = argparse.ArgumentParser(
+		prog="song-editor-batch",
+		description="Analyse many songs without the GUI, writing .song_data, .cho and .mid outputs.",
+	)
+	parser.add_argument("inputs", nargs="+", help="Audio files, directories (searched recursively) or glob patterns")
+	parser.add_argument("-o", "--output-dir", help="Write outputs here instead of next to each audio file")
+	parser.add_argument("-m", "--model", default="small", help="Whisper model size (default: small)")
+	parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {','.join(STAGES)}")
+	parser.add_argument("-j", "--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Worker processes")
+	parser.add_argument("--separate-jobs", type=int, default=1, help="Max concurrent Demucs separations")
+	parser.add_argument("--transcribe-jobs", type=int, default=None, help="Max concurrent transcriptions (default: workers)")
+	parser.add_argument("--chord-jobs", type=int, default=None, help="Max concurrent chord detections (default: workers)")
+	parser.add_argument("--parallel-stages", action="store_true", help="Run transcription and chord detection concurrently in separate processes")
+	parser.add_argument("--threads", type=int, default=None, help="CPU threads per worker for torch/BLAS")
+	parser.add_argument("--beam-size", type=int, default=None, help="Whisper beam size (default: 5)")
+	parser.add_argument("--vad", action="store_true", default=None, help="Let Whisper skip non-speech with its VAD filter")
+	parser.add_argument("--whisper-batch-size", type=int, default=None, help="Batched Whisper inference with this batch size")
+	parser.add_argument("--chunk-workers", type=int, default=0, help="Split long recordings at silences and transcribe chunks in this many processes")
+	parser.add_argument("--no-gate", action="store_true", help="Transcribe the whole vocals stem instead of only its voiced regions")
+	parser.add_argument("--gemini", action="store_true", help="Also run Gemini audio analysis (GEMINI_API_KEY), several songs at once")
+	parser.add_argument("--gemini-concurrency", type=int, default=4, help="Max Gemini requests in flight across all songs (default: 4)")
+	parser.add_argument("--gemini-rpm", type=float, default=None, help="Gemini requests per minute across all songs")
+	parser.add_argument("--cache-dir", help="Analysis cache directory")
+	parser.add_argument("--state-file", help=f"Resume state file (default: <output-dir or cwd>/{STATE_FILE})")
+	parser.add_argument("--force", action="store_true", help="Reprocess files already marked done")
+	args = parser.parse_args(argv)
+
+	stages = tuple(s.strip() for s in args.stages.split(",") if s.strip())
+	unknown = [s for s in stages if s not in STAGES]
+	if unknown:
+		parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+	from .processing.transcriber import WhisperEngineConfig
+	whisper_config = WhisperEngineConfig.from_env(
+		cpu_threads=args.threads,
+		beam_size=args.beam_size,
+		vad_filter=args.vad,
+		batch_size=args.whisper_batch_size,
+	)
+
+	files = discover_audio_files(args.inputs)
+	if not files:
+		print("No audio files found.")
+		return 1
+
+	state_path = args.state_file or os.path.join(args.output_dir or os.getcwd(), STATE_FILE)
+	settings = run_settings(args.model, whisper_config, not args.no_gate, args.chunk_workers)
+	state = {} if args.force else load_state(state_path)
+	todo = [p for p in files if not is_done(state.get(p), p, stages, settings)]
+	skipped = len(files) - len(todo)
+	print(f"{len(files)} files found, {skipped} already done, {len(todo)} to process with {args.workers} worker(s)")
+	if not todo:
+		if args.gemini:
+			return 0 if run_gemini(files, args.output_dir, args.gemini_concurrency, args.gemini_rpm, args.force) == 0 else 2
+		return 0
+	if os.path.dirname(state_path):
+		os.makedirs(os.path.dirname(state_path), exist_ok=True)
+
+	import multiprocessing as mp
+	ctx = mp.get_context("spawn")
+	limits = {
+		"separate": args.separate_jobs,
+		"transcribe": args.transcribe_jobs,
+		"chords": args.chord_jobs,
+	}
+	semaphores = {stage: ctx.BoundedSemaphore(n) for stage, n in limits.items() if n and n < args.workers}
+
+	counts = {"ok": 0, "failed": 0}
+	stage_totals: Dict[str, float] = {}
+	skipped_audio = [0.0]
+	started = time.perf_counter()
+	with open(state_path, "a", encoding="utf-8") as state_out:
+		def record(done: int, rec: Dict[str, Any]) -> None:
+			counts[rec["status"]] = counts.get(rec["status"], 0) + 1
+			for stage, secs in rec.get("timings", {}).items():
+				stage_totals[stage] = stage_totals.get(stage, 0.0) + secs
+			skipped_audio[0] += rec.get("skipped_seconds", 0.0)
+			state_out.write(json.dumps(rec) + "\n")
+			state_out.flush()
+			print(f"[{done}/{len(todo)}] {_format_record(rec)}", flush=True)
+
+		if args.workers <= 1:
+			_init_worker({}, args.threads, args.cache_dir, args.parallel_stages, whisper_config, not args.no_gate, args.chunk_workers)
+			for i, path in enumerate(todo, 1):
+				record(i, process_file(path, args.model, args.output_dir, stages, settings))
+			if args.parallel_stages:
+				from .processing.pipeline import shutdown_stage_pool
+				shutdown_stage_pool()
+			if args.chunk_workers > 1:
+				from .processing.chunked import shutdown_chunk_pool
+				shutdown_chunk_pool()
+		else:
+			with ProcessPoolExecutor(
+				max_workers=args.workers,
+				mp_context=ctx,
+				initializer=_init_worker,
+				initargs=(semaphores, args.threads, args.cache_dir, args.parallel_stages, whisper_config, not args.no_gate, args.chunk_workers),
+			) as pool:
+				futures = {pool.submit(process_file, p, args.model, args.output_dir, stages, settings): p for p in todo}
+				for i, fut in enumerate(as_completed(futures), 1):
+					try:
+						rec = fut.result()
+					except Exception as e:
+						rec = {"path": futures[fut], "status": "failed", "error": f"{type(e).__name__}: {e}"}
+					record(i, rec)
+
+	elapsed = time.perf_counter() - started
+	print()
+	print(f"Done in {elapsed:.1f}s: {counts.get('ok', 0)} ok, {counts.get('failed', 0)} failed, {skipped} skipped")
+	for stage in REPORT_STAGES:
+		if stage in stage_totals:
+			print(f"  {stage:<17} {stage_totals[stage]:9.1f}s total")
+	if skipped_audio[0]:
+		print(f"  {skipped_audio[0] / 60:.1f} min of non-vocal audio skipped by the activity gate")
+	if args.gemini:
+		print()
+		counts["failed"] = counts.get("failed", 0) + run_gemini(files, args.output_dir, args.gemini_concurrency, args.gemini_rpm, args.force)
+	return 0 if counts.get("failed", 0) == 0 else 2
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,62 @@
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+from .core.analysis_cache import AnalysisCache
+
+
+def _fmt_bytes(n: float) -> str:
+	if n < 1024:
+		return f"{int(n)} B"
+	for unit in ("KB", "MB", "GB"):
+		n /= 1024
+		if n < 1024 or unit == "GB":
+			break
+	return f"{n:.1f} {unit}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = argparse.ArgumentParser(prog="song-editor-cache", description="Inspect and prune the Song Editor 2 analysis cache")
+	parser.add_argument("--dir", help="Cache directory (default: $SONG_EDITOR_CACHE_DIR or ~/.cache/song_editor_2/analysis)")
+	sub = parser.add_subparsers(dest="command")
+	sub.add_parser("stats", help="Show entry count and total size per stage")
+	list_p = sub.add_parser("list", help="List entries, least recently used first")
+	list_p.add_argument("--stage", help="Only show entries for this stage")
+	prune_p = sub.add_parser("prune", help="Evict least recently used entries")
+	prune_p.add_argument("--max-mb", type=float, help="Evict until the cache is at most this size")
+	prune_p.add_argument("--older-than-days", type=float, help="Evict entries unused for this many days")
+	sub.add_parser("clear", help="Delete every entry")
+	args = parser.parse_args(argv)
+
+	cache = AnalysisCache(root=args.dir)
+	command = args.command or "stats"
+
+	if command == "stats":
+		entries = cache.entries()
+		print(f"Cache: {cache.root}")
+		print(f"Entries: {len(entries)}  Size: {_fmt_bytes(sum(e.size_bytes for e in entries))}  Limit: {_fmt_bytes(cache.max_bytes)}")
+		by_stage: dict[str, list[int]] = {}
+		for e in entries:
+			by_stage.setdefault(e.stage, []).append(e.size_bytes)
+		for stage, sizes in sorted(by_stage.items()):
+			print(f"  {stage:<12} {len(sizes):>6} entries  {_fmt_bytes(sum(sizes))}")
+	elif command == "list":
+		for e in cache.entries():
+			if args.stage and e.stage != args.stage:
+				continue
+			used = time.strftime("%Y-%m-%d %H:%M", time.localtime(e.last_used))
+			params = ",".join(f"{k}={v}" for k, v in sorted(e.params.items()))
+			print(f"{e.key[:12]}  {used}  {_fmt_bytes(e.size_bytes):>10}  {e.stage:<10} {params:<40} {e.source_name}")
+	elif command == "prune":
+		max_bytes = None if args.max_mb is None else int(args.max_mb * 1024 * 1024)
+		removed = cache.prune(max_bytes=max_bytes, older_than_days=args.older_than_days)
+		print(f"Removed {len(removed)} entries ({_fmt_bytes(sum(e.size_bytes for e in removed))})")
+	elif command == "clear":
+		cache.clear()
+		print(f"Cleared {cache.root}")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
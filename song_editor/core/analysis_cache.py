@@ -0,0 +1,300 @@
+"""
+Analysis Cache Module
+
+Persistent, content-addressed cache for expensive analysis stages (stem separation,
+transcription, chord detection). Entries are keyed by the SHA-256 of the source audio
+plus the stage name and its parameters, so renaming or moving a file still hits the cache
+while changing a model or setting does not.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "song_editor_2", "analysis")
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024 * 1024
+
+META_FILE = "meta.json"
+DATA_FILE = "data.json"
+
+
+@dataclass
+class CacheEntry:
+	"""Summary of one cached stage result"""
+	key: str
+	stage: str
+	params: Dict[str, Any]
+	audio_hash: str
+	source_name: str
+	size_bytes: int
+	last_used: float
+
+
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+_hash_lock = threading.Lock()
+
+
+def content_hash(audio_path: str) -> str:
+	"""SHA-256 of the file contents, memoized per (path, mtime, size)"""
+	path = os.path.abspath(audio_path)
+	st = os.stat(path)
+	memo_key = (path, st.st_mtime_ns, st.st_size)
+	with _hash_lock:
+		cached = _hash_memo.get(memo_key)
+	if cached:
+		return cached
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1024 * 1024), b""):
+			h.update(chunk)
+	digest = h.hexdigest()
+	with _hash_lock:
+		_hash_memo[memo_key] = digest
+	return digest
+
+
+def _dir_size(path: Path) -> int:
+	total = 0
+	for p in path.rglob("*"):
+		if p.is_file():
+			total += p.stat().st_size
+	return total
+
+
+class AnalysisCache:
+	"""Disk-backed stage result cache with size-bounded least-recently-used eviction
+
+	An entry's last use is the mtime of its meta.json, refreshed on every hit. Both LRU
+	eviction and max_age expiry go by that time, so an entry expires after max_age
+	seconds without being used, not max_age seconds after it was written.
+
+	The cache size is summed from disk once (on the first write) and then kept as a
+	running total, so a write only scans every entry when the total goes over max_bytes.
+	Writes from other processes sharing the directory are counted at the next full scan.
+	"""
+
+	def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None, max_age: Optional[float] = None):
+		self.root = Path(root or os.getenv("SONG_EDITOR_CACHE_DIR", DEFAULT_CACHE_DIR))
+		if max_bytes is None:
+			env_mb = os.getenv("SONG_EDITOR_CACHE_MAX_MB")
+			max_bytes = int(float(env_mb) * 1024 * 1024) if env_mb else DEFAULT_MAX_BYTES
+		self.max_bytes = max_bytes
+		# Entries unused for more than max_age seconds are treated as misses and removed
+		self.max_age = max_age
+		self._total_bytes: Optional[int] = None
+		self._total_lock = threading.Lock()
+
+	def content_hash(self, audio_path: str) -> str:
+		return content_hash(audio_path)
+
+	def key(self, audio_hash: str, stage: str, params: Dict[str, Any]) -> str:
+		blob = json.dumps({"audio": audio_hash, "stage": stage, "params": params}, sort_keys=True)
+		return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+	def _entry_dir(self, key: str) -> Path:
+		return self.root / key[:2] / key
+
+	def _lookup(self, audio_path: str, stage: str, params: Dict[str, Any]) -> Optional[Path]:
+		return self._lookup_hash(self.content_hash(audio_path), stage, params)
+
+	def _lookup_hash(self, audio_hash: str, stage: str, params: Dict[str, Any]) -> Optional[Path]:
+		entry = self._entry_dir(self.key(audio_hash, stage, params))
+		meta = entry / META_FILE
+		if not meta.exists():
+			return None
+		if self.max_age is not None and self._expired(meta):
+			self._drop(entry)
+			return None
+		# Touch the metadata so eviction sees this entry as recently used
+		try:
+			os.utime(meta)
+		except OSError:
+			pass
+		return entry
+
+	def _expired(self, meta_path: Path) -> bool:
+		try:
+			last_used = meta_path.stat().st_mtime
+		except OSError:
+			return True
+		return time.time() - last_used > self.max_age
+
+	def _add_bytes(self, delta: int) -> None:
+		with self._total_lock:
+			if self._total_bytes is not None:
+				self._total_bytes = max(0, self._total_bytes + delta)
+
+	def _drop(self, entry: Path) -> None:
+		size = _dir_size(entry)
+		shutil.rmtree(entry, ignore_errors=True)
+		self._add_bytes(-size)
+
+	def _begin(self, audio_path: str, stage: str, params: Dict[str, Any]) -> Tuple[Path, Path, Dict[str, Any]]:
+		return self._begin_hash(self.content_hash(audio_path), os.path.basename(audio_path), stage, params)
+
+	def _begin_hash(self, audio_hash: str, source_name: str, stage: str, params: Dict[str, Any]) -> Tuple[Path, Path, Dict[str, Any]]:
+		key = self.key(audio_hash, stage, params)
+		final = self._entry_dir(key)
+		tmp = final.parent / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+		if tmp.exists():
+			shutil.rmtree(tmp, ignore_errors=True)
+		tmp.mkdir(parents=True)
+		meta = {
+			"key": key,
+			"stage": stage,
+			"params": params,
+			"audio_hash": audio_hash,
+			"source_name": source_name,
+			"created_at": time.time(),
+		}
+		return tmp, final, meta
+
+	def _commit(self, tmp: Path, final: Path, meta: Dict[str, Any]) -> Path:
+		with open(tmp / META_FILE, "w", encoding="utf-8") as f:
+			json.dump(meta, f, indent=2)
+		size = _dir_size(tmp)
+		if final.exists():
+			self._drop(final)
+		try:
+			os.replace(tmp, final)
+			self._add_bytes(size)
+		except OSError:
+			# Another process committed the same entry first; keep theirs
+			shutil.rmtree(tmp, ignore_errors=True)
+		with self._total_lock:
+			total = self._total_bytes
+		if total is None or total > self.max_bytes:
+			# First write of this instance (also applies max_age), or over the limit
+			self.prune()
+		return final
+
+	def get_json(self, audio_path: str, stage: str, params: Dict[str, Any]) -> Optional[Any]:
+		"""Return the cached JSON value for this stage, or None on a miss"""
+		entry = self._lookup(audio_path, stage, params)
+		if entry is None:
+			return None
+		try:
+			with open(entry / DATA_FILE, "r", encoding="utf-8") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return None
+
+	def put_json(self, audio_path: str, stage: str, params: Dict[str, Any], value: Any) -> None:
+		tmp, final, meta = self._begin(audio_path, stage, params)
+		with open(tmp / DATA_FILE, "w", encoding="utf-8") as f:
+			json.dump(value, f)
+		self._commit(tmp, final, meta)
+
+	def get_json_by_hash(self, audio_hash: str, stage: str, params: Dict[str, Any]) -> Optional[Any]:
+		"""Like get_json, for content that is not a file (e.g. an in-memory audio chunk)"""
+		entry = self._lookup_hash(audio_hash, stage, params)
+		if entry is None:
+			return None
+		try:
+			with open(entry / DATA_FILE, "r", encoding="utf-8") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return None
+
+	def put_json_by_hash(self, audio_hash: str, stage: str, params: Dict[str, Any], value: Any, source_name: str = "") -> None:
+		tmp, final, meta = self._begin_hash(audio_hash, source_name, stage, params)
+		with open(tmp / DATA_FILE, "w", encoding="utf-8") as f:
+			json.dump(value, f)
+		self._commit(tmp, final, meta)
+
+	def get_files(self, audio_path: str, stage: str, params: Dict[str, Any]) -> Optional[Dict[str, str]]:
+		"""Return {name: cached_path} for a file-producing stage, or None on a miss"""
+		entry = self._lookup(audio_path, stage, params)
+		if entry is None:
+			return None
+		try:
+			with open(entry / META_FILE, "r", encoding="utf-8") as f:
+				names = json.load(f).get("files", {})
+		except (OSError, ValueError):
+			return None
+		files = {name: str(entry / fname) for name, fname in names.items()}
+		if not all(os.path.exists(p) for p in files.values()):
+			return None
+		return files
+
+	def put_files(self, audio_path: str, stage: str, params: Dict[str, Any], files: Dict[str, str], move: bool = False) -> Dict[str, str]:
+		"""Copy (or with move, move) stage output files into the cache and return their cached paths"""
+		tmp, final, meta = self._begin(audio_path, stage, params)
+		meta["files"] = {}
+		for name, src in files.items():
+			fname = f"{name}{os.path.splitext(src)[1]}"
+			if move:
+				shutil.move(src, tmp / fname)
+			else:
+				shutil.copy2(src, tmp / fname)
+			meta["files"][name] = fname
+		final = self._commit(tmp, final, meta)
+		return {name: str(final / fname) for name, fname in meta["files"].items()}
+
+	def entries(self) -> List[CacheEntry]:
+		"""All committed entries, least recently used first"""
+		result: List[CacheEntry] = []
+		if not self.root.exists():
+			return result
+		for meta_path in self.root.glob(f"*/*/{META_FILE}"):
+			try:
+				with open(meta_path, "r", encoding="utf-8") as f:
+					meta = json.load(f)
+				result.append(CacheEntry(
+					key=meta.get("key", meta_path.parent.name),
+					stage=meta.get("stage", ""),
+					params=meta.get("params", {}),
+					audio_hash=meta.get("audio_hash", ""),
+					source_name=meta.get("source_name", ""),
+					size_bytes=_dir_size(meta_path.parent),
+					last_used=meta_path.stat().st_mtime,
+				))
+			except (OSError, ValueError):
+				continue
+		result.sort(key=lambda e: e.last_used)
+		return result
+
+	def total_bytes(self) -> int:
+		return sum(e.size_bytes for e in self.entries())
+
+	def remove(self, key: str) -> None:
+		self._drop(self._entry_dir(key))
+
+	def prune(self, max_bytes: Optional[int] = None, older_than_days: Optional[float] = None) -> List[CacheEntry]:
+		"""Evict entries unused for older_than_days (default: max_age), then least recently
+		used entries until under max_bytes; return what was removed"""
+		limit = self.max_bytes if max_bytes is None else max_bytes
+		if older_than_days is None and self.max_age is not None:
+			older_than_days = self.max_age / 86400.0
+		entries = self.entries()
+		removed: List[CacheEntry] = []
+		if older_than_days is not None:
+			cutoff = time.time() - older_than_days * 86400
+			for e in [e for e in entries if e.last_used < cutoff]:
+				self.remove(e.key)
+				removed.append(e)
+				entries.remove(e)
+		total = sum(e.size_bytes for e in entries)
+		for e in entries:
+			if total <= limit:
+				break
+			self.remove(e.key)
+			removed.append(e)
+			total -= e.size_bytes
+		with self._total_lock:
+			self._total_bytes = total
+		return removed
+
+	def clear(self) -> None:
+		shutil.rmtree(self.root, ignore_errors=True)
+		with self._total_lock:
+			self._total_bytes = 0
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("SONG_EDITOR_AUDIO_CACHE_MB", "1024")) * 1024 * 1024)
+
+# (abspath, mtime_ns, size, sr or None for native, mono)
+CacheKey = Tuple[str, int, int, Optional[int], bool]
+
+
+def _decode(path: str) -> Tuple[np.ndarray, int]:
+	"""Decode to float32 (frames, channels) at the file's native rate."""
+	try:
+		data, sr = sf.read(path, dtype="float32", always_2d=True)
+		return data, int(sr)
+	except Exception:
+		# Formats libsndfile cannot read (e.g. m4a/aac) go through librosa's audioread fallback
+		import librosa
+		y, sr = librosa.load(path, sr=None, mono=False)
+		data = np.atleast_2d(y).T.astype(np.float32, copy=False)
+		return np.ascontiguousarray(data), int(sr)
+
+
+def _resample(y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+	import librosa
+	if y.ndim == 1:
+		return librosa.resample(y, orig_sr=orig_sr, target_sr=target_sr)
+	return np.ascontiguousarray(librosa.resample(y.T, orig_sr=orig_sr, target_sr=target_sr).T)
+
+
+class AudioCache:
+	"""
+	Process-wide cache of decoded audio, keyed by (path, mtime, size, sr, mono).
+	Entries are evicted least-recently-used once the total size exceeds max_bytes.
+	Arrays handed out are read-only; copy before modifying.
+	"""
+
+	def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+		self.max_bytes = max_bytes
+		self._entries: OrderedDict[CacheKey, Tuple[np.ndarray, int]] = OrderedDict()
+		self._bytes = 0
+		# Guards the dict only; decoding and resampling run outside it
+		self._lock = threading.Lock()
+		# Keys being decoded right now, so concurrent requests for one key decode it once
+		self._loading: Dict[CacheKey, threading.Event] = {}
+
+	@staticmethod
+	def _key(path: str, sr: Optional[int], mono: bool) -> CacheKey:
+		path = os.path.abspath(path)
+		st = os.stat(path)
+		return (path, st.st_mtime_ns, st.st_size, sr, mono)
+
+	def get(self, path: str, sr: Optional[int] = None, mono: bool = False) -> Tuple[np.ndarray, int]:
+		"""
+		Return (audio, sample_rate). Multichannel audio is (frames, channels); mono is (frames,).
+		When sr is given the audio is resampled to it; resampled variants are cached too.
+		Different keys decode in parallel; a second request for a key being decoded waits for it.
+		"""
+		key = self._key(path, sr, mono)
+		while True:
+			with self._lock:
+				hit = self._entries.get(key)
+				if hit is not None:
+					self._entries.move_to_end(key)
+					return hit[0].view(), hit[1]
+				loading = self._loading.get(key)
+				if loading is None:
+					loading = self._loading[key] = threading.Event()
+					break
+			# Another thread is decoding this key; use its result (or decode if it failed)
+			loading.wait()
+		try:
+			if sr is not None:
+				base, base_sr = self.get(path, None, mono)
+				y = base if base_sr == sr else _resample(base, base_sr, sr)
+				out_sr = sr
+			elif mono:
+				base, out_sr = self.get(path, None, False)
+				y = base.mean(axis=1)
+			else:
+				y, out_sr = _decode(path)
+			y.setflags(write=False)
+			with self._lock:
+				self._put(key, y, out_sr)
+		finally:
+			with self._lock:
+				del self._loading[key]
+			loading.set()
+		return y.view(), out_sr
+
+	def _put(self, key: CacheKey, y: np.ndarray, sr: int) -> None:
+		# Drop variants decoded from an older version of the same file
+		for stale in [k for k in self._entries if k[0] == key[0] and k[1:3] != key[1:3]]:
+			self._bytes -= self._entries.pop(stale)[0].nbytes
+		if y.nbytes > self.max_bytes:
+			return
+		self._entries[key] = (y, sr)
+		self._bytes += y.nbytes
+		self._evict()
+
+	def _evict(self) -> None:
+		while self._bytes > self.max_bytes and self._entries:
+			_, (y, _) = self._entries.popitem(last=False)
+			self._bytes -= y.nbytes
+
+	def set_max_bytes(self, max_bytes: int) -> None:
+		with self._lock:
+			self.max_bytes = max_bytes
+			self._evict()
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self._bytes = 0
+
+	@property
+	def nbytes(self) -> int:
+		return self._bytes
+
+
+_cache = AudioCache()
+
+
+def get_audio_cache() -> AudioCache:
+	return _cache
+
+
+def load_audio(path: str, sr: Optional[int] = None, mono: bool = False) -> Tuple[np.ndarray, int]:
+	"""Decode audio through the shared cache. See AudioCache.get."""
+	return _cache.get(path, sr=sr, mono=mono)
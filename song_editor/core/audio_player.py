@@ -6,7 +6,8 @@ from typing import Optional
 
 import numpy as np
 import sounddevice as sd
-import soundfile as sf
+
+from .audio_cache import load_audio
 
 
 class AudioPlayer:
@@ -21,7 +22,7 @@ class AudioPlayer:
 		self._pos = 0
 
 	def load(self, path: str) -> None:
-		data, sr = sf.read(path, dtype="float32", always_2d=True)
+		data, sr = load_audio(path)
 		self.audio = data
 		self.sr = sr
 		self._pos = 0
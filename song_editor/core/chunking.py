@@ -0,0 +1,130 @@
+"""
+Audio Chunking
+
+Splits long recordings into overlapping chunks whose cuts fall on quiet frames, shared by
+parallel Whisper transcription and chunked Gemini uploads, plus a reader that fetches
+those chunks from disk on demand instead of decoding the whole file.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from .audio_cache import load_audio
+
+HOP_SECONDS = 0.05
+
+
+def plan_chunks(
+	audio: np.ndarray,
+	sr: int,
+	chunk_seconds: float = 120.0,
+	search_seconds: float = 10.0,
+	overlap_seconds: float = 1.0,
+) -> List[Tuple[int, int]]:
+	"""Split points for parallel transcription as (start, end) sample ranges.
+
+	Each cut is placed on the quietest 50 ms frame within search_seconds of the target
+	length, and neighbouring chunks share overlap_seconds on both sides of the cut so
+	words straddling a cut are fully heard by at least one chunk.
+	"""
+	n = len(audio)
+	hop = max(1, int(HOP_SECONDS * sr))
+	frames = n // hop
+	energy = np.mean(np.asarray(audio[: frames * hop], dtype=np.float32).reshape(frames, hop) ** 2, axis=1)
+	return plan_chunks_from_energy(energy, hop, n, sr, chunk_seconds, search_seconds, overlap_seconds)
+
+
+def plan_chunks_from_energy(
+	energy: np.ndarray,
+	hop: int,
+	n: int,
+	sr: int,
+	chunk_seconds: float = 120.0,
+	search_seconds: float = 10.0,
+	overlap_seconds: float = 1.0,
+) -> List[Tuple[int, int]]:
+	"""plan_chunks for audio that is not in memory: energy holds one mean square per hop samples."""
+	target = int(chunk_seconds * sr)
+	if n <= target + int(search_seconds * sr) or len(energy) == 0:
+		return [(0, n)]
+	frames = len(energy)
+	search = int(search_seconds * sr) // hop
+
+	cuts = [0]
+	while n - cuts[-1] > target + search * hop:
+		centre = (cuts[-1] + target) // hop
+		lo, hi = max(centre - search, cuts[-1] // hop + 1), min(centre + search, frames - 1)
+		window = energy[lo:hi + 1]
+		# Among equally quiet frames (e.g. digital silence) prefer the one nearest the target
+		candidates = lo + np.flatnonzero(window <= window.min())
+		quietest = int(candidates[np.argmin(np.abs(candidates - centre))])
+		cuts.append(quietest * hop + hop // 2)
+	cuts.append(n)
+
+	overlap = int(overlap_seconds * sr)
+	return [(max(0, a - overlap), min(n, b + overlap)) for a, b in zip(cuts[:-1], cuts[1:])]
+
+
+def chunk_cuts(chunks: List[Tuple[int, int]]) -> List[int]:
+	"""The cut positions (in samples) behind a plan_chunks result: [0, cut1, ..., n]"""
+	if not chunks:
+		return [0]
+	inner = [(prev_end + start) // 2 for (_, prev_end), (start, _) in zip(chunks[:-1], chunks[1:])]
+	return [chunks[0][0]] + inner + [chunks[-1][1]]
+
+
+class LazyAudioReader:
+	"""Mono windows of an audio file, read with seek/read when they are needed.
+
+	Only formats libsndfile cannot open are decoded in full (through the shared audio
+	cache). With target_sr, windows are resampled after reading, e.g. to 16 kHz to
+	shrink upload payloads.
+	"""
+
+	def __init__(self, path: str, target_sr: Optional[int] = None):
+		self.path = path
+		self._audio: Optional[np.ndarray] = None
+		try:
+			info = sf.info(path)
+			self.sr = int(info.samplerate)
+			self.frames = int(info.frames)
+		except Exception:
+			self._audio, self.sr = load_audio(path, mono=True)
+			self.frames = len(self._audio)
+		self.target_sr = target_sr if target_sr and target_sr != self.sr else None
+
+	@property
+	def out_sr(self) -> int:
+		return self.target_sr or self.sr
+
+	def frame_energy(self, hop: int, block_frames: int = 1 << 18) -> np.ndarray:
+		"""Mean square of each hop-sized mono frame, streamed block by block."""
+		if self._audio is not None:
+			frames = len(self._audio) // hop
+			return np.mean(np.asarray(self._audio[: frames * hop]).reshape(frames, hop) ** 2, axis=1)
+		block = max(hop, (block_frames // hop) * hop)
+		out: List[np.ndarray] = []
+		with sf.SoundFile(self.path) as f:
+			for data in f.blocks(blocksize=block, dtype="float32", always_2d=True):
+				mono = data.mean(axis=1)
+				frames = len(mono) // hop
+				if frames:
+					out.append(np.mean(mono[: frames * hop].reshape(frames, hop) ** 2, axis=1))
+		return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+	def read(self, start: int, stop: int) -> np.ndarray:
+		"""Samples [start, stop) at the source rate, as mono float32 at out_sr."""
+		if self._audio is not None:
+			y = np.asarray(self._audio[start:stop], dtype=np.float32)
+		else:
+			with sf.SoundFile(self.path) as f:
+				f.seek(start)
+				y = f.read(stop - start, dtype="float32", always_2d=True).mean(axis=1)
+		if self.target_sr:
+			import librosa
+			y = librosa.resample(y, orig_sr=self.sr, target_sr=self.target_sr)
+		return np.ascontiguousarray(y, dtype=np.float32)
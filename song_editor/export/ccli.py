@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Sequence
 
 from ..models.lyrics import WordRow
+from ..models.timeline import WordTimeline
 
 
-def export_ccli(path: str, words: List[WordRow]) -> None:
+def export_ccli(path: str, words: Sequence[WordRow]) -> None:
 	"""
 	Write ChordPro-like text, injecting chords in square brackets before the word where the chord changes.
 	Lines are split on gaps (>0.5s) in the word stream.
@@ -16,21 +17,27 @@ def export_ccli(path: str, words: List[WordRow]) -> None:
 			f.write("")
 		return
 
+	# A WordTimeline is read column by column rather than through a proxy per field
+	if isinstance(words, WordTimeline):
+		fields = zip(words.texts(), words.texts("chord"), words.starts.tolist(), words.ends.tolist())
+	else:
+		fields = ((w.text, w.chord, w.start, w.end) for w in words)
+
 	lines: list[list[str]] = []
 	current: list[str] = []
 	prev_chord: str | None = None
-	for i, w in enumerate(words):
+	prev_end: float | None = None
+	for text, chord, start, end in fields:
+		if prev_end is not None and start - prev_end > 0.5:
+			lines.append(current)
+			current = []
+			prev_chord = None
 		# inject chord when it changes and exists
-		if w.chord and w.chord != prev_chord:
-			current.append(f"[{w.chord}]")
-			prev_chord = w.chord
-		current.append(w.text)
-		if i + 1 < len(words):
-			next_w = words[i + 1]
-			if next_w.start - w.end > 0.5:
-				lines.append(current)
-				current = []
-				prev_chord = None
+		if chord and chord != prev_chord:
+			current.append(f"[{chord}]")
+			prev_chord = chord
+		current.append(text)
+		prev_end = end
 	if current:
 		lines.append(current)
 
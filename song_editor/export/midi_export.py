@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 import mido
 
@@ -14,7 +14,7 @@ def seconds_to_ticks(seconds: float, tempo: int, ticks_per_beat: int) -> int:
 	return int(beats * ticks_per_beat)
 
 
-def export_midi(path: str, words: List[WordRow], chords: Optional[List[DetectedChord]] = None, melody: Optional[List[AltNoteTimed]] = None) -> None:
+def export_midi(path: str, words: Sequence[WordRow], chords: Optional[List[DetectedChord]] = None, melody: Optional[List[AltNoteTimed]] = None) -> None:
 	mid = mido.MidiFile()
 	mid.ticks_per_beat = 480
 
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .lyrics import WordRow
+
+
+class StringTable:
+	"""Interned strings shared by a timeline's text columns; code 0 is None."""
+
+	def __init__(self) -> None:
+		self.values: List[Optional[str]] = [None]
+		self._codes: Dict[Optional[str], int] = {None: 0}
+
+	def code(self, value: Optional[str]) -> int:
+		code = self._codes.get(value)
+		if code is None:
+			code = self._codes[value] = len(self.values)
+			self.values.append(value)
+		return code
+
+	def __len__(self) -> int:
+		return len(self.values)
+
+
+class WordView:
+	"""WordRow-compatible proxy for one word of a WordTimeline; reads and writes the columns."""
+
+	__slots__ = ("_timeline", "_index")
+
+	def __init__(self, timeline: "WordTimeline", index: int) -> None:
+		self._timeline = timeline
+		self._index = index
+
+	def __repr__(self) -> str:
+		return f"WordView({self.text!r}, {self.start:.3f}, {self.end:.3f}, chord={self.chord!r})"
+
+	def __eq__(self, other) -> bool:
+		if isinstance(other, (WordView, WordRow)):
+			return all(getattr(self, f) == getattr(other, f) for f in WordTimeline.ROW_FIELDS)
+		return NotImplemented
+
+	def to_row(self) -> WordRow:
+		return WordRow(**{f: getattr(self, f) for f in WordTimeline.ROW_FIELDS})
+
+
+def _float_column(name: str, optional: bool = False) -> property:
+	def get(self: WordView) -> Optional[float]:
+		value = getattr(self._timeline, name).item(self._index)
+		return None if optional and value != value else value
+
+	def set(self: WordView, value: Optional[float]) -> None:
+		getattr(self._timeline, name)[self._index] = np.nan if value is None else value
+
+	return property(get, set)
+
+
+def _text_column(name: str) -> property:
+	def get(self: WordView) -> Optional[str]:
+		t = self._timeline
+		return t.strings.values[getattr(t, name).item(self._index)]
+
+	def set(self: WordView, value: Optional[str]) -> None:
+		t = self._timeline
+		getattr(t, name)[self._index] = t.strings.code(value)
+
+	return property(get, set)
+
+
+def _line_break_get(self: WordView) -> bool:
+	return self._timeline.line_break_at(self._index)
+
+
+def _line_break_set(self: WordView, value: bool) -> None:
+	self._timeline.set_line_break(self._index, value)
+
+
+class WordTimeline:
+	"""Columnar storage for a long word list.
+
+	Times and confidences are float64 arrays (alt_start/alt_end use NaN for None), text
+	columns are int32 codes into one shared StringTable, and line breaks are a packed
+	bitmask. Indexing yields WordView proxies, so code written against lists of WordRow
+	(the table model, block view and exporters) reads a timeline without building rows.
+	"""
+
+	FLOAT_FIELDS = ("start", "end", "confidence", "alt_start", "alt_end")
+	TEXT_FIELDS = ("text", "chord", "alt_text", "alt_chord", "gemini_text", "gemini_chord")
+	ROW_FIELDS = ("text", "start", "end", "confidence", "chord", "alt_text", "alt_chord", "alt_start", "alt_end", "line_break")
+
+	def __init__(self, capacity: int = 0) -> None:
+		self._n = 0
+		self.strings = StringTable()
+		self._allocate(max(8, capacity))
+
+	def _allocate(self, capacity: int) -> None:
+		for name in self.FLOAT_FIELDS:
+			fill = np.nan if name.startswith("alt_") else 0.0
+			self._grow(f"_{name}", np.full(capacity, fill), self._n)
+		for name in self.TEXT_FIELDS:
+			self._grow(f"_{name}", np.zeros(capacity, dtype=np.int32), self._n)
+		self._grow("_line_bits", np.zeros((capacity + 7) // 8, dtype=np.uint8), (self._n + 7) // 8)
+		self._capacity = capacity
+
+	def _grow(self, attr: str, fresh: np.ndarray, used: int) -> None:
+		old = getattr(self, attr, None)
+		if old is not None and used:
+			fresh[:used] = old[:used]
+		setattr(self, attr, fresh)
+
+	@classmethod
+	def from_rows(cls, rows: Sequence) -> "WordTimeline":
+		timeline = cls(len(rows))
+		timeline.extend(rows)
+		return timeline
+
+	@classmethod
+	def from_words(cls, words: Sequence) -> "WordTimeline":
+		"""From transcriber Words (text, start, end, confidence)."""
+		n = len(words)
+		timeline = cls(n)
+		timeline._n = n
+		timeline._start[:n] = [w.start for w in words]
+		timeline._end[:n] = [w.end for w in words]
+		timeline._confidence[:n] = [w.confidence or 0.0 for w in words]
+		timeline._text[:n] = [timeline.strings.code(w.text) for w in words]
+		return timeline
+
+	def __len__(self) -> int:
+		return self._n
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return [WordView(self, i) for i in range(*index.indices(self._n))]
+		if index < 0:
+			index += self._n
+		if not 0 <= index < self._n:
+			raise IndexError("word index out of range")
+		return WordView(self, int(index))
+
+	def __iter__(self) -> Iterator[WordView]:
+		for i in range(self._n):
+			yield WordView(self, i)
+
+	def append(self, row) -> None:
+		self.extend([row])
+
+	def extend(self, rows: Iterable) -> None:
+		rows = list(rows)
+		first = self._n
+		self._reserve(first + len(rows))
+		self._n += len(rows)
+		self._write(first, rows)
+
+	def splice(self, first: int, count: int, rows: Sequence) -> None:
+		"""Replace words [first, first + count) with rows, shifting the words after them."""
+		old_n = self._n
+		new_n = old_n - count + len(rows)
+		self._reserve(new_n)
+		src, dst = first + count, first + len(rows)
+		for column in self._columns():
+			column[dst:new_n] = column[src:old_n].copy()
+		bits = np.zeros(self._capacity, dtype=bool)
+		bits[:old_n] = self.line_breaks()
+		bits[dst:new_n] = bits[src:old_n].copy()
+		bits[new_n:] = False
+		self._line_bits[:] = np.packbits(bits, bitorder="little")[: len(self._line_bits)]
+		self._n = new_n
+		self._write(first, rows)
+
+	def _columns(self) -> Iterator[np.ndarray]:
+		for name in self.FLOAT_FIELDS + self.TEXT_FIELDS:
+			yield getattr(self, f"_{name}")
+
+	def _reserve(self, n: int) -> None:
+		if n > self._capacity:
+			self._allocate(max(n, 2 * self._capacity))
+
+	def _write(self, first: int, rows: Sequence) -> None:
+		for i, row in enumerate(rows, first):
+			view = WordView(self, i)
+			for name in self.ROW_FIELDS:
+				setattr(view, name, getattr(row, name))
+			# Set on WordRow objects by the Gemini lyrics pass
+			view.gemini_text = getattr(row, "gemini_text", None)
+			view.gemini_chord = getattr(row, "gemini_chord", None)
+
+	def to_rows(self) -> List[WordRow]:
+		return [view.to_row() for view in self]
+
+	# Column access (views of the used part, no copies)
+
+	@property
+	def starts(self) -> np.ndarray:
+		return self._start[: self._n]
+
+	@property
+	def ends(self) -> np.ndarray:
+		return self._end[: self._n]
+
+	@property
+	def confidences(self) -> np.ndarray:
+		return self._confidence[: self._n]
+
+	def midpoints(self) -> np.ndarray:
+		return 0.5 * (self.starts + self.ends)
+
+	def texts(self, field: str = "text") -> List[Optional[str]]:
+		values = self.strings.values
+		return [values[c] for c in getattr(self, f"_{field}")[: self._n].tolist()]
+
+	def set_texts(self, field: str, values: Sequence[Optional[str]]) -> None:
+		getattr(self, f"_{field}")[: self._n] = [self.strings.code(v) for v in values]
+
+	def line_breaks(self) -> np.ndarray:
+		return np.unpackbits(self._line_bits, bitorder="little")[: self._n].astype(bool)
+
+	def line_break_at(self, index: int) -> bool:
+		return bool((self._line_bits[index >> 3] >> (index & 7)) & 1)
+
+	def set_line_break(self, index: int, value: bool) -> None:
+		if value:
+			self._line_bits[index >> 3] |= np.uint8(1 << (index & 7))
+		else:
+			self._line_bits[index >> 3] &= np.uint8(~(1 << (index & 7)) & 0xFF)
+
+	def between(self, t0: float, t1: float) -> np.ndarray:
+		"""Indices of words lying entirely within [t0, t1]."""
+		return np.flatnonzero((self.starts >= t0) & (self.ends <= t1))
+
+	@property
+	def nbytes(self) -> int:
+		arrays = sum(getattr(self, f"_{name}").nbytes for name in self.FLOAT_FIELDS + self.TEXT_FIELDS)
+		return arrays + self._line_bits.nbytes + sum(len(s) for s in self.strings.values if s)
+
+
+for _name in WordTimeline.FLOAT_FIELDS:
+	setattr(WordView, _name, _float_column(f"_{_name}", optional=_name.startswith("alt_")))
+for _name in WordTimeline.TEXT_FIELDS:
+	setattr(WordView, _name, _text_column(f"_{_name}"))
+WordView.line_break = property(_line_break_get, _line_break_set)
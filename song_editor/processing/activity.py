@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+from .transcriber import Word
+
+
+@dataclass(frozen=True)
+class ActivityGate:
+	"""RMS energy gate that finds the voiced parts of a vocals stem.
+
+	Frames within threshold_db of the loudest frame (and above floor_db) count as active.
+	Gaps shorter than min_silence are bridged and every region is widened by padding
+	so word onsets and releases are not clipped.
+	"""
+	frame_seconds: float = 0.05
+	threshold_db: float = -35.0
+	floor_db: float = -60.0
+	min_silence: float = 1.5
+	padding: float = 0.4
+	join_gap: float = 0.3  # silence inserted between regions so Whisper does not merge their words
+
+	def params(self) -> dict:
+		return {
+			"frame_seconds": self.frame_seconds,
+			"threshold_db": self.threshold_db,
+			"floor_db": self.floor_db,
+			"min_silence": self.min_silence,
+			"padding": self.padding,
+			"join_gap": self.join_gap,
+		}
+
+	def regions(self, audio: np.ndarray, sr: int) -> List[Tuple[float, float]]:
+		"""Voiced regions as (start, end) seconds, sorted and non-overlapping."""
+		if audio.ndim == 2:
+			audio = audio.mean(axis=1)
+		duration = len(audio) / float(sr)
+		hop = max(1, int(round(self.frame_seconds * sr)))
+		n = len(audio) // hop
+		if n == 0:
+			return []
+		frames = np.asarray(audio[: n * hop], dtype=np.float32).reshape(n, hop)
+		rms_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+		threshold = max(float(rms_db.max()) + self.threshold_db, self.floor_db)
+		active = rms_db >= threshold
+		if not active.any():
+			return []
+
+		# Run boundaries of the active mask, in frames
+		edges = np.flatnonzero(np.diff(np.concatenate(([0], active.view(np.int8), [0]))))
+		starts, ends = edges[0::2], edges[1::2]
+		# Bridge short gaps between consecutive runs
+		keep = (starts[1:] - ends[:-1]) * hop / sr >= self.min_silence
+		starts = np.concatenate((starts[:1], starts[1:][keep]))
+		ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+
+		out: List[Tuple[float, float]] = []
+		for s, e in zip(starts * hop / sr - self.padding, ends * hop / sr + self.padding):
+			s, e = max(0.0, float(s)), min(duration, float(e))
+			if out and s <= out[-1][1]:
+				out[-1] = (out[-1][0], e)
+			else:
+				out.append((s, e))
+		return out
+
+	def apply(self, audio: np.ndarray, sr: int) -> "GatedAudio":
+		"""Concatenate the voiced regions (separated by join_gap of silence)."""
+		if audio.ndim == 2:
+			audio = audio.mean(axis=1)
+		regions = self.regions(audio, sr)
+		gap = np.zeros(int(round(self.join_gap * sr)), dtype=np.float32)
+		pieces: List[np.ndarray] = []
+		gated_starts: List[float] = []
+		pos = 0
+		for i, (s, e) in enumerate(regions):
+			if i:
+				pieces.append(gap)
+				pos += len(gap)
+			chunk = np.asarray(audio[int(round(s * sr)):int(round(e * sr))], dtype=np.float32)
+			gated_starts.append(pos / float(sr))
+			pieces.append(chunk)
+			pos += len(chunk)
+		gated = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+		return GatedAudio(gated, sr, regions, gated_starts, len(audio) / float(sr))
+
+
+@dataclass
+class GatedAudio:
+	audio: np.ndarray
+	sr: int
+	regions: List[Tuple[float, float]]  # source (start, end) seconds of each kept region
+	gated_starts: List[float]  # where each region begins in the gated audio
+	total_seconds: float
+
+	@property
+	def kept_seconds(self) -> float:
+		return float(sum(e - s for s, e in self.regions))
+
+	@property
+	def skipped_seconds(self) -> float:
+		return max(0.0, self.total_seconds - self.kept_seconds)
+
+	def to_source(self, t: np.ndarray | float) -> np.ndarray:
+		"""Map gated-audio times back to absolute times in the original recording."""
+		t = np.asarray(t, dtype=np.float64)
+		if not self.regions:
+			return t
+		starts = np.asarray(self.gated_starts)
+		src = np.asarray(self.regions)
+		i = np.clip(np.searchsorted(starts, t, side="right") - 1, 0, len(starts) - 1)
+		# Times inside a join gap clamp to the end of the preceding region
+		return np.minimum(src[i, 0] + (t - starts[i]), src[i, 1])
+
+	def remap_words(self, words: List[Word]) -> List[Word]:
+		if not words or not self.regions:
+			return list(words)
+		starts = self.to_source([w.start for w in words])
+		ends = self.to_source([w.end for w in words])
+		return [Word(w.text, float(s), float(max(s, e)), w.confidence) for w, s, e in zip(words, starts, ends)]
+
+	def report(self) -> dict:
+		return {
+			"total_seconds": round(self.total_seconds, 2),
+			"skipped_seconds": round(self.skipped_seconds, 2),
+			"regions": len(self.regions),
+		}
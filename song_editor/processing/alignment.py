@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import re
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+
+def midpoints(items: Iterable) -> np.ndarray:
+	"""0.5 * (start + end) of every item with start/end attributes (rows, words, chords)."""
+	if hasattr(items, "midpoints"):
+		# WordTimeline: straight from its start/end columns
+		return items.midpoints()
+	return np.fromiter((0.5 * (it.start + it.end) for it in items), dtype=np.float64)
+
+
+def nearest_indices(row_mids: Sequence[float] | np.ndarray, query_mids: Sequence[float] | np.ndarray) -> np.ndarray:
+	"""Index of the row whose midpoint is closest to each query midpoint (-1 if there are no rows).
+
+	Rows need not be sorted. Matches a linear scan that keeps the first row with the
+	smallest |query - row|: among equally close rows the lowest index wins.
+	"""
+	rows = np.asarray(row_mids, dtype=np.float64)
+	queries = np.asarray(query_mids, dtype=np.float64)
+	if len(rows) == 0:
+		return np.full(len(queries), -1, dtype=np.intp)
+	order = np.argsort(rows, kind="stable")
+	sorted_mids = rows[order]
+	pos = np.searchsorted(sorted_mids, queries, side="left")
+	# First midpoint >= query and last midpoint < query; for the latter step back to the
+	# first of any equal midpoints, which (stable sort) is the lowest row index
+	right = np.minimum(pos, len(rows) - 1)
+	left = np.searchsorted(sorted_mids, sorted_mids[np.maximum(pos - 1, 0)], side="left")
+	d_left = np.abs(queries - sorted_mids[left])
+	d_right = np.abs(queries - sorted_mids[right])
+	i_left, i_right = order[left], order[right]
+	take_right = (d_right < d_left) | ((d_right == d_left) & (i_right < i_left))
+	return np.where(take_right, i_right, i_left)
+
+
+def nearest_rows(rows: Sequence, items: Sequence) -> np.ndarray:
+	"""For each item (Gemini word or chord), the index of the row nearest in time, by midpoint."""
+	return nearest_indices(midpoints(rows), midpoints(items))
+
+
+def _norm(text: str) -> str:
+	return re.sub(r"[^\w']", "", text.lower())
+
+
+def _bigram_masks(words: Sequence[str]) -> np.ndarray:
+	"""64-bit set of hashed character bigrams per word, for a cheap Jaccard similarity."""
+	out = np.zeros(len(words), dtype=np.uint64)
+	for k, w in enumerate(words):
+		padded = f" {w} "
+		mask = 0
+		for a in range(len(padded) - 1):
+			# Fixed hash: the builtin hash() of str is salted per process
+			mask |= 1 << ((ord(padded[a]) * 31 + ord(padded[a + 1])) & 63)
+		out[k] = mask
+	return out
+
+
+_POPCOUNT8 = np.array([bin(v).count("1") for v in range(256)], dtype=np.uint8)
+
+
+def _popcount(x: np.ndarray) -> np.ndarray:
+	return _POPCOUNT8[x.view(np.uint8)].reshape(*x.shape, 8).sum(axis=-1)
+
+
+def align_words(
+	rows: Sequence,
+	alts: Sequence,
+	band: int = 16,
+	text_weight: float = 0.5,
+	time_scale: float = 0.5,
+	min_similarity: float = 0.35,
+) -> np.ndarray:
+	"""Monotonic one-to-one alignment of local rows to Gemini words by time and text.
+
+	Returns, for each row, the index of its Gemini word or -1. The alignment maximises the
+	total of (similarity - min_similarity) over matched pairs, where similarity mixes text
+	(1 for the same normalised word, else bigram Jaccard) and time (exp(-|midpoint gap| /
+	time_scale)) by text_weight; pairs below min_similarity are never matched. Both lists
+	are expected in time order. Each row only considers the band Gemini words either side
+	of its position in time, so time and memory are O(len(rows) * band).
+	"""
+	n, m = len(rows), len(alts)
+	out = np.full(n, -1, dtype=np.intp)
+	if n == 0 or m == 0:
+		return out
+	row_mids, alt_mids = midpoints(rows), midpoints(alts)
+	width = min(m, 2 * band + 1)
+
+	# Band of alt columns per row (1-based DP columns), start kept non-decreasing
+	centre = np.searchsorted(alt_mids, row_mids) + 1
+	lo = np.maximum.accumulate(np.clip(centre - band, 1, m - width + 1))
+	cols = lo[:, None] + np.arange(width)  # (n, width), all within 1..m
+
+	# Similarity of every row with every alt in its band
+	row_text = [_norm(r.text) for r in rows]
+	alt_text = [_norm(a.text) for a in alts]
+	vocab: dict = {}
+	row_ids = np.array([vocab.setdefault(t, len(vocab)) for t in row_text])
+	alt_ids = np.array([vocab.setdefault(t, len(vocab)) for t in alt_text])
+	masks = _bigram_masks(list(vocab))
+	row_bg, alt_bg = masks[row_ids], masks[alt_ids]
+	j = cols - 1
+	inter = _popcount(row_bg[:, None] & alt_bg[j])
+	union = np.maximum(_popcount(row_bg[:, None] | alt_bg[j]), 1)
+	text_sim = np.where(row_ids[:, None] == alt_ids[j], 1.0, inter / union)
+	time_sim = np.exp(-np.abs(row_mids[:, None] - alt_mids[j]) / time_scale)
+	gain = text_weight * text_sim + (1.0 - text_weight) * time_sim - min_similarity
+
+	# H[i, k] is the best total for rows < i and alts < lo[i-1] + k - 1 (k == 0: the edge
+	# column just left of the band). Gaps are free, so a row is a running maximum.
+	H = np.zeros((n + 1, width + 1))
+	up = np.empty(width + 1)
+	diag = np.empty(width)
+	prev_lo = 1
+	for i in range(1, n + 1):
+		start = int(lo[i - 1])
+		prev, row = H[i - 1], H[i]
+		# Previous row at columns start-1 .. start+width-1, constant beyond its band
+		shift = start - prev_lo
+		if shift == 0:
+			up = prev
+		else:
+			up = np.empty(width + 1)
+			keep = max(0, width + 1 - shift)
+			up[:keep] = prev[shift:shift + keep]
+			up[keep:] = prev[-1]
+		np.add(up[:-1], gain[i - 1], out=diag)
+		row[0] = up[0]
+		np.maximum(up[1:], diag, out=row[1:])
+		np.maximum.accumulate(row, out=row)
+		prev_lo = start
+
+	def value(i: int, col: int) -> float:
+		if i == 0:
+			return 0.0
+		k = col - (int(lo[i - 1]) - 1)
+		return float(H[i, min(k, width)])
+
+	# Trace back from the last row and column
+	i, col = n, m
+	while i > 0 and col > 0:
+		if col < int(lo[i - 1]):
+			# Left of the band row i matches nothing
+			i -= 1
+			continue
+		here = value(i, col)
+		if here == value(i, col - 1):
+			col -= 1
+		elif here == value(i - 1, col):
+			i -= 1
+		else:
+			out[i - 1] = col - 1
+			i -= 1
+			col -= 1
+	return out
+
+
+def _chord_name(chord) -> str:
+	# DetectedChord has .name, imported ChordData has .symbol
+	return getattr(chord, "name", None) or getattr(chord, "symbol", "") or ""
+
+
+class ChordIndex:
+	"""Chords (DetectedChord or ChordData) as sorted start/end arrays for vectorised lookups.
+
+	A time belongs to the first chord (in time order) that has not ended before it, if that
+	chord spans the time within tolerance seconds. Build once and query many times.
+	"""
+
+	def __init__(self, chords: Iterable, tolerance: float = 0.01) -> None:
+		ordered = sorted(chords, key=lambda c: (c.start, c.end))
+		self.tolerance = tolerance
+		self.names = [_chord_name(c) for c in ordered]
+		self.starts = np.fromiter((c.start for c in ordered), dtype=np.float64, count=len(ordered))
+		self.ends = np.fromiter((c.end for c in ordered), dtype=np.float64, count=len(ordered))
+		# Running maximum keeps the search array sorted even if chords overlap
+		self._search_ends = np.maximum.accumulate(self.ends) if len(ordered) else self.ends
+
+	def __len__(self) -> int:
+		return len(self.names)
+
+	def lookup(self, times: Sequence[float] | np.ndarray) -> np.ndarray:
+		"""Index into self.names of the chord sounding at each time, -1 where there is none."""
+		t = np.asarray(times, dtype=np.float64)
+		if len(self) == 0:
+			return np.full(t.shape, -1, dtype=np.intp)
+		j = np.minimum(np.searchsorted(self._search_ends, t, side="left"), len(self) - 1)
+		inside = (self.starts[j] - self.tolerance <= t) & (t <= self.ends[j] + self.tolerance)
+		return np.where(inside, j, -1)
+
+	def names_at(self, times: Sequence[float] | np.ndarray) -> list[Optional[str]]:
+		return [self.names[j] if j >= 0 else None for j in self.lookup(times).tolist()]
+
+
+def annotate_words_with_chords(words: Sequence, chords: Iterable | ChordIndex) -> None:
+	"""Set each word's .chord to the chord sounding at its midpoint (None between chords)."""
+	if len(words) == 0:
+		return
+	index = chords if isinstance(chords, ChordIndex) else ChordIndex(chords)
+	if len(index) == 0:
+		return
+	names = index.names_at(midpoints(words))
+	if hasattr(words, "set_texts"):
+		words.set_texts("chord", names)
+		return
+	for word, name in zip(words, names):
+		word.chord = name
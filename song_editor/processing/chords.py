@@ -1,16 +1,24 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 import librosa
+import soundfile as sf
+
+from ..core.audio_cache import load_audio
 
 
 ROOTS = [
 	"C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"
 ]
 
+# Tuning is estimated from this many evenly spaced excerpts of this length, so it costs
+# the same for any file length and can be read from disk without loading the whole file
+TUNING_EXCERPTS = 8
+TUNING_EXCERPT_SECONDS = 10.0
+
 
 @dataclass
 class DetectedChord:
@@ -20,93 +28,243 @@ class DetectedChord:
 	confidence: float
 
 
-def _build_templates() -> list[tuple[str, np.ndarray]]:
+def _build_templates() -> tuple[list[str], np.ndarray]:
+	"""Return (names, matrix) where matrix is (24, 12), one row per chord template."""
 	major = np.zeros(12)
 	major[[0, 4, 7]] = [1.0, 0.9, 0.9]
 	minor = np.zeros(12)
 	minor[[0, 3, 7]] = [1.0, 0.9, 0.9]
-	templates: list[tuple[str, np.ndarray]] = []
+	names: list[str] = []
+	rows: list[np.ndarray] = []
 	for i, r in enumerate(ROOTS):
-		maj = np.roll(major, i)
-		minr = np.roll(minor, i)
-		templates.append((f"{r}", maj))
-		templates.append((f"{r}m", minr))
-	return templates
+		names.append(f"{r}")
+		rows.append(np.roll(major, i))
+		names.append(f"{r}m")
+		rows.append(np.roll(minor, i))
+	return names, np.vstack(rows)
+
+
+def _excerpt_starts(total: int, length: int, count: int = TUNING_EXCERPTS) -> List[int]:
+	"""Start offsets of up to count evenly spaced excerpts of length samples (one covering everything if short)."""
+	if total <= length * count:
+		return [0]
+	return [int(s) for s in np.linspace(0, total - length, count)]
+
+
+def _normalize_chroma(chromagram: np.ndarray) -> np.ndarray:
+	chromagram = chromagram + 1e-6
+	return chromagram / np.maximum(np.sum(chromagram, axis=0, keepdims=True), 1e-6)
 
 
 class ChordDetector:
-	def __init__(self) -> None:
-		self.templates = _build_templates()
+	def __init__(self, sr: int = 22050, hop_length: int = 2048) -> None:
+		self.sr = sr
+		self.hop_length = hop_length
+		self.template_names, self.template_matrix = _build_templates()
+		# Label lookup indexed by score_frames() codes; the last entry is the no-chord label
+		self.labels = np.array(self.template_names + ["N"], dtype=object)
+
+	def score_frames(self, chromagram: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+		"""
+		Score every chroma frame (12, T) against all templates in a single matrix product.
+		Returns (codes, scores): codes index into self.labels, with len(template_names)
+		meaning "N" for frames where no template scores above zero.
+		"""
+		scores = self.template_matrix @ chromagram  # (24, T)
+		codes = np.argmax(scores, axis=0)
+		best = scores[codes, np.arange(scores.shape[1])]
+		no_chord = best <= 0.0
+		codes[no_chord] = len(self.template_names)
+		best[no_chord] = 0.0
+		return codes, best
+
+	def estimate_tuning(self, pieces: Sequence[np.ndarray]) -> float:
+		"""Tuning offset (fractions of a bin, as librosa) from mono excerpts at self.sr."""
+		y = np.concatenate(pieces) if len(pieces) else np.zeros(0, dtype=np.float32)
+		return float(librosa.estimate_tuning(y=y, sr=self.sr, bins_per_octave=36))
+
+	def file_tuning(self, audio_path: str) -> Optional[float]:
+		"""
+		Tuning pre-pass reading only the excerpts from disk, shared by detect() and
+		detect_streaming() so both analyse a file with the same tuning. None if soundfile
+		cannot open the file.
+		"""
+		try:
+			info = sf.info(audio_path)
+		except Exception:
+			return None
+		length = int(TUNING_EXCERPT_SECONDS * info.samplerate)
+		starts = _excerpt_starts(info.frames, length)
+		if starts == [0]:
+			length = info.frames
+		pieces = []
+		with sf.SoundFile(audio_path) as f:
+			for start in starts:
+				f.seek(start)
+				y = f.read(length, dtype="float32", always_2d=True).mean(axis=1)
+				if info.samplerate != self.sr:
+					y = librosa.resample(y, orig_sr=info.samplerate, target_sr=self.sr)
+				pieces.append(y)
+		return self.estimate_tuning(pieces)
 
 	def detect(self, audio_path: str) -> List[DetectedChord]:
-		y, sr = librosa.load(audio_path, mono=True)
-		hop_length = 2048
-		chromagram = librosa.feature.chroma_cqt(y=y, sr=sr, hop_length=hop_length)
-		# normalize per-frame
-		chromagram += 1e-6
-		chromagram = chromagram / np.maximum(np.sum(chromagram, axis=0, keepdims=True), 1e-6)
-		times = librosa.times_like(chromagram, sr=sr, hop_length=hop_length)
-
-		best_labels: list[str] = []
-		best_scores: list[float] = []
-		for i in range(chromagram.shape[1]):
-			v = chromagram[:, i]
-			label = "N"
-			score = 0.0
-			for name, tmpl in self.templates:
-				val = float(np.dot(v, tmpl))
-				if val > score:
-					score = val
-					label = name
-			best_labels.append(label)
-			best_scores.append(score)
-
-		# median filter smoothing over 7 frames
-		win = 7
+		y, sr = load_audio(audio_path, sr=self.sr, mono=True)
+		return self.detect_audio(y, sr, tuning=self.file_tuning(audio_path))
+
+	def detect_audio(self, y: np.ndarray, sr: int, tuning: Optional[float] = None) -> List[DetectedChord]:
+		"""
+		Detect chords from in-memory audio, (frames,) or (frames, channels), at any sample rate.
+		Without a tuning it is estimated from excerpts of y, as file_tuning() does from disk.
+		"""
+		if y.ndim == 2:
+			y = y.mean(axis=1)
+		if sr != self.sr:
+			y = librosa.resample(y, orig_sr=sr, target_sr=self.sr)
+			sr = self.sr
+		if tuning is None:
+			length = int(TUNING_EXCERPT_SECONDS * sr)
+			starts = _excerpt_starts(len(y), length)
+			tuning = self.estimate_tuning([y] if starts == [0] else [y[s:s + length] for s in starts])
+		chromagram = librosa.feature.chroma_cqt(y=y, sr=sr, hop_length=self.hop_length, tuning=tuning)
+		chromagram = _normalize_chroma(chromagram)
+		times = librosa.times_like(chromagram, sr=sr, hop_length=self.hop_length)
+
+		codes, best_scores = self.score_frames(chromagram)
+		return self.segment(self.smooth_codes(codes), best_scores, times)
+
+	def detect_streaming(self, audio_path: str, block_seconds: float = 60.0, context_seconds: float = 5.0) -> Iterator[DetectedChord]:
+		"""
+		Detect chords block by block, yielding each chord as soon as it is complete.
+		Memory is bounded by block_seconds + 2 * context_seconds of audio regardless of file length.
+		Tuning comes from the same file_tuning() pre-pass as detect(). Formats soundfile cannot
+		open fall back to the full-file detect().
+		"""
+		try:
+			info = sf.info(audio_path)
+		except Exception:
+			yield from self.detect(audio_path)
+			return
+		tuning = self.file_tuning(audio_path)
+		blocks = (
+			(*self.score_frames(chroma), times)
+			for chroma, times in self.chroma_blocks(audio_path, info, block_seconds, context_seconds, tuning)
+		)
+		yield from self.segment_stream(blocks)
+
+	def chroma_blocks(self, audio_path: str, info, block_seconds: float, context_seconds: float, tuning: float) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+		"""
+		Yield normalized (chroma, times) for consecutive runs of frames, reading only one padded
+		block of audio at a time. Each block is analysed with context_seconds of neighbouring audio
+		on both sides so CQT filters and resampling see the same signal as a full-file pass, and
+		only the frames owned by the block are kept. Every block uses the given tuning.
+		"""
+		hop = self.hop_length
+		ratio = info.samplerate / self.sr
+		total_frames = 1 + int(np.ceil(info.frames / ratio)) // hop
+		block_frames = max(1, int(round(block_seconds * self.sr / hop)))
+		context_frames = int(np.ceil(context_seconds * self.sr / hop))
+		with sf.SoundFile(audio_path) as f:
+			for first in range(0, total_frames, block_frames):
+				last = min(total_frames, first + block_frames)
+				win_first = max(0, first - context_frames)
+				win_last = last + context_frames
+				src_start = int(round(win_first * hop * ratio))
+				src_stop = min(info.frames, int(round(win_last * hop * ratio)))
+				f.seek(src_start)
+				data = f.read(src_stop - src_start, dtype="float32", always_2d=True)
+				y = data.mean(axis=1)
+				if info.samplerate != self.sr:
+					y = librosa.resample(y, orig_sr=info.samplerate, target_sr=self.sr)
+				chroma = librosa.feature.chroma_cqt(y=y, sr=self.sr, hop_length=hop, tuning=tuning)
+				lo = first - win_first
+				hi = min(chroma.shape[1], lo + (last - first))
+				frames = np.arange(first, first + (hi - lo))
+				yield _normalize_chroma(chroma[:, lo:hi]), librosa.frames_to_time(frames, sr=self.sr, hop_length=hop)
+
+	def smooth_codes(self, codes: np.ndarray, win: int = 7) -> np.ndarray:
+		"""
+		Sliding-window mode filter over integer label codes (windows are truncated at the edges).
+		Ties resolve to the lowest code so results are deterministic.
+		"""
+		n = len(codes)
+		if n == 0:
+			return codes.copy()
 		pad = win // 2
-		labels_sm = best_labels[:]
-		for i in range(len(best_labels)):
-			lo = max(0, i - pad)
-			hi = min(len(best_labels), i + pad + 1)
-			window = best_labels[lo:hi]
-			labels_sm[i] = max(set(window), key=window.count)
-
-		# segment labels to chords
-		chords: List[DetectedChord] = []
-		current = None
-		start_time = float(times[0]) if len(times) else 0.0
-		max_conf = 0.0
-		for i, lab in enumerate(labels_sm):
-			t = float(times[i])
-			conf = best_scores[i]
-			if current is None:
-				current = lab
-				start_time = t
-				max_conf = conf
-				continue
-			if lab != current:
-				chords.append(DetectedChord(current, start_time, t, max_conf))
-				current = lab
-				start_time = t
-				max_conf = conf
-			else:
-				max_conf = max(max_conf, conf)
-		# tail
-		if current is not None:
-			end_time = float(times[-1]) if len(times) else start_time
-			chords.append(DetectedChord(current, start_time, end_time, max_conf))
-
-		# merge very short chords under 250ms
-		merged: List[DetectedChord] = []
-		for ch in chords:
-			if not merged:
-				merged.append(ch)
-				continue
-			if ch.end - ch.start < 0.25 and merged[-1].name == ch.name:
-				prev = merged[-1]
-				merged[-1] = DetectedChord(prev.name, prev.start, ch.end, max(prev.confidence, ch.confidence))
-			else:
-				merged.append(ch)
-		return merged
+		onehot = np.zeros((n + 1, len(self.labels)), dtype=np.int32)
+		onehot[np.arange(1, n + 1), codes] = 1
+		counts = np.cumsum(onehot, axis=0)
+		idx = np.arange(n)
+		lo = np.maximum(0, idx - pad)
+		hi = np.minimum(n, idx + pad + 1)
+		return np.argmax(counts[hi] - counts[lo], axis=1)
 
+	def segment(self, codes: np.ndarray, scores: np.ndarray, times: np.ndarray) -> List[DetectedChord]:
+		"""
+		Run-length encode smoothed label codes into chords. Each run ends where the next begins
+		(the last at the final frame time) and takes the max frame score as its confidence.
+		Adjacent runs always differ in label, so no further merging of short chords is needed.
+		"""
+		if len(codes) == 0:
+			return []
+		starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+		start_times = times[starts]
+		end_times = np.append(times[starts[1:]], times[-1])
+		confs = np.maximum.reduceat(scores, starts)
+		names = self.labels[codes[starts]]
+		return [
+			DetectedChord(name, float(s), float(e), float(c))
+			for name, s, e, c in zip(names, start_times, end_times, confs)
+		]
 
+	def segment_stream(self, blocks: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]], win: int = 7) -> Iterator[DetectedChord]:
+		"""
+		Incremental smooth_codes() + segment() over consecutive (codes, scores, times) blocks.
+		Frames are smoothed once their full window is available, and a chord is yielded as soon
+		as the following run starts, so the output equals segment(smooth_codes(...)) on the
+		concatenated input.
+		"""
+		pad = win // 2
+		codes_buf = np.zeros(0, dtype=np.int64)
+		history = 0  # leading frames of codes_buf already smoothed, kept as left context
+		current: tuple[int, float, float] | None = None  # (code, start, max confidence)
+		scores_buf = np.zeros(0)
+		times_buf = np.zeros(0)
+		last_time = 0.0
+
+		def emit(smoothed: np.ndarray, scores: np.ndarray, times: np.ndarray) -> Iterator[DetectedChord]:
+			nonlocal current
+			if len(smoothed) == 0:
+				return
+			starts = np.concatenate(([0], np.flatnonzero(np.diff(smoothed)) + 1))
+			confs = np.maximum.reduceat(scores, starts)
+			for k, s in enumerate(starts):
+				code = int(smoothed[s])
+				if current is not None and current[0] == code:
+					current = (code, current[1], max(current[2], float(confs[k])))
+					continue
+				if current is not None:
+					yield DetectedChord(self.labels[current[0]], current[1], float(times[s]), current[2])
+				current = (code, float(times[s]), float(confs[k]))
+
+		for codes, scores, times in blocks:
+			if len(codes) == 0:
+				continue
+			codes_buf = np.concatenate((codes_buf, codes))
+			scores_buf = np.concatenate((scores_buf, scores))
+			times_buf = np.concatenate((times_buf, times))
+			last_time = float(times[-1])
+			ready = len(codes_buf) - pad
+			if ready <= history:
+				continue
+			smoothed = self.smooth_codes(codes_buf, win)[history:ready]
+			yield from emit(smoothed, scores_buf[:ready - history], times_buf[:ready - history])
+			keep = min(pad, ready)
+			codes_buf = codes_buf[ready - keep:]
+			scores_buf = scores_buf[ready - history:]
+			times_buf = times_buf[ready - history:]
+			history = keep
+		if len(codes_buf) > history:
+			smoothed = self.smooth_codes(codes_buf, win)[history:]
+			yield from emit(smoothed, scores_buf, times_buf)
+		if current is not None:
+			yield DetectedChord(self.labels[current[0]], current[1], last_time, current[2])
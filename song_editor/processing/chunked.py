@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import replace
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..core.chunking import plan_chunks
+from .transcriber import Transcriber, WhisperEngineConfig, Word
+
+
+# Lazily created worker pool, reused while the worker count and engine settings stay the same
+_chunk_pool: Optional[ProcessPoolExecutor] = None
+_chunk_pool_key: Optional[Tuple[int, WhisperEngineConfig]] = None
+_chunk_transcriber: Optional[Transcriber] = None
+
+
+def _norm(text: str) -> str:
+	return re.sub(r"[^\w']", "", text.lower())
+
+
+def merge_chunk_words(chunks: List[List[Word]], tolerance: float = 0.05) -> List[Word]:
+	"""Stitch per-chunk words (already in absolute time) into one ordered list.
+
+	Where chunks overlap, a word that overlaps in time with a word from another chunk is a
+	duplicate: identical text keeps the higher-confidence copy, and a mismatch (a word
+	clipped at a chunk edge) also resolves to the more confident transcription.
+	"""
+	tagged = sorted(
+		((w, i) for i, words in enumerate(chunks) for w in words),
+		key=lambda item: (item[0].start, item[0].end),
+	)
+	merged: List[Tuple[Word, int]] = []
+	for word, chunk in tagged:
+		if merged:
+			prev, prev_chunk = merged[-1]
+			if prev_chunk != chunk and word.start < prev.end - tolerance:
+				same = _norm(word.text) == _norm(prev.text)
+				overlap = min(word.end, prev.end) - word.start
+				shorter = max(1e-6, min(word.end - word.start, prev.end - prev.start))
+				if same or overlap / shorter > 0.5:
+					if (word.confidence or 0.0) > (prev.confidence or 0.0):
+						merged[-1] = (word, chunk)
+					continue
+		merged.append((word, chunk))
+	return [w for w, _ in merged]
+
+
+def _init_chunk_worker(config: WhisperEngineConfig) -> None:
+	global _chunk_transcriber
+	_chunk_transcriber = Transcriber(config)
+
+
+def _transcribe_chunk(audio: np.ndarray, sr: int, offset: float, model_size: str) -> List[Word]:
+	transcriber = _chunk_transcriber or Transcriber()
+	words = transcriber.transcribe_audio(audio, sr, model_size=model_size)
+	return [Word(w.text, w.start + offset, w.end + offset, w.confidence) for w in words]
+
+
+def get_chunk_pool(workers: int, config: WhisperEngineConfig) -> ProcessPoolExecutor:
+	"""Worker processes that each keep one Whisper model loaded between chunks and files."""
+	global _chunk_pool, _chunk_pool_key
+	if config.cpu_threads == 0:
+		# Split the machine between workers instead of every model grabbing all cores
+		config = replace(config, cpu_threads=max(1, (os.cpu_count() or workers) // workers))
+	if _chunk_pool is None or _chunk_pool_key != (workers, config):
+		shutdown_chunk_pool()
+		import multiprocessing as mp
+		_chunk_pool = ProcessPoolExecutor(
+			max_workers=workers,
+			mp_context=mp.get_context("spawn"),
+			initializer=_init_chunk_worker,
+			initargs=(config,),
+		)
+		_chunk_pool_key = (workers, config)
+	return _chunk_pool
+
+
+def shutdown_chunk_pool() -> None:
+	global _chunk_pool, _chunk_pool_key
+	if _chunk_pool is not None:
+		_chunk_pool.shutdown(wait=True, cancel_futures=True)
+		_chunk_pool = None
+		_chunk_pool_key = None
+
+
+def transcribe_chunked_audio(
+	audio: np.ndarray,
+	sr: int,
+	model_size: str = "small",
+	workers: int = 2,
+	config: Optional[WhisperEngineConfig] = None,
+	chunk_seconds: float = 120.0,
+	overlap_seconds: float = 1.0,
+	executor: Optional[Executor] = None,
+) -> List[Word]:
+	"""Transcribe long mono audio as silence-aligned chunks in parallel worker processes."""
+	config = config or WhisperEngineConfig.from_env()
+	chunks = plan_chunks(audio, sr, chunk_seconds=chunk_seconds, overlap_seconds=overlap_seconds)
+	if len(chunks) == 1 and executor is None:
+		return Transcriber(config).transcribe_audio(audio, sr, model_size=model_size)
+	pool = executor or get_chunk_pool(max(1, workers), config)
+	futures = [pool.submit(_transcribe_chunk, audio[a:b], sr, a / float(sr), model_size) for a, b in chunks]
+	return merge_chunk_words([f.result() for f in futures])
@@ -0,0 +1,448 @@
+"""
+Analysis Pipeline
+
+Qt-free implementations of the separation → transcription → chord detection → export
+stages, shared by the GUI and the headless batch CLI. Stage results go through the
+persistent AnalysisCache so repeated runs on the same audio skip finished work.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from ..core.analysis_cache import AnalysisCache
+from ..core.audio_cache import load_audio
+from ..models.lyrics import WordRow
+from ..models.song_data_importer import ChordData, SongData
+from ..models.timeline import WordTimeline
+from .activity import ActivityGate
+from .alignment import annotate_words_with_chords
+from .chords import ChordDetector, DetectedChord
+from .separate import separate_vocals_instrumental, stems_dir
+from .transcriber import Transcriber, WhisperEngineConfig, Word
+
+
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.flac', '.m4a', '.aac', '.ogg', '.wma', '.opus', '.aiff', '.alac'}
+
+DEMUCS_MODEL = "htdemucs"
+
+# Rows edited by hand are marked with full confidence
+MANUAL_CONFIDENCE = 1.0
+
+# Recordings longer than this get block-wise chord detection instead of loading them whole
+CHORD_STREAMING_SECONDS = float(os.getenv("SONG_EDITOR_CHORD_STREAMING_SECONDS", "600"))
+
+# Lazily created pool and per-process stage objects for run_transcription_and_chords
+_stage_pool: Optional[ProcessPoolExecutor] = None
+_stage_worker: Dict[str, Any] = {}
+
+
+def _separation_params(model: str) -> Dict[str, Any]:
+	return {"model": model, "two_stems": "vocals"}
+
+
+def cached_stems(audio_path: str, cache: Optional[AnalysisCache], model: str = DEMUCS_MODEL) -> Tuple[Optional[str], Optional[str]]:
+	"""Cached (vocals_path, instrumental_path) from an earlier separation, or (None, None)."""
+	if cache is not None:
+		try:
+			cached = cache.get_files(audio_path, "separate", _separation_params(model))
+			if cached:
+				return cached["vocals"], cached["instrumental"]
+		except Exception:
+			pass
+	return None, None
+
+
+def run_separation(audio_path: str, cache: Optional[AnalysisCache] = None, model: str = DEMUCS_MODEL) -> Tuple[Optional[str], Optional[str], bool]:
+	"""Return (vocals_path, instrumental_path, from_cache); paths are None if separation is unavailable."""
+	params = _separation_params(model)
+	voc, inst = cached_stems(audio_path, cache, model)
+	if voc and inst:
+		return voc, inst, True
+	voc, inst = separate_vocals_instrumental(audio_path, model=model)
+	if voc and inst and cache is not None:
+		try:
+			# Move the stems into the cache entry and drop their temporary directory, so
+			# each song's stems exist once instead of piling up under the temp dir
+			stored = cache.put_files(audio_path, "separate", params, {"vocals": voc, "instrumental": inst}, move=True)
+			voc, inst = stored["vocals"], stored["instrumental"]
+			shutil.rmtree(stems_dir(audio_path, model), ignore_errors=True)
+		except Exception:
+			pass
+	return voc, inst, False
+
+
+def _transcription_params(
+	vocals_path: Optional[str],
+	config: WhisperEngineConfig,
+	model_size: str,
+	gate: Optional[ActivityGate],
+	chunk_workers: int,
+) -> Dict[str, Any]:
+	params = {"model_size": model_size, "input": "vocals" if vocals_path else "mix", **config.cache_params()}
+	if gate is not None:
+		params["gate"] = gate.params()
+	if chunk_workers > 1:
+		params["chunked"] = True
+	return params
+
+
+def _cached_transcription(
+	audio_path: str,
+	cache: Optional[AnalysisCache],
+	params: Dict[str, Any],
+	report: Optional[Dict[str, Any]] = None,
+) -> Optional[List[Word]]:
+	if cache is None:
+		return None
+	try:
+		cached = cache.get_json(audio_path, "transcribe", params)
+		if cached is None:
+			return None
+		if "gate" not in params:
+			return [Word(**w) for w in cached]
+		if report is not None:
+			report.update(cached["activity"])
+		return [Word(**w) for w in cached["words"]]
+	except Exception:
+		return None
+
+
+def cached_words(
+	audio_path: str,
+	vocals_path: Optional[str],
+	config: WhisperEngineConfig,
+	model_size: str,
+	cache: Optional[AnalysisCache],
+	gate: Optional[ActivityGate] = None,
+	chunk_workers: int = 0,
+) -> Optional[List[Word]]:
+	"""Words from an earlier run_transcription with the same settings, or None on a miss."""
+	gate = gate if vocals_path else None
+	return _cached_transcription(audio_path, cache, _transcription_params(vocals_path, config, model_size, gate, chunk_workers))
+
+
+def run_transcription(
+	audio_path: str,
+	vocals_path: Optional[str],
+	transcriber: Transcriber,
+	model_size: str,
+	cache: Optional[AnalysisCache] = None,
+	on_words: Optional[Callable[[List[Word]], None]] = None,
+	gate: Optional[ActivityGate] = None,
+	report: Optional[Dict[str, Any]] = None,
+	chunk_workers: int = 0,
+) -> Tuple[List[Word], bool]:
+	"""Transcribe the vocals stem (or the mix); return (words, from_cache).
+
+	on_words receives each segment's words as they are decoded (all at once on a cache hit).
+	With a gate and a vocals stem, only the stem's voiced regions are decoded and word
+	times are mapped back to the original timeline; report (if given) receives
+	total_seconds, skipped_seconds and regions. chunk_workers > 1 splits long audio at
+	silences and transcribes the chunks in that many worker processes.
+	"""
+	gate = gate if vocals_path else None
+	params = _transcription_params(vocals_path, transcriber.config, model_size, gate, chunk_workers)
+	cached = _cached_transcription(audio_path, cache, params, report)
+	if cached is not None:
+		if on_words is not None and cached:
+			on_words(cached)
+		return cached, True
+	if gate is None and chunk_workers <= 1:
+		words = transcriber.transcribe(vocals_path or audio_path, model_size=model_size, on_words=on_words)
+		payload: Any = [asdict(w) for w in words]
+	else:
+		audio, sr = load_audio(vocals_path or audio_path, sr=16000, mono=True)
+		gated = gate.apply(audio, sr) if gate is not None else None
+		if gated is not None:
+			audio = gated.audio
+		if not len(audio):
+			batches: Any = []
+		elif chunk_workers > 1:
+			from .chunked import transcribe_chunked_audio
+			batches = [transcribe_chunked_audio(audio, sr, model_size, workers=chunk_workers, config=transcriber.config)]
+		else:
+			batches = transcriber.iter_transcribe_audio(audio, sr, model_size=model_size)
+		words = []
+		for batch in batches:
+			if gated is not None:
+				batch = gated.remap_words(batch)
+			words.extend(batch)
+			if on_words is not None and batch:
+				on_words(batch)
+		payload = [asdict(w) for w in words]
+		if gated is not None:
+			if report is not None:
+				report.update(gated.report())
+			payload = {"words": payload, "activity": gated.report()}
+	if cache is not None:
+		try:
+			cache.put_json(audio_path, "transcribe", params, payload)
+		except Exception:
+			pass
+	return words, False
+
+
+def _chord_params(instrumental_path: Optional[str], detector: ChordDetector) -> Dict[str, Any]:
+	return {
+		"hop_length": detector.hop_length,
+		"sr": detector.sr,
+		"input": "instrumental" if instrumental_path else "mix",
+	}
+
+
+def cached_chords(
+	audio_path: str,
+	instrumental_path: Optional[str],
+	detector: ChordDetector,
+	cache: Optional[AnalysisCache],
+) -> Optional[List[DetectedChord]]:
+	"""Chords from an earlier run_chords with the same settings, or None on a miss."""
+	if cache is None:
+		return None
+	try:
+		cached = cache.get_json(audio_path, "chords", _chord_params(instrumental_path, detector))
+		return [DetectedChord(**c) for c in cached] if cached is not None else None
+	except Exception:
+		return None
+
+
+def run_chords(
+	audio_path: str,
+	instrumental_path: Optional[str],
+	detector: ChordDetector,
+	cache: Optional[AnalysisCache] = None,
+	check: Optional[Callable[[], None]] = None,
+) -> Tuple[List[DetectedChord], bool]:
+	"""Detect chords on the instrumental stem (or the mix); return (chords, from_cache).
+
+	Inputs longer than CHORD_STREAMING_SECONDS are analysed block by block with
+	detect_streaming(), which gives the same chords as detect() in bounded memory; check
+	(e.g. JobContext.check) is then called after every chord so the job can be cancelled.
+	"""
+	params = _chord_params(instrumental_path, detector)
+	cached = cached_chords(audio_path, instrumental_path, detector, cache)
+	if cached is not None:
+		return cached, True
+	path = instrumental_path or audio_path
+	try:
+		info = sf.info(path)
+		long_input = info.frames > CHORD_STREAMING_SECONDS * info.samplerate
+	except Exception:
+		long_input = False
+	if long_input:
+		chords = []
+		for chord in detector.detect_streaming(path):
+			if check is not None:
+				check()
+			chords.append(chord)
+	else:
+		chords = detector.detect(path)
+	if cache is not None:
+		try:
+			cache.put_json(audio_path, "chords", params, [asdict(c) for c in chords])
+		except Exception:
+			pass
+	return chords, False
+
+
+def _init_stage_worker(threads: Optional[int]) -> None:
+	if threads:
+		for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+			os.environ[var] = str(threads)
+
+
+def _stage_objects(cache_dir: Optional[str], config: Optional[WhisperEngineConfig] = None) -> Tuple[Transcriber, ChordDetector, AnalysisCache]:
+	"""Transcriber, detector and cache kept alive for the lifetime of a stage worker process."""
+	if _stage_worker.get("cache_dir", object()) != cache_dir:
+		_stage_worker.update(cache_dir=cache_dir, cache=AnalysisCache(root=cache_dir))
+	if config is not None and ("transcriber" not in _stage_worker or _stage_worker["transcriber"].config != config):
+		_stage_worker["transcriber"] = Transcriber(config)
+	_stage_worker.setdefault("transcriber", Transcriber())
+	_stage_worker.setdefault("detector", ChordDetector())
+	return _stage_worker["transcriber"], _stage_worker["detector"], _stage_worker["cache"]
+
+
+def _transcribe_task(
+	audio_path: str,
+	vocals_path: Optional[str],
+	model_size: str,
+	cache_dir: Optional[str],
+	config: Optional[WhisperEngineConfig],
+	gate: Optional[ActivityGate],
+	chunk_workers: int,
+) -> Tuple[List[Word], bool, Dict[str, Any]]:
+	transcriber, _, cache = _stage_objects(cache_dir, config)
+	report: Dict[str, Any] = {}
+	words, hit = run_transcription(
+		audio_path, vocals_path, transcriber, model_size, cache, gate=gate, report=report, chunk_workers=chunk_workers
+	)
+	return words, hit, report
+
+
+def _chords_task(audio_path: str, instrumental_path: Optional[str], cache_dir: Optional[str]) -> Tuple[List[DetectedChord], bool]:
+	_, detector, cache = _stage_objects(cache_dir)
+	return run_chords(audio_path, instrumental_path, detector, cache)
+
+
+def get_stage_pool(threads: Optional[int] = None) -> ProcessPoolExecutor:
+	"""Shared two-worker process pool that runs transcription and chord detection side by side."""
+	global _stage_pool
+	if _stage_pool is None:
+		import multiprocessing as mp
+		_stage_pool = ProcessPoolExecutor(
+			max_workers=2,
+			mp_context=mp.get_context("spawn"),
+			initializer=_init_stage_worker,
+			initargs=(threads,),
+		)
+	return _stage_pool
+
+
+def shutdown_stage_pool() -> None:
+	global _stage_pool
+	if _stage_pool is not None:
+		_stage_pool.shutdown(wait=True, cancel_futures=True)
+		_stage_pool = None
+
+
+def run_transcription_and_chords(
+	audio_path: str,
+	vocals_path: Optional[str],
+	instrumental_path: Optional[str],
+	model_size: str,
+	cache_dir: Optional[str] = None,
+	executor: Optional[Executor] = None,
+	config: Optional[WhisperEngineConfig] = None,
+	gate: Optional[ActivityGate] = None,
+	report: Optional[Dict[str, Any]] = None,
+	chunk_workers: int = 0,
+) -> Tuple[List[Word], bool, List[DetectedChord], bool]:
+	"""Transcribe the vocals and detect chords on the instrumental concurrently in worker processes.
+
+	Both stages only need their own stem, so they start together once separation has
+	returned; the call blocks until both finish. Returns (words, words_cached, chords, chords_cached).
+	"""
+	pool = executor or get_stage_pool()
+	cache_root = str(cache_dir) if cache_dir is not None else None
+	words_future = pool.submit(_transcribe_task, audio_path, vocals_path, model_size, cache_root, config, gate, chunk_workers)
+	chords_future = pool.submit(_chords_task, audio_path, instrumental_path, cache_root)
+	words, words_hit, activity = words_future.result()
+	if report is not None:
+		report.update(activity)
+	chords, chords_hit = chords_future.result()
+	return words, words_hit, chords, chords_hit
+
+
+def join_words_and_chords(words: List[Word], chords: List[DetectedChord]) -> WordTimeline:
+	"""Join step after transcription and chord detection: rows annotated with their chords.
+
+	Returned as a columnar WordTimeline; the exporters read it through its row proxies.
+	"""
+	rows = WordTimeline.from_words(words)
+	annotate_words_with_chords(rows, chords)
+	return rows
+
+
+def retranscribe_range(
+	audio_path: str,
+	t0: float,
+	t1: float,
+	transcriber: Transcriber,
+	model_size: str,
+	pad: float = 0.5,
+) -> List[Word]:
+	"""Transcribe only [t0, t1] of a recording; returns words in absolute time.
+
+	The slice is padded so words at the edges are heard whole, then words whose midpoint
+	falls outside the range are dropped.
+	"""
+	audio, sr = load_audio(audio_path, sr=16000, mono=True)
+	a = max(0, int((t0 - pad) * sr))
+	b = min(len(audio), int(np.ceil((t1 + pad) * sr)))
+	if b <= a:
+		return []
+	offset = a / float(sr)
+	words = transcriber.transcribe_audio(audio[a:b], sr, model_size=model_size)
+	out: List[Word] = []
+	for w in words:
+		start, end = w.start + offset, w.end + offset
+		if t0 <= 0.5 * (start + end) <= t1:
+			out.append(Word(w.text, start, end, w.confidence))
+	return out
+
+
+def splice_rows(
+	rows: Sequence[WordRow],
+	new_rows: List[WordRow],
+	t0: float,
+	t1: float,
+	keep_manual: bool = False,
+) -> Tuple[int, int, List[WordRow]]:
+	"""Work out how new_rows replace the rows of [t0, t1] (rows sorted by time).
+
+	Returns (first, count, replacement): rows[first:first + count] should become
+	replacement. Rows outside the range, including manual edits (confidence 1.0), are
+	never touched; with keep_manual, manual edits inside the range are kept as well and
+	new words overlapping them are dropped. rows may be a WordTimeline; kept words are
+	then returned as WordRow copies, since the splice overwrites the columns they live in.
+	"""
+	if isinstance(rows, WordTimeline):
+		mids = rows.midpoints()
+		first = int(np.searchsorted(mids, t0, side="left"))
+		stop = max(first, int(np.searchsorted(mids, t1, side="right")))
+	else:
+		mids = [0.5 * (r.start + r.end) for r in rows]
+		first = next((i for i, m in enumerate(mids) if m >= t0), len(rows))
+		stop = next((i for i in range(first, len(rows)) if mids[i] > t1), len(rows))
+	kept = [r for r in rows[first:stop] if keep_manual and r.confidence >= MANUAL_CONFIDENCE]
+	if isinstance(rows, WordTimeline):
+		kept = [view.to_row() for view in kept]
+	fresh = [
+		r for r in new_rows
+		if not any(r.start < k.end and k.start < r.end for k in kept)
+	]
+	replacement = sorted(kept + fresh, key=lambda r: r.start)
+	return first, stop - first, replacement
+
+
+def words_to_rows(words: List[Word]) -> List[WordRow]:
+	return [WordRow(w.text, w.start, w.end, w.confidence or 0.0) for w in words]
+
+
+def build_song_data(audio_path: Optional[str], rows: Sequence[WordRow], chords: List[DetectedChord]) -> SongData:
+	"""Assemble a SongData document from the current analysis state."""
+	chord_data_list = [
+		ChordData(
+			symbol=chord.name,
+			root=chord.name[0] if chord.name else '',
+			quality=chord.name[1:] if len(chord.name) > 1 else 'maj',
+			bass=None,
+			start=chord.start,
+			end=chord.end,
+			confidence=chord.confidence
+		)
+		for chord in chords
+	]
+	metadata = {
+		"version": "2.0.0",
+		"created_at": datetime.now().isoformat(),
+		"source_audio": audio_path or "",
+		"processing_tool": "Song Editor 2",
+		"confidence_threshold": 0.7
+	}
+	return SongData(
+		metadata=metadata,
+		words=rows,
+		chords=chord_data_list,
+		notes=[],
+		segments=[]
+	)
@@ -1,42 +1,151 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import os
 import tempfile
+import threading
 
+import soundfile as sf
 
-def separate_vocals_instrumental(audio_path: str) -> Tuple[Optional[str], Optional[str]]:
+from ..core.analysis_cache import content_hash
+from ..core.audio_cache import load_audio
+
+
+def stems_dir(audio_path: str, model: str = "htdemucs") -> str:
+	"""Output directory for this input's stems, derived from its content hash.
+
+	With an analysis cache, run_separation moves the stems into the cache entry and
+	removes this directory; without one the stems stay here for reuse.
+	"""
+	base = os.path.join(tempfile.gettempdir(), "song_editor_2_stems", model)
+	return os.path.join(base, content_hash(audio_path)[:32])
+
+
+@dataclass
+class Stems:
+	vocals: np.ndarray  # (frames, channels) float32
+	instrumental: np.ndarray  # (frames, channels) float32
+	sr: int
+
+
+class StemSeparator:
+	"""
+	In-process Demucs two-stem separation. The model is loaded on first use and kept
+	resident, so separating many files pays the load cost once. Inference runs on CPU
+	segment by segment with overlap-add (Demucs apply_model split mode).
+	"""
+
+	def __init__(self, model_name: str = "htdemucs", threads: Optional[int] = None, segment: Optional[float] = None, overlap: float = 0.25, device: str = "cpu") -> None:
+		self.model_name = model_name
+		self.threads = threads
+		self.segment = segment
+		self.overlap = overlap
+		self.device = device
+		self._model = None
+		self._lock = threading.Lock()
+
+	def _get_model(self):
+		if self._model is None:
+			from demucs.pretrained import get_model  # type: ignore
+			model = get_model(self.model_name)
+			model.to(self.device)
+			model.eval()
+			self._model = model
+		return self._model
+
+	def separate(self, audio_path: str) -> Stems:
+		"""Separate into in-memory vocals / instrumental arrays at the model's sample rate."""
+		import torch
+		from demucs.apply import apply_model  # type: ignore
+
+		with self._lock:
+			model = self._get_model()
+			if self.threads:
+				torch.set_num_threads(self.threads)
+			y, sr = load_audio(audio_path, sr=model.samplerate)
+			channels = model.audio_channels
+			if y.shape[1] == 1:
+				y = np.repeat(y, channels, axis=1)
+			elif y.shape[1] > channels:
+				y = y[:, :channels]
+			wav = torch.from_numpy(np.ascontiguousarray(y.T))
+			# Same normalization as the Demucs CLI
+			ref = wav.mean(0)
+			mean, std = ref.mean(), ref.std() + 1e-8
+			wav = (wav - mean) / std
+			with torch.no_grad():
+				kwargs = {"split": True, "overlap": self.overlap, "progress": False, "device": self.device}
+				if self.segment is not None:
+					kwargs["segment"] = self.segment
+				sources = apply_model(model, wav[None], **kwargs)[0]
+			sources = sources * std + mean
+			vocal_idx = model.sources.index("vocals")
+			vocals = sources[vocal_idx]
+			instrumental = sources.sum(0) - vocals
+			return Stems(
+				vocals=vocals.T.contiguous().numpy().astype(np.float32, copy=False),
+				instrumental=instrumental.T.contiguous().numpy().astype(np.float32, copy=False),
+				sr=int(sr),
+			)
+
+	def separate_to_files(self, audio_path: str) -> Tuple[str, str]:
+		"""
+		Separate and write vocals.wav / no_vocals.wav into this input's stems_dir, reusing
+		existing stems when the input has not changed.
+		"""
+		out_dir = stems_dir(audio_path, self.model_name)
+		voc_path = os.path.join(out_dir, "vocals.wav")
+		inst_path = os.path.join(out_dir, "no_vocals.wav")
+		if os.path.exists(voc_path) and os.path.exists(inst_path):
+			return (voc_path, inst_path)
+		stems = self.separate(audio_path)
+		os.makedirs(out_dir, exist_ok=True)
+		suffix = f".{os.getpid()}.{threading.get_ident()}.tmp.wav"
+		for path, data in ((voc_path, stems.vocals), (inst_path, stems.instrumental)):
+			# Write then rename so concurrent jobs never read a partial stem
+			sf.write(path + suffix, np.clip(data, -1.0, 1.0), stems.sr, subtype="PCM_16")
+			os.replace(path + suffix, path)
+		return (voc_path, inst_path)
+
+
+_separators: Dict[str, StemSeparator] = {}
+_separators_lock = threading.Lock()
+
+
+def get_separator(model: str = "htdemucs") -> StemSeparator:
+	"""Process-wide separator per model name, so the model stays loaded between files."""
+	with _separators_lock:
+		if model not in _separators:
+			_separators[model] = StemSeparator(model)
+		return _separators[model]
+
+
+def separate_vocals_instrumental(audio_path: str, model: str = "htdemucs") -> Tuple[Optional[str], Optional[str]]:
 	"""
 	Optionally separate stems using Demucs if available.
-	Returns paths to (vocals_wav, instrumental_wav). If separation is not available,
-	returns (None, None).
+	Returns paths to (vocals_wav, instrumental_wav). If separation is not available
+	(Demucs or torch not installed, or the model cannot be loaded), returns (None, None);
+	any other error is raised.
+	Each input gets its own output directory keyed by content hash, so unchanged inputs
+	reuse their existing stems and concurrent jobs never see each other's output.
 	"""
 	try:
-		from demucs.separate import main as demucs_main  # type: ignore
-		# Use a persistent cache dir so files remain after function returns
-		base = os.path.join(tempfile.gettempdir(), "song_editor_2_stems")
-		os.makedirs(base, exist_ok=True)
-		args = [
-			"-n", "htdemucs",
-			"-o", base,
-			"--two-stems", "vocals",
-			audio_path,
-		]
-		demucs_main(args)
-		# Discover output recursively under base
-		voc_path: Optional[str] = None
-		inst_path: Optional[str] = None
-		for root, dirs, files in os.walk(base):
-			if any(f.endswith("vocals.wav") for f in files) and any(f.endswith("no_vocals.wav") for f in files):
-				vocals = next(f for f in files if f.endswith("vocals.wav"))
-				no_vocals = next(f for f in files if f.endswith("no_vocals.wav"))
-				voc_path = os.path.join(root, vocals)
-				inst_path = os.path.join(root, no_vocals)
-				break
-		return (voc_path, inst_path)
-	except Exception:
+		return get_separator(model).separate_to_files(audio_path)
+	except ImportError:
 		return (None, None)
+	except Exception as e:
+		if _model_unavailable(e):
+			return (None, None)
+		raise
 
 
+def _model_unavailable(error: Exception) -> bool:
+	"""True for Demucs' error for an unknown model name or weights that cannot be fetched."""
+	try:
+		from demucs.pretrained import ModelLoadingError  # type: ignore
+	except ImportError:
+		return False
+	return isinstance(error, ModelLoadingError)
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Optional
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 
+from ..core.audio_cache import load_audio
+
 try:
 	from faster_whisper import WhisperModel
 except Exception:  # pragma: no cover - optional at install time
@@ -19,27 +26,219 @@ class Word:
 	confidence: Optional[float]
 
 
-class Transcriber:
-	def __init__(self) -> None:
-		self._models: dict[str, WhisperModel] = {}
-
-	def _get_model(self, size: str) -> WhisperModel:
-		if WhisperModel is None:
-			raise RuntimeError("faster-whisper not installed")
-		if size not in self._models:
-			self._models[size] = WhisperModel(size, compute_type="int8")
-		return self._models[size]
-
-	def transcribe(self, audio_path: str, model_size: str = "small") -> List[Word]:
-		model = self._get_model(model_size)
-		segments, info = model.transcribe(audio_path, word_timestamps=True)
-		words: List[Word] = []
-		for seg in segments:
-			if not hasattr(seg, "words") or seg.words is None:
+@dataclass(frozen=True)
+class WhisperEngineConfig:
+	"""How faster-whisper models are loaded and decoded.
+
+	cpu_threads/num_workers/compute_type/device control model loading (num_workers is how
+	many transcriptions one model serves in parallel); beam_size, vad_filter and batch_size
+	control decoding. batch_size > 0 uses faster-whisper's BatchedInferencePipeline.
+	"""
+	compute_type: str = "int8"
+	device: str = "cpu"
+	cpu_threads: int = 0  # 0 = CTranslate2 default
+	num_workers: int = 1
+	beam_size: int = 5
+	vad_filter: bool = False
+	vad_min_silence_ms: int = 500
+	batch_size: int = 0
+
+	def load_key(self) -> Tuple[Any, ...]:
+		"""Settings that require a separate model instance."""
+		return (self.compute_type, self.device, self.cpu_threads, self.num_workers)
+
+	def cache_params(self) -> Dict[str, Any]:
+		"""Decoding settings that change the output and differ from the defaults (for cache keys)."""
+		default = WhisperEngineConfig()
+		return {
+			name: getattr(self, name)
+			for name in ("compute_type", "beam_size", "vad_filter", "vad_min_silence_ms", "batch_size")
+			if getattr(self, name) != getattr(default, name)
+		}
+
+	@classmethod
+	def from_env(cls, **overrides: Any) -> "WhisperEngineConfig":
+		"""Defaults overridden by SONG_EDITOR_WHISPER_<FIELD> environment variables, then by keyword arguments."""
+		values: Dict[str, Any] = {}
+		for f in fields(cls):
+			raw = os.getenv(f"SONG_EDITOR_WHISPER_{f.name.upper()}")
+			if raw is None:
 				continue
-			for w in seg.words:
-				conf = getattr(w, "probability", None)
-				words.append(Word(text=w.word.strip(), start=float(w.start), end=float(w.end), confidence=None if conf is None else float(conf)))
-		return words
+			if f.type in ("bool", bool):
+				values[f.name] = raw.strip().lower() in ("1", "true", "yes", "on")
+			elif f.type in ("int", int):
+				values[f.name] = int(raw)
+			else:
+				values[f.name] = raw
+		values.update({k: v for k, v in overrides.items() if v is not None})
+		return cls(**values)
+
+
+def _load_whisper(size: str, config: WhisperEngineConfig) -> Any:
+	if WhisperModel is None:
+		raise RuntimeError("faster-whisper not installed")
+	return WhisperModel(
+		size,
+		device=config.device,
+		compute_type=config.compute_type,
+		cpu_threads=config.cpu_threads,
+		num_workers=config.num_workers,
+	)
+
+
+@dataclass
+class _PoolEntry:
+	model: Any
+	users: int = 0
+	last_used: float = field(default_factory=time.monotonic)
+
+
+class WhisperModelPool:
+	"""Process-wide pool of loaded Whisper models shared by every Transcriber.
+
+	Concurrent requests for the same size and load settings share one instance; a model
+	nobody has used for idle_seconds is dropped. select_size() drops idle models of other
+	sizes straight away, so switching sizes reclaims their memory without waiting.
+	"""
+
+	def __init__(self, idle_seconds: float = 300.0, loader: Optional[Callable[[str, WhisperEngineConfig], Any]] = None):
+		self.idle_seconds = idle_seconds
+		self._loader = loader or _load_whisper
+		self._entries: Dict[Tuple[Any, ...], _PoolEntry] = {}
+		self._loading: Dict[Tuple[Any, ...], threading.Event] = {}
+		self._lock = threading.Lock()
+
+	@contextmanager
+	def lease(self, size: str, config: WhisperEngineConfig) -> Iterator[Any]:
+		"""Borrow the model for (size, config); it cannot be evicted while leased."""
+		key = (size,) + config.load_key()
+		entry = self._acquire(key, size, config)
+		try:
+			yield entry.model
+		finally:
+			with self._lock:
+				entry.users -= 1
+				entry.last_used = time.monotonic()
+			self.evict_idle()
 
+	def _acquire(self, key: Tuple[Any, ...], size: str, config: WhisperEngineConfig) -> _PoolEntry:
+		while True:
+			with self._lock:
+				entry = self._entries.get(key)
+				if entry is not None:
+					entry.users += 1
+					entry.last_used = time.monotonic()
+					return entry
+				pending = self._loading.get(key)
+				if pending is None:
+					# This thread loads; others asking for the same model wait instead of loading a duplicate
+					pending = self._loading[key] = threading.Event()
+					break
+			pending.wait()
+		try:
+			self.evict_idle()
+			model = self._loader(size, config)
+			with self._lock:
+				entry = self._entries[key] = _PoolEntry(model, users=1)
+			return entry
+		finally:
+			with self._lock:
+				self._loading.pop(key).set()
 
+	def evict_idle(self, idle_seconds: Optional[float] = None) -> List[str]:
+		"""Drop models with no users that have been idle at least idle_seconds; returns their sizes."""
+		limit = self.idle_seconds if idle_seconds is None else idle_seconds
+		now = time.monotonic()
+		with self._lock:
+			stale = [k for k, e in self._entries.items() if e.users == 0 and now - e.last_used >= limit]
+			for key in stale:
+				del self._entries[key]
+		if stale:
+			gc.collect()
+		return [key[0] for key in stale]
+
+	def select_size(self, size: str) -> List[str]:
+		"""Drop every unused model whose size is not size (call when the user switches size); returns their sizes."""
+		with self._lock:
+			stale = [k for k, e in self._entries.items() if e.users == 0 and k[0] != size]
+			for key in stale:
+				del self._entries[key]
+		if stale:
+			gc.collect()
+		return [key[0] for key in stale]
+
+	def loaded(self) -> List[str]:
+		with self._lock:
+			return [key[0] for key in self._entries]
+
+	def clear(self) -> None:
+		self.evict_idle(0.0)
+
+
+_model_pool: Optional[WhisperModelPool] = None
+_model_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> WhisperModelPool:
+	global _model_pool
+	with _model_pool_lock:
+		if _model_pool is None:
+			_model_pool = WhisperModelPool(idle_seconds=float(os.getenv("SONG_EDITOR_WHISPER_IDLE_SECONDS", "300")))
+		return _model_pool
+
+
+class Transcriber:
+	def __init__(self, config: Optional[WhisperEngineConfig] = None, pool: Optional[WhisperModelPool] = None) -> None:
+		self.config = config or WhisperEngineConfig.from_env()
+		self.pool = pool or get_model_pool()
+
+	def transcribe(self, audio_path: str, model_size: str = "small", on_words: Optional[Callable[[List[Word]], None]] = None) -> List[Word]:
+		"""Transcribe a file; on_words, if given, is called with each segment's words as they are decoded."""
+		return self._collect(self.iter_transcribe(audio_path, model_size=model_size), on_words)
+
+	def transcribe_audio(self, audio: np.ndarray, sr: int, model_size: str = "small", on_words: Optional[Callable[[List[Word]], None]] = None) -> List[Word]:
+		"""Transcribe in-memory audio, (frames,) or (frames, channels), at any sample rate."""
+		return self._collect(self.iter_transcribe_audio(audio, sr, model_size=model_size), on_words)
+
+	def iter_transcribe(self, audio_path: str, model_size: str = "small") -> Iterator[List[Word]]:
+		"""Yield the words of each segment as soon as Whisper finishes it."""
+		# Whisper expects 16 kHz mono float32; decode through the shared cache
+		audio, _ = load_audio(audio_path, sr=16000, mono=True)
+		return self.iter_transcribe_audio(audio, 16000, model_size=model_size)
+
+	def iter_transcribe_audio(self, audio: np.ndarray, sr: int, model_size: str = "small") -> Iterator[List[Word]]:
+		if audio.ndim == 2:
+			audio = audio.mean(axis=1)
+		if sr != 16000:
+			import librosa
+			audio = librosa.resample(audio, orig_sr=sr, target_sr=16000)
+		audio = np.asarray(audio, dtype=np.float32)
+		cfg = self.config
+		with self.pool.lease(model_size, cfg) as model:
+			options: Dict[str, Any] = {"word_timestamps": True, "beam_size": cfg.beam_size}
+			if cfg.vad_filter:
+				options.update(vad_filter=True, vad_parameters={"min_silence_duration_ms": cfg.vad_min_silence_ms})
+			if cfg.batch_size > 0:
+				from faster_whisper import BatchedInferencePipeline
+				segments, info = BatchedInferencePipeline(model=model).transcribe(audio, batch_size=cfg.batch_size, **options)
+			else:
+				# faster-whisper decodes lazily: each segment is produced only when the generator is advanced
+				segments, info = model.transcribe(audio, **options)
+			for seg in segments:
+				if not hasattr(seg, "words") or seg.words is None:
+					continue
+				batch: List[Word] = []
+				for w in seg.words:
+					conf = getattr(w, "probability", None)
+					batch.append(Word(text=w.word.strip(), start=float(w.start), end=float(w.end), confidence=None if conf is None else float(conf)))
+				if batch:
+					yield batch
+
+	@staticmethod
+	def _collect(batches: Iterator[List[Word]], on_words: Optional[Callable[[List[Word]], None]]) -> List[Word]:
+		words: List[Word] = []
+		for batch in batches:
+			words.extend(batch)
+			if on_words is not None:
+				on_words(batch)
+		return words
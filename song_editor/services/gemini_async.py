@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .gemini_client import AltNoteTimed, AltWord, AltWordTimed, AltChordTimed, GeminiClient, TokenBucket
+
+
+class AsyncGeminiClient:
+	"""asyncio front end to GeminiClient with one concurrency limit shared by every call.
+
+	Results are the same as GeminiClient's. Each call works on its own shallow copy of the
+	client, sharing the HTTP session, retry policy, response cache and metrics but keeping
+	its own debug text and notes, so several songs can be analysed at once. Blocking work
+	(HTTP requests with their retries, reading and encoding audio) runs in the loop's default
+	executor; max_concurrency bounds how many requests are in flight at any moment and
+	requests_per_minute paces the uploads of every call together, as the quota is per key.
+	"""
+
+	def __init__(self, client: Optional[GeminiClient] = None, max_concurrency: int = 4) -> None:
+		self.max_concurrency = max(1, max_concurrency)
+		self.client = client or GeminiClient(pool_size=max(8, self.max_concurrency))
+		self._semaphore = asyncio.Semaphore(self.max_concurrency)
+		# One rate limit for all songs; rebuilt only if a call asks for another rate
+		self._bucket: Optional[TokenBucket] = None
+		self._bucket_lock = threading.Lock()
+		# Debug text and notes of the most recently finished call
+		self.last_debug: str = ""
+		self.last_notes: list[AltNoteTimed] = []
+
+	def _view(self, model_name: Optional[str]) -> GeminiClient:
+		view = copy.copy(self.client)
+		view.last_debug = ""
+		view.last_notes = []
+		if model_name:
+			view.model_name = model_name
+		return view
+
+	def _rate_bucket(self, requests_per_minute: Optional[float]) -> Optional[TokenBucket]:
+		if not requests_per_minute:
+			return None
+		rate = requests_per_minute / 60.0
+		with self._bucket_lock:
+			if self._bucket is None or self._bucket.rate != rate:
+				self._bucket = TokenBucket(rate=rate, capacity=self.max_concurrency)
+			return self._bucket
+
+	def _finish(self, view: GeminiClient) -> None:
+		self.last_debug = view.last_debug
+		self.last_notes = view.last_notes
+
+	async def rewrite_lyrics(self, text: str, words_with_alternatives: List = None, model_name: Optional[str] = None) -> List[AltWord]:
+		view = self._view(model_name)
+		async with self._semaphore:
+			result = await asyncio.to_thread(view.rewrite_lyrics, text, words_with_alternatives)
+		self._finish(view)
+		return result
+
+	async def analyze_audio_alt(self, audio_path: str, model_name: Optional[str] = None) -> tuple[list[AltWordTimed], list[AltChordTimed]]:
+		view = self._view(model_name)
+		async with self._semaphore:
+			result = await asyncio.to_thread(view.analyze_audio_alt, audio_path)
+		self._finish(view)
+		return result
+
+	async def analyze_audio_alt_chunked(
+		self,
+		audio_path: str,
+		chunk_seconds: int = 60,
+		requests_per_minute: Optional[float] = None,
+		chunk_retries: int = 2,
+		overlap_seconds: float = 2.0,
+		downsample: bool = False,
+		model_name: Optional[str] = None,
+	) -> tuple[list[AltWordTimed], list[AltChordTimed]]:
+		"""Chunked analysis as in GeminiClient.analyze_audio_alt_chunked.
+
+		Chunks of all songs being analysed compete for the same max_concurrency slots; a
+		chunk is read and encoded only once it holds a slot, so at most max_concurrency
+		encoded chunks are in memory. requests_per_minute paces uploads across all calls.
+		"""
+		view = self._view(model_name)
+		result = await self._run_chunked(view, audio_path, chunk_seconds, requests_per_minute, chunk_retries, overlap_seconds, downsample)
+		self._finish(view)
+		return result
+
+	async def _run_chunked(
+		self,
+		view: GeminiClient,
+		audio_path: str,
+		chunk_seconds: int,
+		requests_per_minute: Optional[float],
+		chunk_retries: int,
+		overlap_seconds: float,
+		downsample: bool,
+	) -> tuple[list[AltWordTimed], list[AltChordTimed]]:
+		if not view.api_key:
+			view.last_debug = "No API key set"
+			return ([], [])
+		reader, bounds = await asyncio.to_thread(view._plan_audio_chunks, audio_path, chunk_seconds, overlap_seconds, downsample)
+		bucket = self._rate_bucket(requests_per_minute)
+
+		async def run(idx: int):
+			async with self._semaphore:
+				return await asyncio.to_thread(view._analyze_chunk, audio_path, reader, bounds, idx, chunk_retries, bucket)
+
+		results = await asyncio.gather(*(run(i) for i in range(len(bounds))))
+		return view._stitch_chunks(list(results), bounds, reader.sr)
+
+	async def analyze_many(
+		self,
+		audio_paths: Iterable[str],
+		chunk_seconds: int = 60,
+		requests_per_minute: Optional[float] = None,
+		chunk_retries: int = 2,
+		overlap_seconds: float = 2.0,
+		downsample: bool = False,
+		model_name: Optional[str] = None,
+	) -> Dict[str, Tuple[list[AltWordTimed], list[AltChordTimed], list[AltNoteTimed], str]]:
+		"""Chunked analysis of several songs at once: path -> (words, chords, notes, debug)."""
+
+		async def one(path: str):
+			view = self._view(model_name)
+			try:
+				words, chords = await self._run_chunked(
+					view, path, chunk_seconds, requests_per_minute, chunk_retries, overlap_seconds, downsample
+				)
+			except Exception as e:
+				words, chords = [], []
+				view._log(f"{type(e).__name__}: {e}\n")
+			return path, (words, chords, view.last_notes, view.last_debug)
+
+		pairs = await asyncio.gather(*(one(p) for p in audio_paths))
+		return dict(pairs)
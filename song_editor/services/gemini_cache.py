@@ -0,0 +1,75 @@
+"""
+Gemini Response Cache
+
+Disk cache for parsed Gemini results, so re-running an analysis on the same song does not
+re-upload identical audio or pay for the same request twice. Entries are keyed by model
+name, a hash of the prompt and a hash of the audio samples sent, and expire once unused for a TTL;
+the directory is kept under a size limit with least-recently-used eviction.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..core.analysis_cache import AnalysisCache
+
+
+DEFAULT_GEMINI_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "song_editor_2", "gemini")
+DEFAULT_TTL_DAYS = 30.0
+DEFAULT_MAX_MB = 256.0
+
+STAGE = "gemini"
+
+
+def samples_hash(samples: np.ndarray, sr: int) -> str:
+	"""SHA-256 of the raw samples and rate; identical chunks hash alike without encoding FLAC"""
+	h = hashlib.sha256(str(int(sr)).encode("ascii"))
+	h.update(np.ascontiguousarray(samples, dtype=np.float32).tobytes())
+	return h.hexdigest()
+
+
+def text_hash(text: str) -> str:
+	return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class GeminiCache:
+	"""Parsed Gemini results keyed by (model, prompt hash, audio hash)"""
+
+	def __init__(self, root: Optional[str] = None, ttl_days: Optional[float] = None, max_mb: Optional[float] = None):
+		ttl_days = float(os.getenv("SONG_EDITOR_GEMINI_CACHE_TTL_DAYS", DEFAULT_TTL_DAYS)) if ttl_days is None else ttl_days
+		max_mb = float(os.getenv("SONG_EDITOR_GEMINI_CACHE_MAX_MB", DEFAULT_MAX_MB)) if max_mb is None else max_mb
+		self.store = AnalysisCache(
+			root=root or os.getenv("SONG_EDITOR_GEMINI_CACHE_DIR", DEFAULT_GEMINI_CACHE_DIR),
+			max_bytes=int(max_mb * 1024 * 1024),
+			max_age=ttl_days * 86400.0,
+		)
+
+	@classmethod
+	def from_env(cls) -> Optional["GeminiCache"]:
+		"""The default cache, or None when SONG_EDITOR_GEMINI_CACHE=0"""
+		if os.getenv("SONG_EDITOR_GEMINI_CACHE", "1").strip().lower() in ("0", "false", "no", "off"):
+			return None
+		return cls()
+
+	@staticmethod
+	def _params(model: str, kind: str, prompt: str) -> Dict[str, Any]:
+		return {"model": model, "kind": kind, "prompt": text_hash(prompt)}
+
+	def get(self, model: str, kind: str, prompt: str, audio_hash: str = "") -> Optional[Any]:
+		try:
+			return self.store.get_json_by_hash(audio_hash, STAGE, self._params(model, kind, prompt))
+		except Exception:
+			return None
+
+	def put(self, model: str, kind: str, prompt: str, value: Any, audio_hash: str = "", source_name: str = "") -> None:
+		try:
+			self.store.put_json_by_hash(audio_hash, STAGE, self._params(model, kind, prompt), value, source_name=source_name)
+		except Exception:
+			pass
+
+	def clear(self) -> None:
+		self.store.clear()
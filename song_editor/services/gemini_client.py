@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import json
 import os
-from dataclasses import dataclass
-from typing import List
+import queue
+import random
+import threading
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 import base64
+import difflib
 import io
+import re
 import time
 import soundfile as sf
-import numpy as np
+
+from ..core.audio_cache import load_audio
+from ..core.chunking import HOP_SECONDS, LazyAudioReader, chunk_cuts, plan_chunks_from_energy
+from .gemini_cache import GeminiCache, samples_hash
 
 
 @dataclass
@@ -36,12 +47,224 @@ class AltNoteTimed:
 	start: float
 	end: float
 
+DEFAULT_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+
+@dataclass
+class RetryPolicy:
+	"""Exponential backoff with jitter for transient API errors.
+
+	Attempt n waits base_delay * multiplier**n (capped at max_delay), reduced by up to
+	jitter of itself at random. A Retry-After header from the server takes precedence.
+	"""
+	max_retries: int = 4
+	base_delay: float = 2.0
+	multiplier: float = 2.0
+	max_delay: float = 120.0
+	jitter: float = 0.5
+	retry_statuses: tuple = (429, 500, 502, 503, 504)
+
+	def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+		if retry_after is not None:
+			return max(0.0, min(self.max_delay, retry_after))
+		d = min(self.max_delay, self.base_delay * (self.multiplier ** attempt))
+		return d * (1.0 - self.jitter * random.random())
+
+
+@dataclass
+class RequestTiming:
+	label: str
+	status: int
+	seconds: float
+	attempts: int
+	bytes_sent: int
+	waited: float = 0.0  # total backoff sleep included in seconds
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+	if not value:
+		return None
+	try:
+		return float(value)
+	except ValueError:
+		pass
+	try:
+		return parsedate_to_datetime(value).timestamp() - time.time()
+	except Exception:
+		return None
+
+
+def _norm_word(text: str) -> str:
+	return re.sub(r"[^\w']", "", text.lower())
+
+
+def stitch_chunk_results(
+	chunks: List[Optional[tuple]],
+	cuts: List[float],
+	similarity: float = 0.6,
+	max_gap: float = 0.3,
+) -> tuple[list[AltWordTimed], list[AltChordTimed]]:
+	"""Join per-chunk (words, chords, notes) results from overlapping windows.
+
+	chunks[i] holds index-aligned words and chords in absolute time (None for a skipped
+	chunk); cuts[i]..cuts[i+1] is the part of the song chunk i is responsible for. Where
+	windows overlap, a word from one chunk that matches a word from its neighbour in time
+	(overlapping or within max_gap) and text (similarity ratio) is a duplicate; the copy
+	lying further inside its own chunk's range wins, together with its chord.
+	"""
+	tagged = []
+	for i, parsed in enumerate(chunks):
+		if parsed is None:
+			continue
+		words, chords = parsed[0], parsed[1]
+		lo, hi = cuts[i], cuts[i + 1]
+		for w, c in zip(words, chords):
+			mid = 0.5 * (w.start + w.end)
+			# Positive inside the chunk's own range, negative in the overlap beyond it
+			depth = min(mid - lo, hi - mid)
+			tagged.append((w, c, i, depth))
+	tagged.sort(key=lambda t: (t[0].start, t[0].end))
+
+	kept: list = []
+	for item in tagged:
+		w, _, chunk, depth = item
+		dup = None
+		# Compare against the last few kept words; overlap zones are only a few seconds long
+		for k in range(len(kept) - 1, max(-1, len(kept) - 6), -1):
+			pw, _, pchunk, _ = kept[k]
+			if pchunk == chunk:
+				continue
+			if w.start > pw.end + max_gap:
+				break
+			a, b = _norm_word(w.text), _norm_word(pw.text)
+			if a == b or difflib.SequenceMatcher(None, a, b).ratio() >= similarity:
+				dup = k
+				break
+		if dup is None:
+			kept.append(item)
+		elif depth > kept[dup][3]:
+			kept[dup] = item
+	kept.sort(key=lambda t: (t[0].start, t[0].end))
+	return [t[0] for t in kept], [t[1] for t in kept]
+
+
+class TokenBucket:
+	"""Thread-safe token bucket: acquire() blocks until a token is available.
+
+	Tokens refill continuously at rate per second up to capacity, which is also the
+	largest burst allowed after an idle period.
+	"""
+
+	def __init__(self, rate: float, capacity: float = 1.0) -> None:
+		self.rate = float(rate)
+		self.capacity = max(1.0, float(capacity))
+		self._tokens = self.capacity
+		self._stamp = time.monotonic()
+		self._lock = threading.Lock()
+
+	def acquire(self) -> float:
+		"""Take one token; returns the seconds spent waiting."""
+		waited = 0.0
+		while True:
+			with self._lock:
+				now = time.monotonic()
+				self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+				self._stamp = now
+				if self._tokens >= 1.0:
+					self._tokens -= 1.0
+					return waited
+				wait = (1.0 - self._tokens) / self.rate
+			time.sleep(wait)
+			waited += wait
+
+
 class GeminiClient:
-	def __init__(self) -> None:
+	def __init__(
+		self,
+		retry: Optional[RetryPolicy] = None,
+		base_url: Optional[str] = None,
+		pool_size: int = 8,
+		cache: Optional[GeminiCache] = None,
+	) -> None:
 		self.api_key = os.getenv("GEMINI_API_KEY", "")
 		self.model_name = "gemini-2.5-flash"
+		self.base_url = (base_url or os.getenv("GEMINI_API_BASE", DEFAULT_API_BASE)).rstrip("/")
+		self.retry = retry or RetryPolicy()
+		# Parsed results by (model, prompt, audio); set to None to always go to the network
+		self.cache = cache if cache is not None else GeminiCache.from_env()
 		self.last_debug: str = ""
 		self.last_notes: list[AltNoteTimed] = []
+		self.metrics: list[RequestTiming] = []
+		self._metrics_lock = threading.Lock()
+		# One keep-alive session so chunk uploads reuse TLS connections
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+
+	def _url(self) -> str:
+		return f"{self.base_url}/models/{self.model_name}:generateContent"
+
+	def _post(self, payload: Dict[str, Any], timeout: float, label: str) -> requests.Response:
+		"""POST a generateContent request, retrying transient failures per self.retry.
+
+		Returns the final response (possibly still an error status); raises the last
+		connection error if every attempt failed to get a response.
+		"""
+		body = json.dumps(payload).encode("utf-8")
+		headers = {"Content-Type": "application/json"}
+		t0 = time.perf_counter()
+		waited = 0.0
+		attempt = 0
+		while True:
+			resp: Optional[requests.Response] = None
+			error: Optional[Exception] = None
+			retry_after: Optional[float] = None
+			try:
+				resp = self.session.post(self._url(), params={"key": self.api_key}, data=body, headers=headers, timeout=timeout)
+				if resp.status_code not in self.retry.retry_statuses:
+					break
+				retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+			except (requests.ConnectionError, requests.Timeout) as e:
+				error = e
+			if attempt >= self.retry.max_retries:
+				if resp is None:
+					self._record(label, 0, time.perf_counter() - t0, attempt + 1, len(body), waited)
+					raise error
+				break
+			delay = self.retry.delay(attempt, retry_after)
+			status = resp.status_code if resp is not None else type(error).__name__
+			self._log(f"{label}: {status}, retrying in {delay:.1f}s\n")
+			time.sleep(delay)
+			waited += delay
+			attempt += 1
+		self._record(label, resp.status_code, time.perf_counter() - t0, attempt + 1, len(body), waited)
+		return resp
+
+	def _log(self, msg: str) -> None:
+		with self._metrics_lock:
+			self.last_debug += msg
+
+	def _record(self, label: str, status: int, seconds: float, attempts: int, bytes_sent: int, waited: float) -> None:
+		with self._metrics_lock:
+			self.metrics.append(RequestTiming(label, status, seconds, attempts, bytes_sent, waited))
+
+	def metrics_summary(self) -> Dict[str, Dict[str, float]]:
+		"""Per-label request count, total/mean/max seconds, retries and backoff time."""
+		out: Dict[str, Dict[str, float]] = {}
+		with self._metrics_lock:
+			timings = list(self.metrics)
+		for t in timings:
+			s = out.setdefault(t.label, {"requests": 0, "total_s": 0.0, "max_s": 0.0, "retries": 0, "waited_s": 0.0, "bytes": 0})
+			s["requests"] += 1
+			s["total_s"] += t.seconds
+			s["max_s"] = max(s["max_s"], t.seconds)
+			s["retries"] += t.attempts - 1
+			s["waited_s"] += t.waited
+			s["bytes"] += t.bytes_sent
+		for s in out.values():
+			s["mean_s"] = s["total_s"] / s["requests"]
+		return out
 
 	def ensure_api_key(self) -> bool:
 		return bool(self.api_key)
@@ -74,13 +297,16 @@ class GeminiClient:
 				"return JSON list of {text, confidence in [0,1]} for each word in order.\n\n" + text
 			)
 		
+		if self.cache is not None:
+			hit = self.cache.get(self.model_name, "rewrite_lyrics", prompt)
+			if hit is not None:
+				self.last_debug = "Cache hit\n"
+				return [AltWord(**it) for it in hit]
 		try:
-			url = (
-				f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_name}:generateContent"
-			)
+			url = self._url()
 			payload = {"contents": [{"parts": [{"text": prompt}]}]}
 			self.last_debug = f"POST {url}\nModel: {self.model_name}\nPayload chars: {len(prompt)}\n"
-			resp = requests.post(url, params={"key": self.api_key}, json=payload, timeout=30)
+			resp = self._post(payload, timeout=30, label="rewrite_lyrics")
 			self.last_debug += f"HTTP {resp.status_code}\n"
 			# Log a snippet of response text for debugging
 			try:
@@ -103,6 +329,8 @@ class GeminiClient:
 					arr = _json.loads(candidate_text)
 					for it in arr:
 						items.append(AltWord(text=str(it.get("text", "")), confidence=float(it.get("confidence", 0.5))))
+					if self.cache is not None and items:
+						self.cache.put(self.model_name, "rewrite_lyrics", prompt, [asdict(it) for it in items])
 					return items
 				except Exception as e:
 					self.last_debug += f"JSON list parse err: {e}\n"
@@ -129,12 +357,8 @@ class GeminiClient:
 		if not self.api_key:
 			self.last_debug = "No API key set"
 			return ([], [])
-		data, sr = sf.read(audio_path, dtype="float32", always_2d=True)
-		y = data.mean(axis=1)
-		buf = io.BytesIO()
-		sf.write(buf, y, sr, format="FLAC")
-		b64 = base64.b64encode(buf.getvalue()).decode("ascii")
-		url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_name}:generateContent"
+		y, sr = load_audio(audio_path, mono=True)
+		url = self._url()
 		prompt = (
 			"Analyze the given audio (full mix).\n"
 			"1) Transcribe the lead vocal and rewrite as improved lyrics, with times per word.\n"
@@ -145,10 +369,21 @@ class GeminiClient:
 			"- chords: array of objects with keys: 'symbol', 'root', 'quality', 'bass', 'start_sec', 'end_sec'.\n"
 			"- Ensure both arrays are the same LENGTH and index-aligned.\n"
 		)
+		audio_hash = samples_hash(y, sr) if self.cache is not None else ""
+		if self.cache is not None:
+			hit = self.cache.get(self.model_name, "analyze_audio_alt", prompt, audio_hash)
+			if hit is not None:
+				self.last_debug = "Cache hit\n"
+				words_t, chords_t, self.last_notes = self._chunk_from_json(hit)
+				m = min(len(words_t), len(chords_t))
+				return (words_t[:m], chords_t[:m])
+		buf = io.BytesIO()
+		sf.write(buf, y, sr, format="FLAC")
+		b64 = base64.b64encode(buf.getvalue()).decode("ascii")
 		payload = {"contents": [{"parts": [{"inline_data": {"mime_type": "audio/flac", "data": b64}}, {"text": prompt}]}]}
 		try:
 			self.last_debug = f"POST {url}\nModel: {self.model_name}\nAudio bytes: {len(b64)} (b64)\n"
-			resp = requests.post(url, params={"key": self.api_key}, json=payload, timeout=60)
+			resp = self._post(payload, timeout=60, label="analyze_audio_alt")
 			self.last_debug += f"HTTP {resp.status_code}\n"
 			self.last_debug += f"Resp head: {resp.text[:800]}\n"
 			resp.raise_for_status()
@@ -179,6 +414,11 @@ class GeminiClient:
 						self.last_notes.append(AltNoteTimed(pitch_midi=int(n.get("pitch_midi")), start=float(n.get("start_sec", 0.0)), end=float(n.get("end_sec", 0.0))))
 					except Exception:
 						pass
+				if self.cache is not None:
+					self.cache.put(
+						self.model_name, "analyze_audio_alt", prompt, self._chunk_to_json((words_t, chords_t, self.last_notes)),
+						audio_hash=audio_hash, source_name=os.path.basename(audio_path),
+					)
 				m = min(len(words_t), len(chords_t))
 				return (words_t[:m], chords_t[:m])
 			except Exception as e:
@@ -188,114 +428,315 @@ class GeminiClient:
 			self.last_debug += f"Request failed: {e}\n"
 			return ([], [])
 
-	def analyze_audio_alt_chunked(self, audio_path: str, chunk_seconds: int, sleep_between: int) -> tuple[list[AltWordTimed], list[AltChordTimed]]:
-		"""Chunked analysis with backoff and stitching absolute times."""
+	def analyze_audio_alt_chunked(
+		self,
+		audio_path: str,
+		chunk_seconds: int,
+		sleep_between: int,
+		max_in_flight: int = 1,
+		requests_per_minute: Optional[float] = None,
+		chunk_retries: int = 2,
+		overlap_seconds: float = 2.0,
+		downsample: bool = False,
+	) -> tuple[list[AltWordTimed], list[AltChordTimed]]:
+		"""Chunked analysis stitching absolute times.
+
+		Cuts snap to the quietest point near each chunk_seconds boundary and neighbouring
+		chunks share overlap_seconds on each side, so words at a cut are heard whole;
+		duplicates from the overlaps are removed when stitching.
+
+		Chunks are read from disk lazily and FLAC/base64-encoded by a producer thread while
+		earlier chunks upload; at most a couple of encoded chunks wait in memory at a time.
+		downsample sends 16 kHz mono instead of the file's native rate.
+
+		With max_in_flight == 1 chunks are sent one after another with sleep_between
+		seconds in between. Otherwise up to max_in_flight chunks are uploaded at once,
+		paced by a token bucket (requests_per_minute, default 60 / sleep_between), and a
+		failed chunk is retried on its own while the others continue.
+		"""
 		self.last_debug = ""
 		self.last_notes = []
 		if not self.api_key:
 			self.last_debug = "No API key set"
 			return ([], [])
-		data, sr = sf.read(audio_path, dtype="float32", always_2d=True)
-		y = data.mean(axis=1)
-		samples_per_chunk = max(1, int(sr * chunk_seconds))
-		words_all: list[AltWordTimed] = []
-		chords_all: list[AltChordTimed] = []
-		backoffs = [60, 300]
-		unavailable_hits = 0
-		start = 0
-		while start < len(y):
-			end = min(len(y), start + samples_per_chunk)
-			buf = io.BytesIO()
-			sf.write(buf, y[start:end], sr, format="FLAC")
-			b64 = base64.b64encode(buf.getvalue()).decode("ascii")
-			chunk_idx = (start // samples_per_chunk) + 1
-			total_chunks = int(np.ceil(len(y) / samples_per_chunk))
-			prompt = (
-				f"This is chunk {chunk_idx}/{total_chunks} of the song. Analyze only this chunk.\n"
-				"1) Transcribe the lead vocal and rewrite as improved lyrics, with times per word.\n"
-				"2) For each word, infer the harmonic chord WITH QUALITY using standard chord symbols (maj/min/7/maj7/min7/dim/aug/sus/add extensions, alterations, slash bass).\n"
-				"Return STRICT JSON with keys 'words' and 'chords'.\n"
-				"- words: array of objects with keys: 'text', 'start_sec', 'end_sec'.\n"
-				"- chords: array of objects with keys: 'symbol', 'root', 'quality', 'bass', 'start_sec', 'end_sec'.\n"
-				"- Ensure both arrays are the same LENGTH and index-aligned.\n"
-			)
-			# backoff loop
-			skipped_this_chunk = False
-			while True:
-				res = self._post_audio_payload(b64, prompt)
-				if not self._is_unavailable(res):
-					break
-				if unavailable_hits >= len(backoffs):
-					self.last_debug += f"Skipping chunk {chunk_idx}/{total_chunks}: UNAVAILABLE after backoffs\n"
-					skipped_this_chunk = True
-					break
-				delay = backoffs[unavailable_hits]
-				unavailable_hits += 1
-				time.sleep(delay)
-			# parse
-			if not skipped_this_chunk:
+		reader, bounds = self._plan_audio_chunks(audio_path, chunk_seconds, overlap_seconds, downsample)
+		total_chunks = len(bounds)
+		results: list[Optional[tuple[list[AltWordTimed], list[AltChordTimed], list[AltNoteTimed]]]] = [None] * total_chunks
+		workers = max(1, max_in_flight)
+		# Bounded hand-off between the encoder and the uploaders caps memory at a few chunks
+		jobs: "queue.Queue[Optional[tuple[int, str, str]]]" = queue.Queue(maxsize=max(2, workers))
+		stop = threading.Event()
+		cache_hits = [0]
+
+		def produce() -> None:
+			try:
+				for idx in range(total_chunks):
+					if stop.is_set():
+						break
+					cached, b64, audio_hash = self._prepare_chunk(reader, bounds, idx)
+					if cached is not None:
+						results[idx] = cached
+						cache_hits[0] += 1
+						continue
+					jobs.put((idx, b64, audio_hash))
+			except Exception as e:
+				self._log(f"Chunk read/encode err: {e}\n")
+			finally:
+				for _ in range(workers):
+					jobs.put(None)
+
+		def upload(idx: int, b64: str, audio_hash: str) -> bool:
+			results[idx] = self._upload_chunk(audio_path, reader.sr, bounds, idx, b64, audio_hash)
+			return results[idx] is not None
+
+		producer = threading.Thread(target=produce, name="gemini-chunk-encoder", daemon=True)
+		producer.start()
+		try:
+			if max_in_flight <= 1:
+				first = True
+				while True:
+					job = jobs.get()
+					if job is None:
+						break
+					if not first:
+						time.sleep(max(0, sleep_between))
+					first = False
+					# _post retries transient errors; a chunk still failing afterwards (reason logged) is skipped
+					if not upload(*job):
+						self._log(f"Skipping chunk {job[0] + 1}/{total_chunks}\n")
+			else:
+				rpm = requests_per_minute or (60.0 / sleep_between if sleep_between > 0 else None)
+				bucket = TokenBucket(rate=rpm / 60.0, capacity=max_in_flight) if rpm else None
+
+				def consume() -> None:
+					while True:
+						job = jobs.get()
+						if job is None:
+							return
+						idx, b64, audio_hash = job
+						results[idx] = self._send_chunk(audio_path, reader.sr, bounds, idx, b64, audio_hash, chunk_retries, bucket)
+
+				from concurrent.futures import ThreadPoolExecutor
+				with ThreadPoolExecutor(max_workers=workers) as pool:
+					for fut in [pool.submit(consume) for _ in range(workers)]:
+						fut.result()
+		finally:
+			stop.set()
+			# Unblock the producer if uploads ended early
+			while producer.is_alive():
 				try:
-					text = res.get("json", {}).get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
-				except Exception:
-					text = ""
-				if text:
-					import json as _json
-					try:
-						obj = _json.loads(self.strip_code_fences(text))
-						offset = start / sr
-						words_list = obj.get("words", []) or []
-						chords_list = obj.get("chords", []) or []
-						notes_list = obj.get("notes", []) or []
-						m_local = min(len(words_list), len(chords_list))
-						for i in range(m_local):
-							w = words_list[i] or {}
-							c = chords_list[i] or {}
-							words_all.append(
-								AltWordTimed(
-									text=str(w.get("text", "")),
-									start=offset + float(w.get("start_sec", 0.0)),
-									end=offset + float(w.get("end_sec", 0.0)),
-								)
-							)
-							sym = str(c.get("symbol") or "")
-							if not sym:
-								root = str(c.get("root") or "")
-								qual = str(c.get("quality") or "")
-								bass = str(c.get("bass") or "")
-								sym = root + (qual if qual else "") + ("/" + bass if bass else "")
-							chords_all.append(
-								AltChordTimed(
-									symbol=sym,
-									start=offset + float(c.get("start_sec", 0.0)),
-									end=offset + float(c.get("end_sec", 0.0)),
-								)
-							)
-						for n in notes_list:
-							try:
-								self.last_notes.append(AltNoteTimed(pitch_midi=int(n.get("pitch_midi")), start=offset + float(n.get("start_sec", 0.0)), end=offset + float(n.get("end_sec", 0.0))))
-							except Exception:
-								pass
-					except Exception as e:
-						self.last_debug += f"Chunk JSON parse err: {e}\n"
-			# advance
-			start = end
-			if start < len(y):
-				time.sleep(max(0, sleep_between))
+					jobs.get(timeout=0.1)
+				except queue.Empty:
+					pass
+		if cache_hits[0]:
+			self._log(f"Cache hit for {cache_hits[0]}/{total_chunks} chunks\n")
+		return self._stitch_chunks(results, bounds, reader.sr)
+
+	def _plan_audio_chunks(
+		self, audio_path: str, chunk_seconds: float, overlap_seconds: float, downsample: bool
+	) -> tuple[LazyAudioReader, list[tuple[int, int]]]:
+		"""Reader for the file and silence-snapped, overlapping (start, stop) sample windows."""
+		reader = LazyAudioReader(audio_path, target_sr=16000 if downsample else None)
+		hop = max(1, int(HOP_SECONDS * reader.sr))
+		bounds = plan_chunks_from_energy(
+			reader.frame_energy(hop), hop, reader.frames, reader.sr,
+			chunk_seconds=max(1.0, float(chunk_seconds)),
+			search_seconds=min(5.0, chunk_seconds / 6.0),
+			overlap_seconds=max(0.0, overlap_seconds),
+		)
+		return reader, bounds
+
+	def _prepare_chunk(self, reader: LazyAudioReader, bounds: list[tuple[int, int]], idx: int):
+		"""(cached result, None, hash) for a chunk analysed before, else (None, FLAC base64, hash)."""
+		a, b = bounds[idx]
+		samples = reader.read(a, b)
+		audio_hash = samples_hash(samples, reader.out_sr) if self.cache is not None else ""
+		if self.cache is not None:
+			# Chunks analysed before (same model, prompt and samples) are not uploaded again
+			hit = self.cache.get(self.model_name, "audio_chunk", self._chunk_prompt(idx + 1, len(bounds)), audio_hash)
+			if hit is not None:
+				return self._shift_chunk(self._chunk_from_json(hit), a / reader.sr), None, audio_hash
+		buf = io.BytesIO()
+		sf.write(buf, samples, reader.out_sr, format="FLAC")
+		return None, base64.b64encode(buf.getvalue()).decode("ascii"), audio_hash
+
+	def _analyze_chunk(
+		self,
+		audio_path: str,
+		reader: LazyAudioReader,
+		bounds: list[tuple[int, int]],
+		idx: int,
+		retries: int = 0,
+		bucket: Optional[TokenBucket] = None,
+	):
+		"""One chunk start to finish: its cached result, or encode and _send_chunk it."""
+		cached, b64, audio_hash = self._prepare_chunk(reader, bounds, idx)
+		if cached is not None:
+			return cached
+		return self._send_chunk(audio_path, reader.sr, bounds, idx, b64, audio_hash, retries, bucket)
+
+	def _send_chunk(
+		self,
+		audio_path: str,
+		sr: int,
+		bounds: list[tuple[int, int]],
+		idx: int,
+		b64: str,
+		audio_hash: str,
+		retries: int = 0,
+		bucket: Optional[TokenBucket] = None,
+	):
+		"""Upload an encoded chunk, each attempt paced by bucket, retrying it up to retries times.
+
+		Returns its parsed result in absolute time, or None once the chunk is skipped.
+		"""
+		total = len(bounds)
+		for attempt in range(retries + 1):
+			if bucket is not None:
+				bucket.acquire()
+			parsed = self._upload_chunk(audio_path, sr, bounds, idx, b64, audio_hash)
+			if parsed is not None:
+				return parsed
+			self._log(f"Chunk {idx + 1}/{total} failed (attempt {attempt + 1}/{retries + 1})\n")
+		self._log(f"Skipping chunk {idx + 1}/{total}\n")
+		return None
+
+	def _upload_chunk(self, audio_path: str, sr: int, bounds: list[tuple[int, int]], idx: int, b64: str, audio_hash: str):
+		"""Post one encoded chunk; its parsed result in absolute time, or None (reason logged) to retry/skip."""
+		prompt = self._chunk_prompt(idx + 1, len(bounds))
+		label = f"Chunk {idx + 1}/{len(bounds)}"
+		res = self._post_audio_payload(b64, prompt)
+		error = self._response_error(res)
+		if error is not None:
+			self._log(f"{label}: {error}\n")
+			return None
+		parsed = self._parse_chunk_result(res, 0.0, label)
+		if parsed is None:
+			return None
+		if self.cache is not None:
+			self.cache.put(
+				self.model_name, "audio_chunk", prompt, self._chunk_to_json(parsed),
+				audio_hash=audio_hash, source_name=os.path.basename(audio_path),
+			)
+		return self._shift_chunk(parsed, bounds[idx][0] / sr)
+
+	def _stitch_chunks(self, results: list, bounds: list[tuple[int, int]], sr: int) -> tuple[list[AltWordTimed], list[AltChordTimed]]:
+		# Stitch in chunk order regardless of completion order
+		cuts = [c / sr for c in chunk_cuts(bounds)]
+		words_all, chords_all = stitch_chunk_results(results, cuts)
+		for i, parsed in enumerate(results):
+			if parsed is not None:
+				# Notes carry no text to match, so each chunk keeps only those in its own range
+				self.last_notes.extend(n for n in parsed[2] if cuts[i] <= 0.5 * (n.start + n.end) < cuts[i + 1])
 		m = min(len(words_all), len(chords_all))
 		return (words_all[:m], chords_all[:m])
 
+	@staticmethod
+	def _shift_chunk(parsed, offset: float):
+		words, chords, notes = parsed
+		return (
+			[AltWordTimed(w.text, w.start + offset, w.end + offset) for w in words],
+			[AltChordTimed(c.symbol, c.start + offset, c.end + offset) for c in chords],
+			[AltNoteTimed(n.pitch_midi, n.start + offset, n.end + offset) for n in notes],
+		)
+
+	@staticmethod
+	def _chunk_to_json(parsed) -> dict:
+		words, chords, notes = parsed
+		return {"words": [asdict(w) for w in words], "chords": [asdict(c) for c in chords], "notes": [asdict(n) for n in notes]}
+
+	@staticmethod
+	def _chunk_from_json(obj: dict):
+		return (
+			[AltWordTimed(**w) for w in obj.get("words", [])],
+			[AltChordTimed(**c) for c in obj.get("chords", [])],
+			[AltNoteTimed(**n) for n in obj.get("notes", [])],
+		)
+
+	def _chunk_prompt(self, chunk_idx: int, total_chunks: int) -> str:
+		return (
+			f"This is chunk {chunk_idx}/{total_chunks} of the song. Analyze only this chunk.\n"
+			"1) Transcribe the lead vocal and rewrite as improved lyrics, with times per word.\n"
+			"2) For each word, infer the harmonic chord WITH QUALITY using standard chord symbols (maj/min/7/maj7/min7/dim/aug/sus/add extensions, alterations, slash bass).\n"
+			"Return STRICT JSON with keys 'words' and 'chords'.\n"
+			"- words: array of objects with keys: 'text', 'start_sec', 'end_sec'.\n"
+			"- chords: array of objects with keys: 'symbol', 'root', 'quality', 'bass', 'start_sec', 'end_sec'.\n"
+			"- Ensure both arrays are the same LENGTH and index-aligned.\n"
+		)
+
+	def _parse_chunk_result(
+		self, res: dict, offset: float, label: str = "Chunk"
+	) -> Optional[tuple[list[AltWordTimed], list[AltChordTimed], list[AltNoteTimed]]]:
+		"""Words, chords and notes of one chunk shifted by offset; None (logged under label) if the response had no usable JSON."""
+		try:
+			text = res.get("json", {}).get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+		except Exception:
+			text = ""
+		if not text:
+			self._log(f"{label}: response has no text\n")
+			return None
+		try:
+			obj = json.loads(self.strip_code_fences(text))
+		except Exception as e:
+			self._log(f"{label}: JSON parse err: {e}\n")
+			return None
+		words: list[AltWordTimed] = []
+		chords: list[AltChordTimed] = []
+		notes: list[AltNoteTimed] = []
+		words_list = obj.get("words", []) or []
+		chords_list = obj.get("chords", []) or []
+		m_local = min(len(words_list), len(chords_list))
+		for i in range(m_local):
+			w = words_list[i] or {}
+			c = chords_list[i] or {}
+			words.append(
+				AltWordTimed(
+					text=str(w.get("text", "")),
+					start=offset + float(w.get("start_sec", 0.0)),
+					end=offset + float(w.get("end_sec", 0.0)),
+				)
+			)
+			sym = str(c.get("symbol") or "")
+			if not sym:
+				root = str(c.get("root") or "")
+				qual = str(c.get("quality") or "")
+				bass = str(c.get("bass") or "")
+				sym = root + (qual if qual else "") + ("/" + bass if bass else "")
+			chords.append(
+				AltChordTimed(
+					symbol=sym,
+					start=offset + float(c.get("start_sec", 0.0)),
+					end=offset + float(c.get("end_sec", 0.0)),
+				)
+			)
+		for n in obj.get("notes", []) or []:
+			try:
+				notes.append(AltNoteTimed(pitch_midi=int(n.get("pitch_midi")), start=offset + float(n.get("start_sec", 0.0)), end=offset + float(n.get("end_sec", 0.0))))
+			except Exception:
+				pass
+		return words, chords, notes
+
 	def _post_audio_payload(self, b64: str, prompt: str) -> dict:
-		url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_name}:generateContent"
 		payload = {"contents": [{"parts": [{"inline_data": {"mime_type": "audio/flac", "data": b64}}, {"text": prompt}]}]}
 		try:
-			resp = requests.post(url, params={"key": self.api_key}, json=payload, timeout=60)
+			resp = self._post(payload, timeout=60, label="audio_chunk")
 			return {"status": resp.status_code, "text": resp.text, "json": (resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {})}
 		except Exception as e:
-			self.last_debug += f"Request err: {e}\n"
-			return {"status": 0, "text": "", "json": {}}
+			return {"status": 0, "text": "", "json": {}, "error": f"{type(e).__name__}: {e}"}
+
+	def _response_error(self, res: dict) -> Optional[str]:
+		"""Why a generateContent call failed (request error, HTTP status and API error), or None if it succeeded."""
+		if res.get("error"):
+			return f"request failed ({res['error']})"
+		if res.get("status") == 200 and not self._is_unavailable(res):
+			return None
+		data = res.get("json")
+		err = data.get("error") if isinstance(data, dict) else None
+		detail = " ".join(str(err[k]) for k in ("status", "message") if err.get(k)) if isinstance(err, dict) else ""
+		return f"HTTP {res.get('status')}" + (f" {detail}" if detail else "")
 
 	def _is_unavailable(self, res: dict) -> bool:
-		if res.get("status") == 503:
+		if res.get("status") in (429, 503):
 			return True
 		data = res.get("json")
 		try:
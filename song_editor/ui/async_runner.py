@@ -0,0 +1,82 @@
+"""
+Async Runner
+
+One background thread running an asyncio event loop for the GUI's network calls.
+Coroutines from any number of requests share that loop (and whatever concurrency limits
+they use) instead of each getting its own QThread. Completion callbacks are delivered
+on the thread that owns the runner (normally the GUI thread).
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Callable, Coroutine, Optional, Set
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+
+class AsyncRunner(QObject):
+    """Submit coroutines to a shared event-loop thread and get callbacks on the GUI thread"""
+
+    _deliver = Signal(object, object)  # callback, value
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loop = asyncio.new_event_loop()
+        self._futures: Set[concurrent.futures.Future] = set()
+        self._lock = threading.Lock()
+        self._deliver.connect(self._dispatch)
+        self._thread = threading.Thread(target=self._run, name="song-editor-asyncio", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(
+        self,
+        coro: Coroutine[Any, Any, Any],
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> concurrent.futures.Future:
+        """Schedule coro on the loop; on_done(result) or on_error(exc) runs on the GUI thread"""
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self._lock:
+            self._futures.add(fut)
+
+        def finished(f: concurrent.futures.Future) -> None:
+            with self._lock:
+                self._futures.discard(f)
+            if f.cancelled():
+                return
+            exc = f.exception()
+            if exc is None:
+                if on_done is not None:
+                    self._deliver.emit(on_done, f.result())
+            elif on_error is not None:
+                self._deliver.emit(on_error, exc)
+
+        fut.add_done_callback(finished)
+        return fut
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    @Slot(object, object)
+    def _dispatch(self, callback: Callable[[Any], None], value: Any) -> None:
+        callback(value)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Wait up to timeout seconds for pending coroutines, cancel the rest and stop the loop"""
+        with self._lock:
+            pending = set(self._futures)
+        if pending:
+            _, not_done = concurrent.futures.wait(pending, timeout=timeout)
+            for fut in not_done:
+                fut.cancel()
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=max(1.0, timeout))
+        if not self._thread.is_alive():
+            self.loop.close()
@@ -5,10 +5,12 @@ Displays song data in 20-second blocks with editable fields and audio playback f
 """
 
 import os
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Sequence
 from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
+
 from PySide6.QtCore import Qt, QTimer, Signal, QThread
 from PySide6.QtGui import QFont, QPalette, QColor
 from PySide6.QtWidgets import (
@@ -18,6 +20,8 @@ from PySide6.QtWidgets import (
 )
 
 from ..models.lyrics import WordRow
+from ..models.timeline import WordTimeline
+from ..processing.alignment import annotate_words_with_chords
 from ..core.audio_player import AudioPlayer
 
 
@@ -469,13 +473,21 @@ class BlockView(QWidget):
     
 
     
-    def create_blocks_from_data(self, words: List[WordRow], chords: List):
+    def create_blocks_from_data(self, words: Sequence[WordRow], chords: List):
         """Create 20-second blocks from song data"""
         if not words:
             return
         
         # Calculate total duration
-        total_duration = max(word.end for word in words) if words else 0
+        total_duration = float(words.ends.max()) if isinstance(words, WordTimeline) else max(word.end for word in words)
+        
+        # Each word gets the chord sounding at its midpoint, in one pass over all words
+        annotate_words_with_chords(words, [c for c in chords if hasattr(c, 'start') and hasattr(c, 'end')])
+        if isinstance(words, WordTimeline):
+            starts, ends = words.starts, words.ends
+        else:
+            starts = np.fromiter((w.start for w in words), dtype=np.float64, count=len(words))
+            ends = np.fromiter((w.end for w in words), dtype=np.float64, count=len(words))
         
         # Create blocks
         self.blocks = []
@@ -485,18 +497,7 @@ class BlockView(QWidget):
             block_end = min(block_start + block_size, total_duration)
             
             # Get words in this time range
-            block_words = [w for w in words if w.start >= block_start and w.end <= block_end]
-            
-            # Align chords with words in this block
-            # Each word should have its corresponding chord
-            for word in block_words:
-                word_mid = (word.start + word.end) / 2
-                # Find the chord that overlaps with this word
-                for chord in chords:
-                    if hasattr(chord, 'start') and hasattr(chord, 'end'):
-                        if chord.start <= word_mid <= chord.end:
-                            word.chord = chord.name if hasattr(chord, 'name') else str(chord)
-                            break
+            block_words = [words[i] for i in np.flatnonzero((starts >= block_start) & (ends <= block_end))]
             
             # Get the most common chord in this block for display
             block_chord = ""
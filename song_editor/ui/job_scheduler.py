@@ -0,0 +1,197 @@
+"""
+Job Scheduler
+
+Runs a small dependency graph of jobs on a QThreadPool so long pipeline stages
+(separation, transcription, chord detection) never block the GUI thread. Jobs start
+as soon as their dependencies finish, so independent stages run concurrently.
+All signals are delivered on the thread that owns the scheduler (normally the GUI thread).
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool, Signal, Slot
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by JobContext.check() once cancellation was requested"""
+
+
+class JobContext:
+    """Handed to each job function: dependency results, progress reporting and cancellation"""
+
+    def __init__(self, name: str, results: Dict[str, Any], cancel_event: threading.Event, signals: "_JobSignals"):
+        self.name = name
+        self.results = results
+        self._cancel_event = cancel_event
+        self._signals = signals
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check(self) -> None:
+        """Raise JobCancelled if the scheduler was cancelled; call between units of work"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def report(self, fraction: float, message: str = "") -> None:
+        self._signals.progress.emit(self.name, float(fraction), message)
+
+    def publish(self, payload: Any) -> None:
+        """Hand a partial result to the GUI thread (job_partial) while the job keeps running"""
+        self._signals.partial.emit(self.name, payload)
+
+
+@dataclass
+class Job:
+    name: str
+    fn: Callable[[JobContext], Any]
+    deps: List[str] = field(default_factory=list)
+    state: str = "pending"  # pending, running, done, failed, cancelled
+
+
+class _JobSignals(QObject):
+    finished = Signal(str, object, float)
+    failed = Signal(str, str, float)
+    cancelled = Signal(str)
+    progress = Signal(str, float, str)
+    partial = Signal(str, object)
+
+
+class _JobRunnable(QRunnable):
+    def __init__(self, job: Job, ctx: JobContext, signals: _JobSignals):
+        super().__init__()
+        self.job = job
+        self.ctx = ctx
+        self.signals = signals
+        self.setAutoDelete(True)
+
+    def run(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            self.ctx.check()
+            result = self.job.fn(self.ctx)
+            self.ctx.check()
+        except JobCancelled:
+            self.signals.cancelled.emit(self.job.name)
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.job.name, f"{type(e).__name__}: {e}", time.perf_counter() - t0)
+            return
+        self.signals.finished.emit(self.job.name, result, time.perf_counter() - t0)
+
+
+class JobScheduler(QObject):
+    """Dependency-aware job runner on a QThreadPool with progress, timing and cancellation"""
+
+    job_started = Signal(str)
+    job_progress = Signal(str, float, str)  # name, fraction, message
+    job_partial = Signal(str, object)  # name, payload from JobContext.publish
+    job_finished = Signal(str, object, float)  # name, result, seconds
+    job_failed = Signal(str, str)  # name, error
+    job_cancelled = Signal(str)
+    all_finished = Signal(dict)  # name -> seconds for every job that ran
+
+    def __init__(self, pool: Optional[QThreadPool] = None, parent=None):
+        super().__init__(parent)
+        if pool is None:
+            # A private pool with at least two threads, so independent stages overlap even on small machines
+            pool = QThreadPool(self)
+            pool.setMaxThreadCount(max(2, QThread.idealThreadCount()))
+        self.pool = pool
+        self.jobs: Dict[str, Job] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+        self._cancel_event = threading.Event()
+        self._signals = _JobSignals()
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._signals.cancelled.connect(self._on_cancelled)
+        self._signals.progress.connect(self.job_progress)
+        self._signals.partial.connect(self._on_partial)
+        self._started = False
+        self._done = False
+
+    def add(self, name: str, fn: Callable[[JobContext], Any], deps: Optional[List[str]] = None) -> None:
+        if name in self.jobs:
+            raise ValueError(f"duplicate job: {name}")
+        for dep in deps or []:
+            if dep not in self.jobs:
+                raise ValueError(f"unknown dependency {dep!r} for job {name!r}")
+        self.jobs[name] = Job(name, fn, list(deps or []))
+
+    def start(self) -> None:
+        self._started = True
+        self._schedule()
+
+    def cancel(self) -> None:
+        """Cancel pending jobs and ask running ones to stop at their next check()"""
+        self._cancel_event.set()
+        for job in self.jobs.values():
+            if job.state == "pending":
+                job.state = "cancelled"
+                self.job_cancelled.emit(job.name)
+        self._check_all_finished()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def is_running(self) -> bool:
+        return self._started and not self._done
+
+    def _schedule(self) -> None:
+        for job in self.jobs.values():
+            if job.state != "pending":
+                continue
+            dep_states = [self.jobs[d].state for d in job.deps]
+            if any(s in ("failed", "cancelled") for s in dep_states):
+                job.state = "cancelled"
+                self.job_cancelled.emit(job.name)
+                continue
+            if all(s == "done" for s in dep_states):
+                job.state = "running"
+                ctx = JobContext(job.name, self.results, self._cancel_event, self._signals)
+                self.job_started.emit(job.name)
+                self.pool.start(_JobRunnable(job, ctx, self._signals))
+        self._check_all_finished()
+
+    def _check_all_finished(self) -> None:
+        if self._done or not self._started:
+            return
+        if all(job.state in ("done", "failed", "cancelled") for job in self.jobs.values()):
+            self._done = True
+            self.all_finished.emit(dict(self.timings))
+
+    @Slot(str, object)
+    def _on_partial(self, name: str, payload: Any) -> None:
+        if self.jobs[name].state == "running":
+            self.job_partial.emit(name, payload)
+
+    @Slot(str, object, float)
+    def _on_finished(self, name: str, result: Any, seconds: float) -> None:
+        job = self.jobs[name]
+        job.state = "done"
+        self.results[name] = result
+        self.timings[name] = seconds
+        self.job_finished.emit(name, result, seconds)
+        if self._cancel_event.is_set():
+            self._check_all_finished()
+        else:
+            self._schedule()
+
+    @Slot(str, str, float)
+    def _on_failed(self, name: str, error: str, seconds: float) -> None:
+        self.jobs[name].state = "failed"
+        self.timings[name] = seconds
+        self.job_failed.emit(name, error)
+        self._schedule()
+
+    @Slot(str)
+    def _on_cancelled(self, name: str) -> None:
+        self.jobs[name].state = "cancelled"
+        self.job_cancelled.emit(name)
+        self._schedule()
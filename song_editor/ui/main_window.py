@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import os
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from pathlib import Path
 
-from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Slot, QThread, Signal
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, Slot
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import (
 	QMainWindow,
@@ -23,19 +23,27 @@ from PySide6.QtWidgets import (
     QDialog,
     QDialogButtonBox,
     QSlider,
+    QCheckBox,
 )
 from PySide6.QtCore import QDir
 
 from ..core.audio_player import AudioPlayer
+from ..core.analysis_cache import AnalysisCache
 from ..processing.transcriber import Transcriber, Word
 from ..processing.chords import ChordDetector, DetectedChord
 from ..export.ccli import export_ccli
 from ..export.midi_export import export_midi
+from ..services.gemini_async import AsyncGeminiClient
 from ..services.gemini_client import GeminiClient
 from ..models.lyrics import WordRow
 from ..models.song_data_importer import SongDataImporter, SongData
-from ..processing.separate import separate_vocals_instrumental
+from ..models.timeline import WordTimeline
+from ..processing import pipeline
+from ..processing.activity import ActivityGate
+from ..processing.alignment import align_words, annotate_words_with_chords, nearest_rows
 from .block_view import BlockView
+from .async_runner import AsyncRunner
+from .job_scheduler import JobContext, JobScheduler
 from .enhanced_lyrics_editor import EnhancedLyricsEditor
 
 
@@ -53,9 +61,10 @@ class WordsTableModel(QAbstractTableModel):
 		"Gemini Word", "Gemini Chord"
 	]
 
-	def __init__(self, words: List[WordRow]):
+	def __init__(self, words: Sequence[WordRow]):
 		super().__init__()
-		self._rows: List[WordRow] = words
+		# A list of WordRow, or a columnar WordTimeline for long recordings
+		self._rows: Sequence[WordRow] = words
 
 	def rowCount(self, parent: QModelIndex | None = None) -> int:  # type: ignore[override]
 		return len(self._rows)
@@ -144,9 +153,35 @@ class WordsTableModel(QAbstractTableModel):
 		else:
 			return len(self.HEADERS)
 
-	def rows(self) -> List[WordRow]:
+	def rows(self) -> Sequence[WordRow]:
 		return self._rows
 
+	def replace_rows(self, first: int, count: int, rows: List[WordRow]) -> None:
+		"""Replace rows[first:first + count] with rows, leaving the rest of the table alone"""
+		if count:
+			self.beginRemoveRows(QModelIndex(), first, first + count - 1)
+			if isinstance(self._rows, WordTimeline):
+				self._rows.splice(first, count, [])
+			else:
+				del self._rows[first:first + count]
+			self.endRemoveRows()
+		if rows:
+			self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+			if isinstance(self._rows, WordTimeline):
+				self._rows.splice(first, 0, rows)
+			else:
+				self._rows[first:first] = rows
+			self.endInsertRows()
+
+	def append_rows(self, rows: List[WordRow]) -> None:
+		"""Append rows at the end without resetting the view (used while words stream in)"""
+		if not rows:
+			return
+		first = len(self._rows)
+		self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+		self._rows.extend(rows)
+		self.endInsertRows()
+
 
 class MainWindow(QMainWindow):
 	def __init__(self) -> None:
@@ -158,12 +193,20 @@ class MainWindow(QMainWindow):
 		self.transcriber = Transcriber()
 		self.chord_detector = ChordDetector()
 		self.gemini = GeminiClient()
+		# All Gemini requests share one event-loop thread and concurrency limit
+		self.async_runner = AsyncRunner(self)
+		self.gemini_async = AsyncGeminiClient(self.gemini)
 		self.song_data_importer = SongDataImporter()
+		self.analysis_cache = AnalysisCache()
 		self.detected_chords: list[DetectedChord] = []
 		self.vocals_path: Optional[str] = None
 		self.instrumental_path: Optional[str] = None
-		self._gemini_thread: Optional[QThread] = None
+		self._analysis: Optional[JobScheduler] = None
 		self.imported_song_data: Optional[SongData] = None
+		# The Whisper pool only evicts when it is used; sweep it so an idle model is freed on time
+		self._model_sweep = QTimer(self)
+		self._model_sweep.timeout.connect(self._evict_idle_models)
+		self._model_sweep.start(int(min(60.0, max(1.0, self.transcriber.pool.idle_seconds)) * 1000))
 
 		self.words_model = WordsTableModel([])
 		self.words_view = QTableView()
@@ -223,6 +266,16 @@ class MainWindow(QMainWindow):
 		separate_act.triggered.connect(self.run_separation)
 		toolbar.addAction(separate_act)
 
+		retranscribe_act = QAction("Re-transcribe Selection", self)
+		retranscribe_act.triggered.connect(self.retranscribe_selection)
+		toolbar.addAction(retranscribe_act)
+
+		cancel_act = QAction("Cancel Processing", self)
+		cancel_act.triggered.connect(self.cancel_analysis)
+		cancel_act.setEnabled(False)
+		toolbar.addAction(cancel_act)
+		self.cancel_act = cancel_act
+
 		gemini_act = QAction("Gemini Alt Lyrics", self)
 		gemini_act.triggered.connect(self.generate_gemini_alt)
 		toolbar.addAction(gemini_act)
@@ -265,6 +318,7 @@ class MainWindow(QMainWindow):
 		controls = QHBoxLayout()
 		self.model_combo = QComboBox()
 		self.model_combo.addItems(["large-v2", "medium", "small", "base", "tiny"])
+		self.model_combo.currentTextChanged.connect(self.on_model_size_changed)
 		controls.addWidget(QLabel("Model:"))
 		controls.addWidget(self.model_combo)
 
@@ -340,6 +394,10 @@ class MainWindow(QMainWindow):
 		# Default cloud chunking params
 		self.gemini_chunk_seconds = 60
 		self.gemini_sleep_between = 15
+		self.gemini_max_in_flight = 4
+		self.gemini_requests_per_minute = 10
+		self.gemini_overlap_seconds = 2
+		self.gemini_downsample = False
 
 	def prepare_shutdown(self) -> None:
 		# Called from app.aboutToQuit
@@ -348,11 +406,14 @@ class MainWindow(QMainWindow):
 		except Exception:
 			pass
 		try:
-			if self._gemini_thread is not None and self._gemini_thread.isRunning():
-				self._gemini_thread.quit()
-				self._gemini_thread.wait(3000)
-				self._gemini_thread.deleteLater()
-				self._gemini_thread = None
+			analysis = self._analysis
+			self.cancel_analysis()
+			if analysis is not None:
+				analysis.pool.waitForDone(3000)
+		except Exception:
+			pass
+		try:
+			self.async_runner.shutdown(3.0)
 		except Exception:
 			pass
 
@@ -409,6 +470,15 @@ class MainWindow(QMainWindow):
 			# The enhanced editor uses the same duration for playback
 			pass  # Duration is handled in the playback request
 
+	@Slot()
+	def on_model_size_changed(self, size: str) -> None:
+		"""Free the previous Whisper model now instead of after the pool's idle timeout"""
+		self.transcriber.pool.select_size(size)
+
+	@Slot()
+	def _evict_idle_models(self) -> None:
+		self.transcriber.pool.evict_idle()
+
 	@Slot()
 	def on_view_mode_changed(self, view_mode: str) -> None:
 		"""Handle view mode change"""
@@ -437,8 +507,8 @@ class MainWindow(QMainWindow):
 		updated_words = self.block_view.get_updated_words()
 		updated_chords = self.block_view.get_updated_chords()
 		
-		# Update the table model
-		self.words_model = WordsTableModel(updated_words)
+		# Update the table model; the blocks hold proxies into the old timeline, so copy them out
+		self.words_model = WordsTableModel(WordTimeline.from_rows(updated_words))
 		self.words_view.setModel(self.words_model)
 		
 		# Update detected chords
@@ -485,9 +555,21 @@ class MainWindow(QMainWindow):
 			self.player.load_audio(self.audio_path)
 			self.player.play_segment(start_time, duration)
 
+	def _reset_song_state(self) -> None:
+		"""Stop any run on the previous song and forget its stems and chords.
+
+		Called as soon as a new file is chosen, before the .song_data lookup, so a run
+		still working on the old song cannot apply its results to the new one.
+		"""
+		self.cancel_analysis()
+		self.vocals_path = None
+		self.instrumental_path = None
+		self.detected_chords = []
+
 	def load_audio_from_path(self, path: str) -> None:
 		"""Load audio from a specific file path (used for command line arguments)"""
 		self.audio_path = path
+		self._reset_song_state()
 		self.player.load(path)
 		self.info(f"Loaded: {os.path.basename(path)}")
 
@@ -514,18 +596,10 @@ class MainWindow(QMainWindow):
 					)
 					self.detected_chords.append(detected_chord)
 
-				# Annotate words with nearest-overlapping chord (same logic as run_chords)
+				# Annotate words with the chord at each word's midpoint (same as the pipeline)
 				rows = self.words_model.rows()
 				if rows and self.detected_chords:
-					j = 0
-					for row in rows:
-						mid_t = 0.5 * (row.start + row.end)
-						while j + 1 < len(self.detected_chords) and self.detected_chords[j].end < mid_t:
-							j += 1
-						ch = None
-						if j < len(self.detected_chords) and self.detected_chords[j].start - 0.01 <= mid_t <= self.detected_chords[j].end + 0.01:
-							ch = self.detected_chords[j].name
-						row.chord = ch
+					annotate_words_with_chords(rows, self.detected_chords)
 					self.words_model.layoutChanged.emit()
 
 				self.info(f"Imported {len(self.imported_song_data.words)} words and {len(self.detected_chords)} chords")
@@ -534,18 +608,10 @@ class MainWindow(QMainWindow):
 				self.info("Failed to import song data, falling back to local processing")
 
 		# Fall back to local processing if no pre-processed data found
-		self.vocals_path = None
-		self.instrumental_path = None
-		self.detected_chords = []
 		self.imported_song_data = None
 
-		self.info("Stage: Separation")
-		# Auto-run processing
-		self.run_separation()
-		self.info("Stage: Transcription")
-		self.run_transcription()
-		self.info("Stage: Chord Detection")
-		self.run_chords()
+		# Auto-run processing in the background
+		self.start_analysis()
 
 	@Slot()
 	def open_audio(self) -> None:
@@ -664,6 +730,7 @@ class MainWindow(QMainWindow):
 
 		
 		self.audio_path = path
+		self._reset_song_state()
 		self.player.load(path)
 		self.info(f"Loaded: {os.path.basename(path)}")
 		
@@ -696,18 +763,10 @@ class MainWindow(QMainWindow):
 					)
 					self.detected_chords.append(detected_chord)
 				
-				# Annotate words with nearest-overlapping chord (same logic as run_chords)
+				# Annotate words with the chord at each word's midpoint (same as the pipeline)
 				rows = self.words_model.rows()
 				if rows and self.detected_chords:
-					j = 0
-					for row in rows:
-						mid_t = 0.5 * (row.start + row.end)
-						while j + 1 < len(self.detected_chords) and self.detected_chords[j].end < mid_t:
-							j += 1
-						ch = None
-						if j < len(self.detected_chords) and self.detected_chords[j].start - 0.01 <= mid_t <= self.detected_chords[j].end + 0.01:
-							ch = self.detected_chords[j].name
-						row.chord = ch
+					annotate_words_with_chords(rows, self.detected_chords)
 					self.words_model.layoutChanged.emit()
 				
 				self.info(f"Imported {len(self.imported_song_data.words)} words and {len(self.detected_chords)} chords")
@@ -716,31 +775,219 @@ class MainWindow(QMainWindow):
 				self.info("Failed to import song data, falling back to local processing")
 		
 		# Fall back to local processing if no pre-processed data found
-		self.vocals_path = None
-		self.instrumental_path = None
-		self.detected_chords = []
 		self.imported_song_data = None
 		
-		self.info("Stage: Separation")
-		# Auto-run processing
-		self.run_separation()
-		self.info("Stage: Transcription")
-		self.run_transcription()
-		self.info("Stage: Chord Detection")
-		self.run_chords()
+		# Auto-run processing in the background
+		self.start_analysis()
 
 	@Slot()
 	def run_transcription(self) -> None:
+		self.start_analysis(("transcribe",))
+
+	@Slot()
+	def run_chords(self) -> None:
+		self.start_analysis(("chords",))
+
+	@Slot()
+	def run_separation(self) -> None:
+		self.start_analysis(("separate",))
+
+	def start_analysis(self, stages: tuple = ("separate", "transcribe", "chords")) -> None:
+		"""
+		Run the requested pipeline stages on the thread pool. Transcription and chord
+		detection both depend only on separation, so they run concurrently once stems exist.
+		"""
 		if not self.audio_path:
 			self.info("Load an audio file first")
 			return
+		if self._analysis is not None and self._analysis.is_running():
+			self.info("Processing already running; cancel it first")
+			return
+		audio_path = self.audio_path
 		model = self.model_combo.currentText()
-		self.info(f"Transcribing with {model}...")
-		use_path = self.vocals_path or self.audio_path
-		words: List[Word] = self.transcriber.transcribe(use_path, model_size=model)
-		rows = [WordRow(w.text, w.start, w.end, w.confidence or 0.0) for w in words]
+		vocals0, inst0 = self.vocals_path, self.instrumental_path
+		cache = self.analysis_cache
+		scheduler = JobScheduler(parent=self)
+		self._analysis = scheduler
+
+		def stem_paths(ctx: JobContext):
+			sep = ctx.results.get("separate")
+			return (sep[0], sep[1]) if sep else (vocals0, inst0)
+
+		deps: List[str] = []
+		have_stems = vocals0 and inst0 and os.path.exists(vocals0) and os.path.exists(inst0)
+		if "separate" in stages and have_stems:
+			self.info("Stems already separated; skipping")
+		elif "separate" in stages:
+			scheduler.add("separate", lambda ctx: pipeline.run_separation(audio_path, cache))
+			deps = ["separate"]
+		if "transcribe" in stages:
+			def transcribe(ctx: JobContext):
+				def on_words(words: List[Word]) -> None:
+					ctx.check()
+					ctx.publish(words)
+				words, _ = pipeline.run_transcription(
+					audio_path, stem_paths(ctx)[0], self.transcriber, model, cache,
+					on_words=on_words, gate=ActivityGate(), report=activity,
+				)
+				return words
+			scheduler.add("transcribe", transcribe, deps)
+		if "chords" in stages:
+			scheduler.add(
+				"chords",
+				lambda ctx: pipeline.run_chords(audio_path, stem_paths(ctx)[1], self.chord_detector, cache, check=ctx.check)[0],
+				deps,
+			)
+		if not scheduler.jobs:
+			self._analysis = None
+			scheduler.deleteLater()
+			return
+
+		labels = {
+			"separate": "Separating stems (Demucs)...",
+			"transcribe": f"Transcribing with {model}...",
+			"chords": "Detecting chords (major/minor)...",
+		}
+
+		def on_started(name: str) -> None:
+			if scheduler is self._analysis:
+				self.info(labels.get(name, name))
+
+		streamed = {"model": None}
+		activity: dict = {}
+
+		def on_partial(name: str, words) -> None:
+			# Show words segment by segment while Whisper is still decoding
+			if scheduler is not self._analysis or name != "transcribe":
+				return
+			rows = pipeline.join_words_and_chords(words, self.detected_chords)
+			if streamed["model"] is None or streamed["model"] is not self.words_model:
+				streamed["model"] = WordsTableModel(WordTimeline())
+				self.words_model = streamed["model"]
+				self.words_view.setModel(self.words_model)
+			self.words_model.append_rows(rows)
+			self.info(f"Transcribing with {model}... {self.words_model.rowCount()} words")
+
+		def on_finished(name: str, result, seconds: float) -> None:
+			if scheduler is not self._analysis:
+				return
+			if name == "separate":
+				voc, inst, _ = result
+				self.vocals_path = voc
+				self.instrumental_path = inst
+				if voc and inst:
+					self.info(f"Separation complete ({seconds:.1f}s); using stems for processing")
+				else:
+					self.info("Separation unavailable; using original mix")
+			elif name == "transcribe":
+				if streamed["model"] is self.words_model and self.words_model.rowCount() == len(result):
+					self._words_ready(self.words_model.rows())
+				else:
+					self._apply_words(result)
+				if activity.get("skipped_seconds"):
+					self.info(f"Transcribed {len(result)} words; skipped {activity['skipped_seconds']:.0f}s of {activity['total_seconds']:.0f}s without vocals")
+			elif name == "chords":
+				self._apply_chords(result)
+
+		def on_failed(name: str, error: str) -> None:
+			if scheduler is self._analysis:
+				self.info(f"{name} failed: {error}")
+
+		def on_all_finished(timings: dict) -> None:
+			if scheduler is not self._analysis:
+				return
+			self._analysis = None
+			self.cancel_act.setEnabled(False)
+			if timings:
+				self.info("Processing complete: " + ", ".join(f"{k} {v:.1f}s" for k, v in timings.items()))
+
+		scheduler.job_started.connect(on_started)
+		scheduler.job_partial.connect(on_partial)
+		scheduler.job_finished.connect(on_finished)
+		scheduler.job_failed.connect(on_failed)
+		scheduler.all_finished.connect(on_all_finished)
+		# Each run has its own scheduler and thread pool; free them once every job has ended
+		scheduler.all_finished.connect(scheduler.deleteLater)
+		self.cancel_act.setEnabled(True)
+		scheduler.start()
+
+	@Slot()
+	def retranscribe_selection(self) -> None:
+		"""Re-transcribe the time span of the selected words and splice the result in place"""
+		if not self.audio_path:
+			self.info("Load an audio file first")
+			return
+		if self._analysis is not None and self._analysis.is_running():
+			self.info("Processing already running; cancel it first")
+			return
+		rows = self.words_model.rows()
+		selected = sorted({idx.row() for idx in self.words_view.selectionModel().selectedIndexes()})
+		if not selected:
+			self.info("Select the words to re-transcribe first")
+			return
+		t0 = min(rows[i].start for i in selected)
+		t1 = max(rows[i].end for i in selected)
+		source = self.vocals_path if self.vocals_path and os.path.exists(self.vocals_path) else self.audio_path
+		model = self.model_combo.currentText()
+		words_model = self.words_model
+		scheduler = JobScheduler(parent=self)
+		self._analysis = scheduler
+		scheduler.add(
+			"retranscribe",
+			lambda ctx: pipeline.retranscribe_range(source, t0, t1, self.transcriber, model),
+		)
+
+		def on_finished(name: str, words, seconds: float) -> None:
+			if scheduler is not self._analysis or words_model is not self.words_model:
+				return
+			new_rows = pipeline.words_to_rows(words)
+			annotate_words_with_chords(new_rows, self.detected_chords)
+			first, count, replacement = pipeline.splice_rows(words_model.rows(), new_rows, t0, t1, keep_manual=True)
+			words_model.replace_rows(first, count, replacement)
+			self.info(f"Re-transcribed {t0:.1f}-{t1:.1f}s with {model}: {count} words replaced by {len(replacement)} ({seconds:.1f}s)")
+			if self.view_mode_combo.currentText() == "Block View":
+				self.update_block_view()
+
+		def on_failed(name: str, error: str) -> None:
+			if scheduler is self._analysis:
+				self.info(f"Re-transcription failed: {error}")
+
+		def on_all_finished(timings: dict) -> None:
+			if scheduler is self._analysis:
+				self._analysis = None
+				self.cancel_act.setEnabled(False)
+
+		scheduler.job_finished.connect(on_finished)
+		scheduler.job_failed.connect(on_failed)
+		scheduler.all_finished.connect(on_all_finished)
+		scheduler.all_finished.connect(scheduler.deleteLater)
+		self.info(f"Re-transcribing {t0:.1f}-{t1:.1f}s with {model}...")
+		self.cancel_act.setEnabled(True)
+		scheduler.start()
+
+	@Slot()
+	def cancel_analysis(self) -> None:
+		"""
+		Cancel background processing; results from the cancelled run are discarded.
+		Transcription, and chord detection of long recordings, stop at their next check.
+		Separation and chord detection of shorter inputs run as one call each and cannot be
+		interrupted: they finish in the background and their results are dropped.
+		"""
+		if self._analysis is not None:
+			if self._analysis.is_running():
+				self.info("Processing cancelled")
+			self._analysis.cancel()
+			self._analysis = None
+		self.cancel_act.setEnabled(False)
+
+	def _apply_words(self, words: List[Word]) -> None:
+		# Chord detection may have finished first; annotate as the join step
+		rows = pipeline.join_words_and_chords(words, self.detected_chords)
 		self.words_model = WordsTableModel(rows)
 		self.words_view.setModel(self.words_model)
+		self._words_ready(rows)
+
+	def _words_ready(self, rows: Sequence[WordRow]) -> None:
 		self.info(f"Transcribed {len(rows)} words")
 		
 		# Update block view if it's currently visible
@@ -752,51 +999,20 @@ class MainWindow(QMainWindow):
 			if hasattr(self, 'enhanced_lyrics_editor'):
 				self.enhanced_lyrics_editor.set_lyrics_data(rows)
 
-	@Slot()
-	def run_chords(self) -> None:
-		if not self.audio_path:
-			self.info("Load an audio file first")
-			return
-		self.info("Detecting chords (major/minor)...")
-		use_path = self.instrumental_path or self.audio_path
-		self.detected_chords = self.chord_detector.detect(use_path)
+	def _apply_chords(self, chords: List[DetectedChord]) -> None:
+		self.detected_chords = chords
 		self.info(f"Chord detection complete: {len(self.detected_chords)} segments")
 		# Annotate words with nearest-overlapping chord
 		rows = self.words_model.rows()
 		if not rows or not self.detected_chords:
 			return
-		j = 0
-		for row in rows:
-			mid_t = 0.5 * (row.start + row.end)
-			while j + 1 < len(self.detected_chords) and self.detected_chords[j].end < mid_t:
-				j += 1
-			ch = None
-			if self.detected_chords[j].start - 0.01 <= mid_t <= self.detected_chords[j].end + 0.01:
-				ch = self.detected_chords[j].name
-			row.chord = ch
+		annotate_words_with_chords(rows, self.detected_chords)
 		self.words_model.layoutChanged.emit()
 		
 		# Update block view if it's currently visible
 		if self.view_mode_combo.currentText() == "Block View":
 			self.update_block_view()
 
-	@Slot()
-	def run_separation(self) -> None:
-		if not self.audio_path:
-			self.info("Load an audio file first")
-			return
-		if self.vocals_path and self.instrumental_path and os.path.exists(self.vocals_path) and os.path.exists(self.instrumental_path):
-			self.info("Stems already separated; skipping")
-			return
-		self.info("Separating stems (Demucs)...")
-		voc, inst = separate_vocals_instrumental(self.audio_path)
-		self.vocals_path = voc
-		self.instrumental_path = inst
-		if voc and inst:
-			self.info("Separation complete; using stems for processing")
-		else:
-			self.info("Separation unavailable; using original mix")
-
 	@Slot()
 	def on_row_double_clicked(self, index: QModelIndex) -> None:
 		if not index.isValid():
@@ -829,36 +1045,9 @@ class MainWindow(QMainWindow):
 		self.gemini_act.setEnabled(False)
 		QApplication.setOverrideCursor(Qt.BusyCursor)
 
-		class GeminiWorker(QThread):
-			finished_ok = Signal(list, list)
-			failed = Signal(str)
-
-			def __init__(self, client: GeminiClient, text: str, model_name: str, words_with_alternatives: List = None) -> None:
-				super().__init__()
-				self.client = client
-				self.text = text
-				self.model_name = model_name
-				self.words_with_alternatives = words_with_alternatives
-
-			def run(self) -> None:
-				try:
-					self.client.model_name = self.model_name
-					alts = self.client.rewrite_lyrics(self.text, self.words_with_alternatives)
-					if not alts:
-						msg = "No alternative returned"
-						if getattr(self.client, "last_debug", ""):
-							msg += ": " + self.client.last_debug
-						self.failed.emit(msg)
-						return
-					alt_chords = self.client.infer_chords(" ".join(a.text for a in alts))
-					self.finished_ok.emit(alts, alt_chords)
-				except Exception as e:
-					self.failed.emit(str(e))
-
 		text = " ".join(r.text for r in self.words_model.rows())
 		words_with_alternatives = self.words_model.rows()
-		worker = GeminiWorker(self.gemini, text, self.gemini_model_combo.currentText(), words_with_alternatives)
-		self._gemini_thread = worker
+		request = self.gemini_async.rewrite_lyrics(text, words_with_alternatives, model_name=self.gemini_model_combo.currentText())
 		
 		# Show Gemini columns when processing starts
 		self.words_model.set_show_gemini_columns(True)
@@ -878,21 +1067,22 @@ class MainWindow(QMainWindow):
 			if self.view_mode_combo.currentText() == "Block View":
 				self.update_block_view()
 			QApplication.restoreOverrideCursor()
-			if self._gemini_thread is not None:
-				self._gemini_thread.deleteLater()
-				self._gemini_thread = None
 
 		def on_fail(msg: str) -> None:
 			self.info(msg)
 			self.gemini_act.setEnabled(True)
 			QApplication.restoreOverrideCursor()
-			if self._gemini_thread is not None:
-				self._gemini_thread.deleteLater()
-				self._gemini_thread = None
 
-		worker.finished_ok.connect(on_done)
-		worker.failed.connect(on_fail)
-		worker.start()
+		def on_result(alts) -> None:
+			if not alts:
+				msg = "No alternative returned"
+				if self.gemini_async.last_debug:
+					msg += ": " + self.gemini_async.last_debug
+				on_fail(msg)
+				return
+			on_done(alts, self.gemini.infer_chords(" ".join(a.text for a in alts)))
+
+		self.async_runner.submit(request, on_result, lambda e: on_fail(str(e)))
 
 	@Slot()
 	def generate_gemini_from_audio(self) -> None:
@@ -906,41 +1096,18 @@ class MainWindow(QMainWindow):
 		if hasattr(self, "gemini_audio_act"):
 			self.gemini_audio_act.setEnabled(False)
 		QApplication.setOverrideCursor(Qt.BusyCursor)
-		class GeminiAudioWorker(QThread):
-			finished_ok = Signal(list, list)
-			failed = Signal(str)
-			def __init__(self, client: GeminiClient, audio_path: str, model_name: str, chunk_seconds: int, sleep_between: int) -> None:
-				super().__init__()
-				self.client = client
-				self.path = audio_path
-				self.model = model_name
-				self.chunk_seconds = chunk_seconds
-				self.sleep_between = sleep_between
-			def run(self) -> None:
-				try:
-					self.client.model_name = self.model
-					alts, chords = self.client.analyze_audio_alt_chunked(
-						self.path,
-						chunk_seconds=self.chunk_seconds,
-						sleep_between=self.sleep_between,
-					)
-					if not alts:
-						msg = "No alternative returned"
-						if getattr(self.client, "last_debug", ""):
-							msg += ": " + self.client.last_debug
-						self.failed.emit(msg)
-						return
-					self.finished_ok.emit(alts, chords)
-				except Exception as e:
-					self.failed.emit(str(e))
-		worker = GeminiAudioWorker(
-			self.gemini,
+		if self.gemini_max_in_flight > 1:
+			rpm = self.gemini_requests_per_minute
+		else:
+			rpm = 60.0 / self.gemini_sleep_between if self.gemini_sleep_between > 0 else None
+		request = self.gemini_async.analyze_audio_alt_chunked(
 			self.audio_path,
-			self.gemini_model_combo.currentText(),
-			self.gemini_chunk_seconds,
-			self.gemini_sleep_between,
+			chunk_seconds=self.gemini_chunk_seconds,
+			requests_per_minute=rpm,
+			overlap_seconds=self.gemini_overlap_seconds,
+			downsample=self.gemini_downsample,
+			model_name=self.gemini_model_combo.currentText(),
 		)
-		self._gemini_thread = worker
 		def on_done(alts, chords) -> None:
 			rows = self.words_model.rows()
 			# Time-based alignment: find nearest local word for each Gemini result
@@ -955,34 +1122,15 @@ class MainWindow(QMainWindow):
 					row.alt_chord = None
 					row.alt_start = None
 					row.alt_end = None
-				# Align Gemini words to nearest local words by time
-				for i, alt in enumerate(alts):
-					alt_mid = 0.5 * (alt.start + alt.end)
-					best_idx = -1
-					best_dist = float('inf')
-					for j, row in enumerate(rows):
-						row_mid = 0.5 * (row.start + row.end)
-						dist = abs(alt_mid - row_mid)
-						if dist < best_dist:
-							best_dist = dist
-							best_idx = j
-					if best_idx >= 0:
-						rows[best_idx].alt_text = alt.text
-						rows[best_idx].alt_start = alt.start
-						rows[best_idx].alt_end = alt.end
-				# Align Gemini chords to nearest local words by time
-				for i, chord in enumerate(chords):
-					chord_mid = 0.5 * (chord.start + chord.end)
-					best_idx = -1
-					best_dist = float('inf')
-					for j, row in enumerate(rows):
-						row_mid = 0.5 * (row.start + row.end)
-						dist = abs(chord_mid - row_mid)
-						if dist < best_dist:
-							best_dist = dist
-							best_idx = j
-					if best_idx >= 0:
-						rows[best_idx].alt_chord = chord.symbol
+				# One Gemini word per local word, matched in order by time and text
+				for row, k in zip(rows, align_words(rows, alts)):
+					if k >= 0:
+						row.alt_text = alts[k].text
+						row.alt_start = alts[k].start
+						row.alt_end = alts[k].end
+				# Chords go to the nearest local word by time
+				for chord, j in zip(chords, nearest_rows(rows, chords)):
+					rows[j].alt_chord = chord.symbol
 			self.words_model.layoutChanged.emit()
 			self.info("Gemini audio alternatives populated")
 			
@@ -992,20 +1140,21 @@ class MainWindow(QMainWindow):
 			if hasattr(self, "gemini_audio_act"):
 				self.gemini_audio_act.setEnabled(True)
 			QApplication.restoreOverrideCursor()
-			if self._gemini_thread is not None:
-				self._gemini_thread.deleteLater()
-				self._gemini_thread = None
 		def on_fail(msg: str) -> None:
 			self.info(msg)
 			if hasattr(self, "gemini_audio_act"):
 				self.gemini_audio_act.setEnabled(True)
 			QApplication.restoreOverrideCursor()
-			if self._gemini_thread is not None:
-				self._gemini_thread.deleteLater()
-				self._gemini_thread = None
-		worker.finished_ok.connect(on_done)
-		worker.failed.connect(on_fail)
-		worker.start()
+		def on_result(result) -> None:
+			alts, chords = result
+			if not alts:
+				msg = "No alternative returned"
+				if self.gemini_async.last_debug:
+					msg += ": " + self.gemini_async.last_debug
+				on_fail(msg)
+				return
+			on_done(alts, chords)
+		self.async_runner.submit(request, on_result, lambda e: on_fail(str(e)))
 
 	def open_cloud_settings(self) -> None:
 		dlg = QDialog(self)
@@ -1017,17 +1166,45 @@ class MainWindow(QMainWindow):
 		slider_chunk.setMaximum(180)
 		slider_chunk.setValue(self.gemini_chunk_seconds)
 		v.addWidget(slider_chunk)
+		v.addWidget(QLabel("Chunk overlap (s)"))
+		slider_overlap = QSlider(Qt.Horizontal)
+		slider_overlap.setMinimum(0)
+		slider_overlap.setMaximum(10)
+		slider_overlap.setValue(self.gemini_overlap_seconds)
+		v.addWidget(slider_overlap)
 		v.addWidget(QLabel("Sleep between (s)"))
 		slider_sleep = QSlider(Qt.Horizontal)
 		slider_sleep.setMinimum(0)
 		slider_sleep.setMaximum(300)
 		slider_sleep.setValue(self.gemini_sleep_between)
 		v.addWidget(slider_sleep)
+		v.addWidget(QLabel("Parallel uploads (1 = one chunk at a time)"))
+		slider_in_flight = QSlider(Qt.Horizontal)
+		slider_in_flight.setMinimum(1)
+		slider_in_flight.setMaximum(8)
+		slider_in_flight.setValue(self.gemini_max_in_flight)
+		v.addWidget(slider_in_flight)
+		v.addWidget(QLabel("Requests per minute (parallel uploads)"))
+		slider_rpm = QSlider(Qt.Horizontal)
+		slider_rpm.setMinimum(1)
+		slider_rpm.setMaximum(60)
+		slider_rpm.setValue(self.gemini_requests_per_minute)
+		v.addWidget(slider_rpm)
+		check_downsample = QCheckBox("Send 16 kHz mono audio (smaller uploads)")
+		check_downsample.setChecked(self.gemini_downsample)
+		v.addWidget(check_downsample)
 		buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
 		v.addWidget(buttons)
 		def accept():
 			self.gemini_chunk_seconds = slider_chunk.value()
+			self.gemini_overlap_seconds = slider_overlap.value()
 			self.gemini_sleep_between = slider_sleep.value()
+			self.gemini_max_in_flight = slider_in_flight.value()
+			self.gemini_requests_per_minute = slider_rpm.value()
+			self.gemini_downsample = check_downsample.isChecked()
+			if self.gemini_async.max_concurrency != self.gemini_max_in_flight:
+				# Calls already running keep the old limit
+				self.gemini_async = AsyncGeminiClient(self.gemini, max_concurrency=self.gemini_max_in_flight)
 			dlg.accept()
 		buttons.accepted.connect(accept)
 		buttons.rejected.connect(dlg.reject)
@@ -1035,13 +1212,10 @@ class MainWindow(QMainWindow):
 
 	def closeEvent(self, event) -> None:  # type: ignore[override]
 		try:
-			if self._gemini_thread is not None and self._gemini_thread.isRunning():
+			if self.async_runner.pending():
 				self.info("Waiting for background tasks to finish...")
-				# best effort: wait longer; if still running, terminate as last resort
-				self._gemini_thread.wait(300000)
-				if self._gemini_thread.isRunning():
-					self._gemini_thread.terminate()
-					self._gemini_thread.wait(5000)
+				# best effort: wait longer; whatever is still running is cancelled
+				self.async_runner.shutdown(300.0)
 		finally:
 			return super().closeEvent(event)
 
@@ -1076,7 +1250,7 @@ class MainWindow(QMainWindow):
 			chords = self.block_view.get_updated_chords()
 		
 		# Pass melody if available from last Gemini call
-		melody = getattr(self.gemini, 'last_notes', None)
+		melody = self.gemini_async.last_notes or None
 		export_midi(path, words, chords, melody)
 		self.info("Exported MIDI")
 
@@ -1103,40 +1277,7 @@ class MainWindow(QMainWindow):
 		
 		try:
 			# Create SongData object from current state
-			from datetime import datetime
-			
-			# Convert detected chords to ChordData format
-			chord_data_list = []
-			for chord in self.detected_chords:
-				from ..models.song_data_importer import ChordData
-				chord_data = ChordData(
-					symbol=chord.name,
-					root=chord.name[0] if chord.name else '',
-					quality=chord.name[1:] if len(chord.name) > 1 else 'maj',
-					bass=None,
-					start=chord.start,
-					end=chord.end,
-					confidence=chord.confidence
-				)
-				chord_data_list.append(chord_data)
-			
-			# Create metadata
-			metadata = {
-				"version": "2.0.0",
-				"created_at": datetime.now().isoformat(),
-				"source_audio": self.audio_path or "",
-				"processing_tool": "Song Editor 2",
-				"confidence_threshold": 0.7
-			}
-			
-			# Create SongData object
-			song_data = SongData(
-				metadata=metadata,
-				words=self.words_model.rows(),
-				chords=chord_data_list,
-				notes=[],  # Could be populated from Gemini notes if available
-				segments=[]  # Could be populated from segment detection if available
-			)
+			song_data = pipeline.build_song_data(self.audio_path, self.words_model.rows(), self.detected_chords)
 			
 			# Export using the importer's export function
 			if self.song_data_importer.export_song_data(song_data, path):
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for voice-activity gating before transcription
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.processing.activity import ActivityGate
+from song_editor.processing.transcriber import Word
+
+
+def _stem(sr=16000):
+    """30 s of silence with singing at 5-8 s and 20-22 s"""
+    t = np.arange(30 * sr) / sr
+    y = np.zeros_like(t, dtype=np.float32)
+    for s, e in ((5.0, 8.0), (20.0, 22.0)):
+        m = (t >= s) & (t < e)
+        y[m] = 0.3 * np.sin(2 * np.pi * 220 * t[m])
+    return y + 1e-4 * np.random.default_rng(0).standard_normal(len(y)).astype(np.float32)
+
+
+def test_regions_and_skip_report():
+    """Only the voiced parts (plus padding) are kept"""
+    gate = ActivityGate(padding=0.5)
+    gated = gate.apply(_stem(), 16000)
+    assert len(gated.regions) == 2
+    (s0, e0), (s1, e1) = gated.regions
+    assert abs(s0 - 4.5) < 0.1 and abs(e0 - 8.5) < 0.1
+    assert abs(s1 - 19.5) < 0.1 and abs(e1 - 22.5) < 0.1
+    expected = (e0 - s0) + (e1 - s1) + gate.join_gap
+    assert abs(len(gated.audio) / 16000 - expected) < 0.01
+    report = gated.report()
+    assert report["total_seconds"] == 30.0 and abs(report["skipped_seconds"] - 23.0) < 0.2
+    print("✅ Voiced regions and skip report")
+
+
+def test_word_times_remapped():
+    """Word times in the gated audio map back to the original timeline"""
+    gated = ActivityGate(padding=0.5).apply(_stem(), 16000)
+    second_start = gated.gated_starts[1]
+    words = [Word("grace", 0.6, 1.0, 0.9), Word("sweet", second_start + 0.7, second_start + 1.2, 0.8)]
+    remapped = gated.remap_words(words)
+    assert abs(remapped[0].start - (gated.regions[0][0] + 0.6)) < 1e-6
+    assert abs(remapped[1].start - (gated.regions[1][0] + 0.7)) < 1e-6
+    assert abs(remapped[1].end - (gated.regions[1][0] + 1.2)) < 1e-6
+    # A word inside the join gap clamps to the end of the earlier region
+    gap_word = gated.remap_words([Word("uh", second_start - 0.1, second_start - 0.05, 0.1)])[0]
+    assert gap_word.start == gated.regions[0][1]
+    print("✅ Word times remapped")
+
+
+if __name__ == "__main__":
+    print("Testing activity gate...")
+    print("=" * 50)
+
+    test_regions_and_skip_report()
+    test_word_times_remapped()
+
+    print("\n✅ All tests completed!")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent analysis cache and its CLI
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.core.analysis_cache import AnalysisCache
+from song_editor.cache_cli import main as cache_main
+
+
+def test_json_stage_roundtrip():
+    """Stage results are keyed by content and parameters, not by path"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnalysisCache(root=os.path.join(tmp, "cache"))
+        song = os.path.join(tmp, "song.wav")
+        with open(song, "wb") as f:
+            f.write(b"RIFF-not-really-audio" * 100)
+        params = {"model_size": "small", "input": "mix"}
+        assert cache.get_json(song, "transcribe", params) is None
+        cache.put_json(song, "transcribe", params, [{"text": "hi", "start": 0.0, "end": 0.5, "confidence": 0.9}])
+        assert cache.get_json(song, "transcribe", params)[0]["text"] == "hi"
+        assert cache.get_json(song, "transcribe", {"model_size": "tiny", "input": "mix"}) is None
+
+        # Same bytes under another name hit the same entry
+        copy = os.path.join(tmp, "renamed.wav")
+        with open(song, "rb") as src, open(copy, "wb") as dst:
+            dst.write(src.read())
+        assert cache.get_json(copy, "transcribe", params) is not None
+    print("✅ JSON stage round-trip")
+
+
+def test_file_stage_and_prune():
+    """File stages are copied into the cache and LRU entries are pruned by size"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnalysisCache(root=os.path.join(tmp, "cache"), max_bytes=10 * 1024 * 1024)
+        stems = {}
+        for name in ("vocals", "instrumental"):
+            stems[name] = os.path.join(tmp, f"{name}.wav")
+            with open(stems[name], "wb") as f:
+                f.write(os.urandom(4096))
+        songs = []
+        for i in range(3):
+            song = os.path.join(tmp, f"song{i}.wav")
+            with open(song, "wb") as f:
+                f.write(bytes([i]) * 1000)
+            songs.append(song)
+            stored = cache.put_files(song, "separate", {"model": "htdemucs"}, stems)
+            assert os.path.exists(stored["vocals"]) and os.path.exists(stored["instrumental"])
+        assert cache.get_files(songs[0], "separate", {"model": "htdemucs"}) is not None
+        assert len(cache.entries()) == 3
+
+        # Entry sizes can differ by a byte (created_at digits); the largest leaves exactly one
+        removed = cache.prune(max_bytes=max(e.size_bytes for e in cache.entries()))
+        assert len(removed) == 2
+        assert len(cache.entries()) == 1
+
+        assert cache_main(["--dir", str(cache.root), "stats"]) == 0
+        assert cache_main(["--dir", str(cache.root), "clear"]) == 0
+        assert cache.entries() == []
+    print("✅ File stage caching and pruning")
+
+
+def test_running_total_and_last_use_expiry():
+    """Writes keep a running size instead of rescanning; expiry and LRU share the last-use time"""
+    import json
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnalysisCache(root=os.path.join(tmp, "cache"), max_bytes=10 * 1024 * 1024, max_age=3600)
+        scans = []
+        entries = cache.entries
+        cache.entries = lambda: scans.append(1) or entries()
+        for i in range(20):
+            cache.put_json_by_hash(f"hash{i}", "chunk", {}, list(range(100)))
+        assert len(scans) == 1
+        assert cache._total_bytes == sum(e.size_bytes for e in entries())
+
+        # Over the limit: one full scan evicts down to it
+        size = max(e.size_bytes for e in entries())
+        cache.max_bytes = 5 * size + size // 2
+        cache.put_json_by_hash("hash-last", "chunk", {}, list(range(100)))
+        assert len(scans) == 2 and len(entries()) == 5
+
+        # Written long ago but used just now: still valid. Unused for longer than max_age: expired.
+        keep, stale = entries()[-1], entries()[0]
+        meta = Path(cache._entry_dir(keep.key)) / "meta.json"
+        data = json.loads(meta.read_text())
+        data["created_at"] = time.time() - 10 * 3600
+        meta.write_text(json.dumps(data))
+        old = time.time() - 2 * 3600
+        os.utime(Path(cache._entry_dir(stale.key)) / "meta.json", (old, old))
+        total = cache._total_bytes
+        assert cache.get_json_by_hash(keep.audio_hash, "chunk", {}) is not None
+        assert cache.get_json_by_hash(stale.audio_hash, "chunk", {}) is None
+        assert cache._total_bytes == total - stale.size_bytes
+    print("✅ Running total and last-use expiry")
+
+
+if __name__ == "__main__":
+    print("Testing analysis cache...")
+    print("=" * 50)
+
+    test_json_stage_roundtrip()
+    test_file_stage_and_prune()
+    test_running_total_and_last_use_expiry()
+
+    print("\n✅ All tests completed!")
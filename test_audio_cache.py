@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared decoded-audio cache
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.core.audio_cache import AudioCache
+
+
+def _write_tone(path: str, seconds: float = 1.0, sr: int = 44100) -> None:
+    t = np.arange(int(sr * seconds)) / sr
+    y = 0.2 * np.sin(2 * np.pi * 440.0 * t)
+    sf.write(path, np.stack([y, 0.5 * y], axis=1), sr)
+
+
+def test_cache_hits_and_read_only():
+    """Repeated loads return read-only views of the same decoded buffer"""
+    cache = AudioCache(max_bytes=64 * 1024 * 1024)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tone.wav")
+        _write_tone(path)
+        a, sr = cache.get(path)
+        b, _ = cache.get(path)
+        assert sr == 44100 and a.shape == (44100, 2)
+        assert np.shares_memory(a, b)
+        assert not a.flags.writeable
+        mono, _ = cache.get(path, mono=True)
+        assert mono.shape == (44100,)
+        assert np.allclose(mono, a.mean(axis=1))
+        resampled, rsr = cache.get(path, sr=16000, mono=True)
+        assert rsr == 16000 and abs(len(resampled) - 16000) <= 1
+        again, _ = cache.get(path, sr=16000, mono=True)
+        assert np.shares_memory(resampled, again)
+    print("✅ Cache hits return shared read-only views")
+
+
+def test_cache_invalidates_on_change_and_evicts():
+    """A modified file is decoded again, and the byte budget is enforced LRU-first"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tone.wav")
+        _write_tone(path, seconds=1.0)
+        one_file = 44100 * 2 * 4
+        cache = AudioCache(max_bytes=one_file + one_file // 2)
+        a, _ = cache.get(path)
+        _write_tone(path, seconds=0.5)
+        b, _ = cache.get(path)
+        assert a.shape[0] == 44100 and b.shape[0] == 22050
+        assert cache.nbytes <= cache.max_bytes
+        cache.set_max_bytes(0)
+        assert cache.nbytes == 0
+    print("✅ Cache invalidation and eviction")
+
+
+def test_concurrent_decodes_overlap_and_dedupe():
+    """Different files decode in parallel; concurrent loads of one file decode it once"""
+    import threading
+    import time
+    from song_editor.core import audio_cache
+
+    cache = AudioCache(max_bytes=64 * 1024 * 1024)
+    decoded = []
+    real_decode = audio_cache._decode
+
+    def slow_decode(path):
+        decoded.append(os.path.basename(path))
+        time.sleep(0.3)
+        return real_decode(path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"tone{i}.wav") for i in range(3)]
+        for path in paths:
+            _write_tone(path, seconds=0.2)
+        audio_cache._decode = slow_decode
+        try:
+            t0 = time.perf_counter()
+            threads = [threading.Thread(target=cache.get, args=(p,)) for p in paths + paths]
+            for th in threads:
+                th.start()
+            for th in threads:
+                th.join()
+            elapsed = time.perf_counter() - t0
+        finally:
+            audio_cache._decode = real_decode
+        assert sorted(decoded) == ["tone0.wav", "tone1.wav", "tone2.wav"]
+        assert elapsed < 0.8, elapsed
+    print("✅ Concurrent decodes")
+
+
+if __name__ == "__main__":
+    print("Testing audio cache...")
+    print("=" * 50)
+
+    test_cache_hits_and_read_only()
+    test_cache_invalidates_on_change_and_evicts()
+    test_concurrent_decodes_overlap_and_dedupe()
+
+    print("\n✅ All tests completed!")
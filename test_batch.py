@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test script for the headless batch CLI
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.batch import discover_audio_files, gemini_output_path, load_state, main as batch_main, run_gemini, STATE_FILE
+
+
+def _touch(path: str, payload: bytes = b"x") -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(payload)
+
+
+def test_discover_audio_files():
+    """Directories are searched recursively and globs are expanded, audio only"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _touch(os.path.join(tmp, "a.wav"))
+        _touch(os.path.join(tmp, "set1", "b.MP3"))
+        _touch(os.path.join(tmp, "set1", "notes.txt"))
+        _touch(os.path.join(tmp, "set2", "c.flac"))
+        found = discover_audio_files([tmp])
+        assert [os.path.basename(p) for p in found] == ["a.wav", "b.MP3", "c.flac"]
+        globbed = discover_audio_files([os.path.join(tmp, "set*", "*")])
+        assert [os.path.basename(p) for p in globbed] == ["b.MP3", "c.flac"]
+    print("✅ Audio discovery")
+
+
+def _seed_words(cache_dir: str, song: str, model_size: str = "small") -> None:
+    """Cache a transcription of the mix, as an earlier run with the transcribe stage would"""
+    from song_editor.core.analysis_cache import AnalysisCache
+    from song_editor.processing.transcriber import WhisperEngineConfig
+
+    params = {"model_size": model_size, "input": "mix", **WhisperEngineConfig.from_env().cache_params()}
+    words = [{"text": "Amazing", "start": 0.1, "end": 0.5, "confidence": 0.9}, {"text": "grace", "start": 0.6, "end": 0.9, "confidence": 0.8}]
+    AnalysisCache(root=cache_dir).put_json(song, "transcribe", params, words)
+
+
+def _seed_chords(cache_dir: str, song: str) -> None:
+    from song_editor.core.analysis_cache import AnalysisCache
+    from song_editor.processing.chords import ChordDetector
+
+    detector = ChordDetector()
+    params = {"hop_length": detector.hop_length, "sr": detector.sr, "input": "mix"}
+    AnalysisCache(root=cache_dir).put_json(song, "chords", params, [{"name": "G", "start": 0.0, "end": 1.0, "confidence": 0.9}])
+
+
+def test_batch_export_and_resume():
+    """Exports are written from cached results, recorded in the state file and skipped on the next run"""
+    with tempfile.TemporaryDirectory() as tmp:
+        song = os.path.join(tmp, "songs", "hymn.wav")
+        _touch(song)
+        out = os.path.join(tmp, "out")
+        cache_dir = os.path.join(tmp, "cache")
+        args = [song, "--stages", "export", "-j", "1", "-o", out, "--cache-dir", cache_dir]
+        state_path = os.path.join(out, STATE_FILE)
+
+        # Nothing to export yet: the file fails instead of getting empty outputs
+        assert batch_main(args) == 2
+        rec = load_state(state_path)[os.path.abspath(song)]
+        assert rec["status"] == "failed" and "transcribe" in rec["error"]
+        assert not os.path.exists(os.path.join(out, "hymn.cho"))
+
+        _seed_words(cache_dir, song)
+        assert batch_main(args) == 2
+        assert "chords" in load_state(state_path)[os.path.abspath(song)]["error"]
+
+        _seed_chords(cache_dir, song)
+        assert batch_main(args) == 0
+        for ext in (".song_data", ".cho", ".mid"):
+            assert os.path.exists(os.path.join(out, "hymn" + ext))
+        with open(os.path.join(out, "hymn.cho")) as f:
+            assert f.read() == "[G] Amazing grace\n"
+        rec = load_state(state_path)[os.path.abspath(song)]
+        assert (rec["status"], rec["words"], rec["chords"]) == ("ok", 2, 1)
+
+        assert batch_main(args) == 0
+        with open(state_path) as f:
+            assert len([json.loads(line) for line in f]) == 3
+
+        # A changed input is processed again (and has nothing cached yet)
+        _touch(song, b"changed")
+        assert batch_main(args) == 2
+        with open(state_path) as f:
+            assert len(f.readlines()) == 4
+    print("✅ Batch export and resume")
+
+
+def test_resume_needs_matching_stages_and_settings():
+    """A stage-subset run does not mark a file done for a full run, nor for another model"""
+    import numpy as np
+    import soundfile as sf
+
+    with tempfile.TemporaryDirectory() as tmp:
+        song = os.path.join(tmp, "songs", "hymn.wav")
+        os.makedirs(os.path.dirname(song))
+        sf.write(song, np.zeros(22050, dtype=np.float32), 22050)
+        out = os.path.join(tmp, "out")
+        common = [song, "-j", "1", "-o", out, "--cache-dir", os.path.join(tmp, "cache")]
+        state_path = os.path.join(out, STATE_FILE)
+        for model_size in ("small", "medium"):
+            _seed_words(os.path.join(tmp, "cache"), song, model_size)
+
+        assert batch_main(common + ["--stages", "chords"]) == 0
+        assert not os.path.exists(os.path.join(out, "hymn.cho"))
+
+        assert batch_main(common + ["--stages", "chords,export"]) == 0
+        for ext in (".song_data", ".cho", ".mid"):
+            assert os.path.exists(os.path.join(out, "hymn" + ext))
+        assert load_state(state_path)[os.path.abspath(song)]["stages"] == ["chords", "export"]
+
+        # A subset of what already ran is done; the same stages with another model are not
+        assert batch_main(common + ["--stages", "export"]) == 0
+        assert batch_main(common + ["--stages", "chords,export", "-m", "medium"]) == 0
+        with open(state_path) as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 3
+        assert records[-1]["settings"]["model"] == "medium"
+    print("✅ Resume checks stages and settings")
+
+
+def test_gemini_many_songs():
+    """Gemini analysis writes one .gemini.json per song and skips songs that have one"""
+    import numpy as np
+    import soundfile as sf
+    from test_gemini_client import StubGemini
+
+    obj = {"words": [{"text": "grace", "start_sec": 0.25, "end_sec": 0.5}], "chords": [{"symbol": "G", "start_sec": 0.0, "end_sec": 1.0}]}
+    env = {"GEMINI_API_KEY": "test-key", "SONG_EDITOR_GEMINI_CACHE": "0"}
+    saved = {k: os.environ.get(k) for k in (*env, "GEMINI_API_BASE")}
+    with tempfile.TemporaryDirectory() as tmp, StubGemini(handler=lambda req: (200, {}, StubGemini.reply(json.dumps(obj)))) as stub:
+        os.environ.update(env, GEMINI_API_BASE=stub.base_url)
+        try:
+            songs = []
+            for n in range(3):
+                songs.append(os.path.join(tmp, f"song{n}.wav"))
+                sf.write(songs[-1], np.zeros(8000 * 2, dtype=np.float32), 8000)
+            out = os.path.join(tmp, "out")
+            assert run_gemini(songs, out, concurrency=2) == 0
+            for song in songs:
+                with open(gemini_output_path(song, out)) as f:
+                    assert [w["text"] for w in json.load(f)["words"]] == ["grace"]
+            sent = len(stub.requests)
+            assert run_gemini(songs, out, concurrency=2) == 0 and len(stub.requests) == sent
+        finally:
+            for k, v in saved.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+    print("✅ Gemini batch analysis")
+
+
+if __name__ == "__main__":
+    print("Testing batch CLI...")
+    print("=" * 50)
+
+    test_discover_audio_files()
+    test_batch_export_and_resume()
+    test_resume_needs_matching_stages_and_settings()
+    test_gemini_many_songs()
+
+    print("\n✅ All tests completed!")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for parallel chunked transcription
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.processing import chunked
+from song_editor.processing.chunked import merge_chunk_words, plan_chunks, transcribe_chunked_audio
+from song_editor.processing.transcriber import Word
+
+
+def test_chunks_cut_at_silence():
+    """Cuts land in quiet gaps near the target length and chunks overlap"""
+    sr = 1000
+    audio = np.ones(400 * sr, dtype=np.float32)
+    audio[int(113 * sr):int(114 * sr)] = 0.0  # quiet gap near the first 120 s target
+    audio[int(236 * sr):int(237 * sr)] = 0.0
+    chunks = plan_chunks(audio, sr, chunk_seconds=120.0, search_seconds=10.0, overlap_seconds=1.0)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(audio)
+    first_cut = chunks[0][1] - sr
+    assert 113 * sr <= first_cut <= 114 * sr
+    assert chunks[1][0] == first_cut - sr
+    second_cut = chunks[1][1] - sr
+    assert 236 * sr <= second_cut <= 237 * sr
+    assert plan_chunks(audio[: 60 * sr], sr) == [(0, 60 * sr)]
+    print("✅ Chunks cut at silence")
+
+
+def test_overlap_words_deduplicated():
+    """Words heard by both neighbouring chunks appear once, the more confident copy wins"""
+    left = [Word("amazing", 10.0, 10.5, 0.9), Word("grace", 10.6, 11.0, 0.5), Word("ho", 11.1, 11.3, 0.2)]
+    right = [Word("Grace,", 10.62, 11.0, 0.8), Word("how", 11.1, 11.4, 0.9), Word("sweet", 11.5, 11.9, 0.9)]
+    merged = merge_chunk_words([left, right])
+    assert [(w.text, w.confidence) for w in merged] == [("amazing", 0.9), ("Grace,", 0.8), ("how", 0.9), ("sweet", 0.9)]
+    print("✅ Overlap words deduplicated")
+
+
+def test_chunks_offset_and_ordered():
+    """Chunk word times are shifted to absolute time and stitched in order"""
+    sr = 1000
+    audio = np.ones(300 * sr, dtype=np.float32)
+
+    def fake_transcribe(self, chunk, chunk_sr, model_size="small", on_words=None):
+        return [Word(f"w{len(chunk)}", 1.0, 1.5, 0.9)]
+
+    with mock.patch.object(chunked.Transcriber, "transcribe_audio", fake_transcribe), ThreadPoolExecutor(2) as pool:
+        words = transcribe_chunked_audio(audio, sr, "tiny", executor=pool, chunk_seconds=100.0)
+    starts = [w.start for w in words]
+    assert starts == sorted(starts) and len(words) == len(plan_chunks(audio, sr, chunk_seconds=100.0))
+    assert starts[0] == 1.0 and starts[1] > 90.0
+    print("✅ Chunk offsets and ordering")
+
+
+if __name__ == "__main__":
+    print("Testing chunked transcription...")
+    print("=" * 50)
+
+    test_chunks_cut_at_silence()
+    test_overlap_words_deduplicated()
+    test_chunks_offset_and_ordered()
+
+    print("\n✅ All tests completed!")
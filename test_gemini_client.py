@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Test script for the Gemini client's HTTP session, retries and metrics against a local stub server
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.services.gemini_cache import GeminiCache
+from song_editor.services.gemini_client import GeminiClient, RetryPolicy, TokenBucket
+
+
+class StubGemini:
+    """Local generateContent endpoint that replays a scripted list of (status, headers, body)"""
+
+    def __init__(self, script=(), handler=None):
+        self.script = list(script)
+        self.handler = handler
+        self.requests = []
+        self.client_ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))
+                with stub.lock:
+                    stub.requests.append((self.path, request))
+                    stub.client_ports.add(self.client_address[1])
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    scripted = stub.script.pop(0) if stub.script else None
+                try:
+                    if scripted is not None:
+                        status, headers, body = scripted
+                    elif stub.handler is not None:
+                        status, headers, body = stub.handler(request)
+                    else:
+                        status, headers, body = 200, {}, stub.reply("[]")
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @staticmethod
+    def reply(text):
+        return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1beta"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _client(stub, **retry):
+    client = GeminiClient(retry=RetryPolicy(base_delay=0.01, max_delay=0.05, **retry), base_url=stub.base_url)
+    client.api_key = "test-key"
+    client.cache = None
+    return client
+
+
+def test_retries_429_and_503_then_succeeds():
+    """429 (honouring Retry-After) and 503 are retried; metrics record attempts"""
+    words = json.dumps([{"text": "grace", "confidence": 0.9}])
+    script = [
+        (429, {"Retry-After": "0"}, {"error": {"status": "RESOURCE_EXHAUSTED"}}),
+        (503, {}, {"error": {"status": "UNAVAILABLE"}}),
+        (200, {}, StubGemini.reply(words)),
+    ]
+    with StubGemini(script) as stub:
+        client = _client(stub)
+        items = client.rewrite_lyrics("grace")
+        assert [(w.text, w.confidence) for w in items] == [("grace", 0.9)]
+        assert len(stub.requests) == 3
+        assert stub.requests[0][0].startswith("/v1beta/models/gemini-2.5-flash:generateContent?key=test-key")
+        timing = client.metrics[-1]
+        assert timing.label == "rewrite_lyrics" and timing.status == 200 and timing.attempts == 3
+        summary = client.metrics_summary()["rewrite_lyrics"]
+        assert summary["requests"] == 1 and summary["retries"] == 2
+    print("✅ Retries on 429/503")
+
+
+def test_gives_up_and_reuses_connection():
+    """Retries stop at max_retries, and sequential requests share one keep-alive connection"""
+    unavailable = (503, {}, {"error": {"status": "UNAVAILABLE"}})
+    with StubGemini([unavailable] * 3) as stub:
+        client = _client(stub, max_retries=2)
+        res = client._post_audio_payload("AAAA", "prompt")
+        assert res["status"] == 503 and client._is_unavailable(res)
+        assert len(stub.requests) == 3
+        for _ in range(3):
+            client.rewrite_lyrics("again")
+        assert len(stub.requests) == 6
+        assert len(stub.client_ports) == 1
+    print("✅ Gives up after max retries; connection reused")
+
+
+def test_backoff_delays():
+    """Exponential growth, capped, jittered downwards; Retry-After wins"""
+    policy = RetryPolicy(base_delay=1.0, multiplier=2.0, max_delay=5.0, jitter=0.5)
+    for attempt, full in enumerate([1.0, 2.0, 4.0, 5.0, 5.0]):
+        d = policy.delay(attempt)
+        assert full * 0.5 <= d <= full
+    assert policy.delay(0, retry_after=3.0) == 3.0
+    assert policy.delay(0, retry_after=60.0) == 5.0
+    print("✅ Backoff delays")
+
+
+def test_concurrent_chunks_ordered_with_independent_retry():
+    """Chunks upload concurrently, a failing chunk is retried alone, results stitch in order"""
+    failed_once = set()
+
+    def handler(request):
+        prompt = request["contents"][0]["parts"][1]["text"]
+        idx = int(re.search(r"chunk (\d+)/", prompt).group(1))
+        time.sleep(0.05 * (6 - idx))  # later chunks finish first
+        if idx == 2 and idx not in failed_once:
+            failed_once.add(idx)
+            return 503, {}, {"error": {"status": "UNAVAILABLE"}}
+        obj = {
+            "words": [{"text": f"w{idx}", "start_sec": 0.25, "end_sec": 0.5}],
+            "chords": [{"symbol": f"C{idx}", "start_sec": 0.0, "end_sec": 1.0}],
+        }
+        return 200, {}, StubGemini.reply(json.dumps(obj))
+
+    with tempfile.TemporaryDirectory() as tmp, StubGemini(handler=handler) as stub:
+        path = os.path.join(tmp, "song.wav")
+        sf.write(path, np.zeros(8000 * 5, dtype=np.float32), 8000)
+        client = _client(stub, max_retries=0)
+        words, chords = client.analyze_audio_alt_chunked(
+            path, chunk_seconds=1, sleep_between=0, max_in_flight=3, requests_per_minute=6000, overlap_seconds=0
+        )
+        assert [w.text for w in words] == ["w1", "w2", "w3", "w4", "w5"]
+        assert all(abs(w.start - (i + 0.25)) < 0.15 for i, w in enumerate(words))
+        assert [c.symbol for c in chords] == ["C1", "C2", "C3", "C4", "C5"]
+        assert len(stub.requests) == 6
+        assert 1 < stub.max_in_flight <= 3
+    print("✅ Concurrent chunk uploads")
+
+
+def test_token_bucket_paces_requests():
+    """After the initial burst, acquisitions are spaced by 1 / rate"""
+    bucket = TokenBucket(rate=50.0, capacity=2)
+    t0 = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    elapsed = time.monotonic() - t0
+    assert 0.05 <= elapsed < 0.5
+    print("✅ Token bucket pacing")
+
+
+def test_response_cache_skips_network():
+    """Repeated chunk and lyric requests are served from the cache until the TTL expires"""
+    def handler(request):
+        prompt = request["contents"][0]["parts"][-1]["text"]
+        if "chunk" not in prompt:
+            return 200, {}, StubGemini.reply(json.dumps([{"text": "grace", "confidence": 0.9}]))
+        idx = int(re.search(r"chunk (\d+)/", prompt).group(1))
+        obj = {"words": [{"text": f"w{idx}", "start_sec": 0.5, "end_sec": 0.75}], "chords": [{"symbol": "G", "start_sec": 0.0, "end_sec": 1.0}]}
+        return 200, {}, StubGemini.reply(json.dumps(obj))
+
+    with tempfile.TemporaryDirectory() as tmp, StubGemini(handler=handler) as stub:
+        path = os.path.join(tmp, "song.wav")
+        sf.write(path, np.random.default_rng(1).standard_normal(8000 * 3).astype(np.float32) * 0.1, 8000)
+        client = _client(stub)
+        client.cache = GeminiCache(root=os.path.join(tmp, "cache"), ttl_days=1, max_mb=10)
+
+        first = client.analyze_audio_alt_chunked(path, chunk_seconds=1, sleep_between=0, overlap_seconds=0)
+        assert len(stub.requests) == 3
+        again = client.analyze_audio_alt_chunked(path, chunk_seconds=1, sleep_between=0, max_in_flight=2, overlap_seconds=0)
+        assert len(stub.requests) == 3 and again == first
+        assert [w.text for w in again[0]] == ["w1", "w2", "w3"]
+
+        assert [w.text for w in client.rewrite_lyrics("grace")] == ["grace"]
+        assert [w.text for w in client.rewrite_lyrics("grace")] == ["grace"]
+        assert len(stub.requests) == 4
+
+        # A different model is a different key
+        client.model_name = "gemini-2.5-pro"
+        client.rewrite_lyrics("grace")
+        assert len(stub.requests) == 5
+
+        # Expired entries are misses
+        client.model_name = "gemini-2.5-flash"
+        client.cache.store.max_age = 0.0
+        time.sleep(0.01)
+        client.rewrite_lyrics("grace")
+        assert len(stub.requests) == 6
+    print("✅ Response cache")
+
+
+def test_streamed_chunks_downsampled():
+    """Chunks are read lazily from disk, encoded ahead of the uploads and can be sent at 16 kHz mono"""
+    import base64
+    import io
+    from song_editor.core.chunking import LazyAudioReader
+
+    payloads = []
+
+    def handler(request):
+        parts = request["contents"][0]["parts"]
+        idx = int(re.search(r"chunk (\d+)/", parts[1]["text"]).group(1))
+        payloads.append((idx, base64.b64decode(parts[0]["inline_data"]["data"])))
+        obj = {"words": [{"text": f"w{idx}", "start_sec": 0.5, "end_sec": 0.75}], "chords": [{"symbol": "G", "start_sec": 0.0, "end_sec": 1.0}]}
+        return 200, {}, StubGemini.reply(json.dumps(obj))
+
+    with tempfile.TemporaryDirectory() as tmp, StubGemini(handler=handler) as stub:
+        path = os.path.join(tmp, "song.wav")
+        rng = np.random.default_rng(2)
+        sf.write(path, rng.standard_normal((44100 * 4, 2)).astype(np.float32) * 0.1, 44100)
+
+        reader = LazyAudioReader(path, target_sr=16000)
+        assert (reader.sr, reader.out_sr, reader.frames) == (44100, 16000, 44100 * 4)
+        piece = reader.read(44100, 2 * 44100)
+        assert piece.ndim == 1 and abs(len(piece) - 16000) <= 1
+
+        client = _client(stub)
+        native = client.analyze_audio_alt_chunked(path, chunk_seconds=1, sleep_between=0, overlap_seconds=0)
+        native_sizes = [len(b) for _, b in sorted(payloads)]
+        payloads.clear()
+        small = client.analyze_audio_alt_chunked(path, chunk_seconds=1, sleep_between=0, max_in_flight=2, overlap_seconds=0, downsample=True)
+        assert [w.text for w in small[0]] == [w.text for w in native[0]] == ["w1", "w2", "w3", "w4"]
+        assert [w.start for w in small[0]] == [w.start for w in native[0]]
+        for (_, data), size in zip(sorted(payloads), native_sizes):
+            info = sf.info(io.BytesIO(data))
+            assert (info.samplerate, info.channels) == (16000, 1)
+            assert len(data) < size / 2
+    print("✅ Streamed, downsampled chunk uploads")
+
+
+def test_async_client_matches_sync_and_bounds_concurrency():
+    """Several songs analysed on one event loop give the sync results with a shared request limit"""
+    import asyncio
+    from song_editor.services.gemini_async import AsyncGeminiClient
+
+    def handler(request):
+        prompt = request["contents"][0]["parts"][1]["text"]
+        idx = int(re.search(r"chunk (\d+)/", prompt).group(1))
+        time.sleep(0.05)
+        obj = {"words": [{"text": f"w{idx}", "start_sec": 0.25, "end_sec": 0.5}], "chords": [{"symbol": f"C{idx}", "start_sec": 0.0, "end_sec": 1.0}]}
+        return 200, {}, StubGemini.reply(json.dumps(obj))
+
+    with tempfile.TemporaryDirectory() as tmp, StubGemini(handler=handler) as stub:
+        paths = []
+        for n in range(3):
+            path = os.path.join(tmp, f"song{n}.wav")
+            sf.write(path, np.zeros(8000 * (n + 2), dtype=np.float32), 8000)
+            paths.append(path)
+        client = _client(stub)
+        expected = {p: client.analyze_audio_alt_chunked(p, chunk_seconds=1, sleep_between=0, overlap_seconds=0) for p in paths}
+        sent = len(stub.requests)
+        stub.max_in_flight = 0
+
+        async_client = AsyncGeminiClient(client, max_concurrency=3)
+        results = asyncio.run(async_client.analyze_many(paths, chunk_seconds=1, overlap_seconds=0))
+        for p in paths:
+            words, chords, _, _ = results[p]
+            assert (words, chords) == expected[p]
+        assert len(stub.requests) == 2 * sent
+        assert 1 < stub.max_in_flight <= 3
+
+        single = asyncio.run(AsyncGeminiClient(client).analyze_audio_alt_chunked(paths[0], chunk_seconds=1, overlap_seconds=0))
+        assert single == expected[paths[0]]
+
+        # One rate limit across songs: 9 chunks at 2/s after a burst of 3 take >= 3 s
+        # (per-song limits would allow each song's chunks within its own burst)
+        client.cache = None
+        t0 = time.perf_counter()
+        asyncio.run(AsyncGeminiClient(client, max_concurrency=3).analyze_many(paths, chunk_seconds=1, overlap_seconds=0, requests_per_minute=120))
+        assert time.perf_counter() - t0 >= 2.9
+    print("✅ Async client")
+
+
+def test_sync_and_async_share_chunk_retries():
+    """A chunk that keeps failing is retried and skipped the same way by both clients"""
+    import asyncio
+    from song_editor.services.gemini_async import AsyncGeminiClient
+
+    def handler(request):
+        prompt = request["contents"][0]["parts"][1]["text"]
+        idx = int(re.search(r"chunk (\d+)/", prompt).group(1))
+        if idx == 2:
+            return 503, {}, {"error": {"status": "UNAVAILABLE"}}
+        obj = {"words": [{"text": f"w{idx}", "start_sec": 0.25, "end_sec": 0.5}], "chords": [{"symbol": f"C{idx}", "start_sec": 0.0, "end_sec": 1.0}]}
+        return 200, {}, StubGemini.reply(json.dumps(obj))
+
+    with tempfile.TemporaryDirectory() as tmp, StubGemini(handler=handler) as stub:
+        path = os.path.join(tmp, "song.wav")
+        sf.write(path, np.zeros(8000 * 3, dtype=np.float32), 8000)
+        client = _client(stub, max_retries=0)
+        expected = client.analyze_audio_alt_chunked(path, chunk_seconds=1, sleep_between=0, max_in_flight=2, chunk_retries=2, overlap_seconds=0)
+        sync_log = [line for line in client.last_debug.splitlines() if line.startswith(("Chunk", "Skipping"))]
+        sent = len(stub.requests)
+
+        async_client = AsyncGeminiClient(client, max_concurrency=2)
+        result = asyncio.run(async_client.analyze_audio_alt_chunked(path, chunk_seconds=1, chunk_retries=2, overlap_seconds=0))
+        async_log = [line for line in async_client.last_debug.splitlines() if line.startswith(("Chunk", "Skipping"))]
+
+        assert [w.text for w in expected[0]] == ["w1", "w3"]
+        assert result == expected
+        assert sent == 2 + 3 and len(stub.requests) == 2 * sent
+        assert sync_log == async_log
+        assert sync_log[-1] == "Skipping chunk 2/3" and len(sync_log) == 7
+        assert sync_log[:2] == ["Chunk 2/3: HTTP 503 UNAVAILABLE", "Chunk 2/3 failed (attempt 1/3)"]
+    print("✅ Shared chunk retries")
+
+
+def test_sequential_chunks_log_actual_failure():
+    """Skipped chunks are logged with their HTTP status or parse error, not as UNAVAILABLE"""
+
+    def handler(request):
+        prompt = request["contents"][0]["parts"][1]["text"]
+        idx = int(re.search(r"chunk (\d+)/", prompt).group(1))
+        if idx == 1:
+            return 400, {}, {"error": {"code": 400, "status": "INVALID_ARGUMENT", "message": "Request payload size exceeds the limit"}}
+        if idx == 2:
+            return 200, {}, StubGemini.reply("not json")
+        obj = {"words": [{"text": "w3", "start_sec": 0.25, "end_sec": 0.5}], "chords": [{"symbol": "C3", "start_sec": 0.0, "end_sec": 1.0}]}
+        return 200, {}, StubGemini.reply(json.dumps(obj))
+
+    with tempfile.TemporaryDirectory() as tmp, StubGemini(handler=handler) as stub:
+        path = os.path.join(tmp, "song.wav")
+        sf.write(path, np.zeros(8000 * 3, dtype=np.float32), 8000)
+        client = _client(stub, max_retries=0)
+        words, _ = client.analyze_audio_alt_chunked(path, chunk_seconds=1, sleep_between=0, max_in_flight=1, overlap_seconds=0)
+        assert [w.text for w in words] == ["w3"]
+        log = client.last_debug.splitlines()
+        assert "Chunk 1/3: HTTP 400 INVALID_ARGUMENT Request payload size exceeds the limit" in log
+        assert any(line.startswith("Chunk 2/3: JSON parse err") for line in log)
+        assert "Skipping chunk 1/3" in log and "Skipping chunk 2/3" in log
+        assert "UNAVAILABLE" not in client.last_debug
+
+        # No response at all: the connection error is logged
+        client.base_url = "http://127.0.0.1:9/v1beta"
+        client.analyze_audio_alt_chunked(path, chunk_seconds=3, sleep_between=0, max_in_flight=1, overlap_seconds=0)
+        assert client.last_debug.startswith("Chunk 1/1: request failed (ConnectionError")
+    print("✅ Chunk failures logged")
+
+
+def test_overlapping_windows_deduplicated():
+    """Words heard by two overlapping chunks are kept once, from the chunk that owns them"""
+    from song_editor.services.gemini_client import AltChordTimed, AltWordTimed, stitch_chunk_results
+
+    def pairs(items):
+        return [AltWordTimed(t, s, e) for t, s, e in items], [AltChordTimed("G", s, e) for _, s, e in items], []
+
+    left = pairs([("amazing", 8.0, 8.6), ("grace", 9.2, 9.8), ("how", 10.4, 10.7)])
+    right = pairs([("Grace!", 9.25, 9.8), ("how", 10.42, 10.7), ("sweet", 11.0, 11.5)])
+    words, chords = stitch_chunk_results([left, right], [0.0, 10.0, 20.0])
+    assert [w.text for w in words] == ["amazing", "grace", "how", "sweet"]
+    # "grace" lies in the left chunk's range, "how" in the right one's
+    assert words[1].start == 9.2 and words[2].start == 10.42
+    assert len(chords) == len(words)
+    print("✅ Overlap de-duplication")
+
+
+if __name__ == "__main__":
+    print("Testing Gemini client transport...")
+    print("=" * 50)
+
+    test_retries_429_and_503_then_succeeds()
+    test_gives_up_and_reuses_connection()
+    test_backoff_delays()
+    test_concurrent_chunks_ordered_with_independent_retry()
+    test_token_bucket_paces_requests()
+    test_response_cache_skips_network()
+    test_streamed_chunks_downsampled()
+    test_async_client_matches_sync_and_bounds_concurrency()
+    test_sync_and_async_share_chunk_retries()
+    test_sequential_chunks_log_actual_failure()
+    test_overlapping_windows_deduplicated()
+
+    print("\n✅ All tests completed!")
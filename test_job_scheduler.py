@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test script for the background job scheduler
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from song_editor.ui.async_runner import AsyncRunner
+from song_editor.ui.job_scheduler import JobScheduler
+
+
+def _app():
+    return QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+
+def _run_until_finished(scheduler: JobScheduler, timeout_ms: int = 5000) -> dict:
+    loop = QEventLoop()
+    result = {}
+
+    def done(timings):
+        result.update(timings)
+        loop.quit()
+
+    scheduler.all_finished.connect(done)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    scheduler.start()
+    loop.exec()
+    return result
+
+
+def test_dependencies_and_concurrency():
+    """Dependents start after their dependency and independent jobs overlap"""
+    _app()
+    scheduler = JobScheduler()
+    running = []
+    overlap = threading.Event()
+    lock = threading.Lock()
+
+    def stage(name, value):
+        def fn(ctx):
+            with lock:
+                running.append(name)
+                if len(running) > 1:
+                    overlap.set()
+            time.sleep(0.2)
+            with lock:
+                running.remove(name)
+            return value
+        return fn
+
+    scheduler.add("separate", lambda ctx: ("voc.wav", "inst.wav"))
+    scheduler.add("transcribe", lambda ctx: stage("transcribe", ctx.results["separate"][0])(ctx), ["separate"])
+    scheduler.add("chords", lambda ctx: stage("chords", ctx.results["separate"][1])(ctx), ["separate"])
+    finished = []
+    scheduler.job_finished.connect(lambda name, result, secs: finished.append(name))
+
+    timings = _run_until_finished(scheduler)
+
+    assert finished[0] == "separate"
+    assert set(finished) == {"separate", "transcribe", "chords"}
+    assert scheduler.results["transcribe"] == "voc.wav"
+    assert scheduler.results["chords"] == "inst.wav"
+    assert set(timings) == {"separate", "transcribe", "chords"}
+    assert overlap.is_set(), "transcribe and chords should run concurrently"
+    print("✅ Dependencies respected and independent stages overlap")
+
+
+def test_failure_and_cancellation():
+    """A failed dependency cancels its dependents; cancel() stops cooperative jobs"""
+    _app()
+    scheduler = JobScheduler()
+    scheduler.add("separate", lambda ctx: 1 / 0)
+    scheduler.add("transcribe", lambda ctx: "never", ["separate"])
+    failed, cancelled = [], []
+    scheduler.job_failed.connect(lambda name, err: failed.append(name))
+    scheduler.job_cancelled.connect(cancelled.append)
+    _run_until_finished(scheduler)
+    assert failed == ["separate"] and cancelled == ["transcribe"]
+
+    scheduler = JobScheduler()
+
+    def slow(ctx):
+        for _ in range(100):
+            ctx.check()
+            time.sleep(0.01)
+        return "finished"
+
+    scheduler.add("slow", slow)
+    scheduler.add("after", lambda ctx: "never", ["slow"])
+    QTimer.singleShot(50, scheduler.cancel)
+    _run_until_finished(scheduler)
+    assert "slow" not in scheduler.results
+    assert scheduler.jobs["after"].state == "cancelled"
+    print("✅ Failure propagation and cancellation")
+
+
+def test_async_runner_callbacks_on_gui_thread():
+    """Coroutines share one loop thread; results and errors come back on the owning thread"""
+    import asyncio
+
+    _app()
+    runner = AsyncRunner()
+    main_thread = threading.get_ident()
+    loop = QEventLoop()
+    seen = []
+
+    async def work(value):
+        await asyncio.sleep(0.05)
+        if value is None:
+            raise ValueError("boom")
+        return value, threading.get_ident()
+
+    def done(result):
+        seen.append((result[0], result[1], threading.get_ident()))
+        if len(seen) == 3:
+            loop.quit()
+
+    def failed(exc):
+        seen.append(("error", str(exc), threading.get_ident()))
+        if len(seen) == 3:
+            loop.quit()
+
+    runner.submit(work(1), done, failed)
+    runner.submit(work(2), done, failed)
+    runner.submit(work(None), done, failed)
+    QTimer.singleShot(5000, loop.quit)
+    loop.exec()
+    runner.shutdown()
+
+    assert sorted(str(s[0]) for s in seen) == ["1", "2", "error"]
+    assert all(s[2] == main_thread for s in seen)
+    loop_threads = {s[1] for s in seen if s[0] != "error"}
+    assert len(loop_threads) == 1 and main_thread not in loop_threads
+    print("✅ Async runner")
+
+
+if __name__ == "__main__":
+    print("Testing job scheduler...")
+    print("=" * 50)
+
+    test_dependencies_and_concurrency()
+    test_failure_and_cancellation()
+    test_async_runner_callbacks_on_gui_thread()
+
+    print("\n✅ All tests completed!")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for loading a new song while background processing is still running
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+from song_editor.processing.chords import DetectedChord
+from song_editor.processing.transcriber import Transcriber, WhisperEngineConfig, WhisperModelPool
+from song_editor.ui.main_window import MainWindow
+
+
+class BlockingDetector:
+    """Chord detector that holds its job until released, then reports a stale chord"""
+
+    hop_length = 512
+    sr = 22050
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def detect(self, path):
+        self.started.set()
+        self.release.wait(10)
+        return [DetectedChord("F#", 0.0, 5.0, 0.9)]
+
+
+def _song_data(audio_path: str) -> None:
+    data = {
+        "metadata": {"version": "2.0.0", "created_at": "2024-08-15T14:30:00Z", "source_audio": audio_path},
+        "words": [
+            {"text": "Hello", "start": 0.5, "end": 0.8, "confidence": 0.95},
+            {"text": "world", "start": 0.8, "end": 1.2, "confidence": 0.92},
+        ],
+        "chords": [
+            {"symbol": "C", "root": "C", "quality": "maj", "bass": None, "start": 0.0, "end": 0.8, "confidence": 0.88},
+            {"symbol": "Am", "root": "A", "quality": "min", "bass": None, "start": 0.8, "end": 1.2, "confidence": 0.85},
+        ],
+    }
+    Path(audio_path).with_suffix(".song_data").write_text(json.dumps(data))
+
+
+def test_sidecar_load_cancels_running_analysis():
+    """Opening a song with a .song_data file stops the previous run and drops its stems"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = MainWindow()
+    window.analysis_cache = None
+    detector = BlockingDetector()
+    window.chord_detector = detector
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old, new = os.path.join(tmp, "old.wav"), os.path.join(tmp, "new.wav")
+        for path in (old, new):
+            sf.write(path, np.zeros(22050, dtype=np.float32), 22050)
+        _song_data(new)
+
+        window.audio_path = old
+        window.vocals_path, window.instrumental_path = os.path.join(tmp, "v.wav"), os.path.join(tmp, "i.wav")
+        window.start_analysis(("chords",))
+        scheduler = window._analysis
+        assert scheduler is not None and detector.started.wait(5)
+
+        window.load_audio_from_path(new)
+        assert window._analysis is None
+        assert scheduler.is_cancelled
+        assert window.vocals_path is None and window.instrumental_path is None
+        assert [c.name for c in window.detected_chords] == ["C", "Am"]
+
+        # The old run finishes afterwards; its chords must not replace the imported ones
+        loop = QEventLoop()
+        scheduler.all_finished.connect(lambda timings: loop.quit())
+        QTimer.singleShot(5000, loop.quit)
+        detector.release.set()
+        loop.exec()
+        app.processEvents()
+        assert [c.name for c in window.detected_chords] == ["C", "Am"]
+        assert [r.chord for r in window.words_model.rows()] == ["C", "Am"]
+
+    window.prepare_shutdown()
+    print("✅ Sidecar load cancels running analysis")
+
+
+def test_idle_models_swept_without_further_use():
+    """A Whisper model left idle is freed by the window's sweep, not only at the next transcription"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = MainWindow()
+    pool = WhisperModelPool(idle_seconds=0.05, loader=lambda size, config: object())
+    window.transcriber = Transcriber(pool=pool)
+    with pool.lease("tiny", WhisperEngineConfig()):
+        pass
+    assert pool.loaded() == ["tiny"]
+
+    window._model_sweep.setInterval(20)
+    loop = QEventLoop()
+    QTimer.singleShot(300, loop.quit)
+    loop.exec()
+    app.processEvents()
+    assert pool.loaded() == []
+
+    window.prepare_shutdown()
+    print("✅ Idle Whisper models swept")
+
+
+if __name__ == "__main__":
+    print("Testing main window loading...")
+    print("=" * 50)
+
+    test_sidecar_load_cancels_running_analysis()
+    test_idle_models_swept_without_further_use()
+
+    print("\n✅ All tests completed!")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for running transcription and chord detection in parallel worker processes
+"""
+
+import os
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.core.analysis_cache import AnalysisCache
+from song_editor.processing import pipeline
+from song_editor.processing.chords import ChordDetector, DetectedChord
+from song_editor.processing.transcriber import Word
+
+
+def test_parallel_stages_and_join():
+    """Both stages run in worker processes and the join annotates words with chords"""
+    with tempfile.TemporaryDirectory() as tmp:
+        song = os.path.join(tmp, "song.wav")
+        with open(song, "wb") as f:
+            f.write(b"not really audio")
+        cache = AnalysisCache(root=os.path.join(tmp, "cache"))
+        words = [Word("Amazing", 0.0, 0.8, 0.9), Word("grace", 1.0, 1.6, 0.8)]
+        chords = [DetectedChord("G", 0.0, 0.9, 0.7), DetectedChord("C", 0.9, 2.0, 0.6)]
+        detector = ChordDetector()
+        # Seed the cache so the workers exercise the process round trip without models
+        cache.put_json(song, "transcribe", {"model_size": "tiny", "input": "mix"}, [asdict(w) for w in words])
+        cache.put_json(song, "chords", {"hop_length": detector.hop_length, "sr": detector.sr, "input": "mix"}, [asdict(c) for c in chords])
+
+        try:
+            got_words, words_hit, got_chords, chords_hit = pipeline.run_transcription_and_chords(
+                song, None, None, "tiny", cache.root
+            )
+        finally:
+            pipeline.shutdown_stage_pool()
+        assert got_words == words and got_chords == chords
+        assert words_hit and chords_hit
+
+        rows = pipeline.join_words_and_chords(got_words, got_chords)
+        assert [(r.text, r.chord) for r in rows] == [("Amazing", "G"), ("grace", "C")]
+    print("✅ Parallel transcription/chords and join")
+
+
+if __name__ == "__main__":
+    print("Testing parallel pipeline stages...")
+    print("=" * 50)
+
+    test_parallel_stages_and_join()
+
+    print("\n✅ All tests completed!")
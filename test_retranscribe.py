@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for re-transcribing a time range and splicing it into the word list
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.models.lyrics import WordRow
+from song_editor.models.timeline import WordTimeline
+from song_editor.processing import pipeline
+from song_editor.processing.transcriber import Word
+
+
+class _SliceTranscriber:
+    """Returns two words per call, timed relative to the slice it was given"""
+
+    def __init__(self):
+        self.durations = []
+
+    def transcribe_audio(self, audio, sr, model_size="small", on_words=None):
+        self.durations.append(len(audio) / sr)
+        return [Word("new", 0.6, 1.0, 0.7), Word("edge", len(audio) / sr - 0.2, len(audio) / sr, 0.4)]
+
+
+def test_retranscribe_range_only_decodes_slice():
+    """Only the padded range is decoded and words come back in absolute time"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vocals.wav")
+        sf.write(path, np.zeros(60 * 16000, dtype=np.float32), 16000)
+        transcriber = _SliceTranscriber()
+        words = pipeline.retranscribe_range(path, 20.0, 25.0, transcriber, "tiny", pad=0.5)
+        assert abs(transcriber.durations[0] - 6.0) < 1e-3
+        # The word in the trailing padding is dropped
+        assert [(w.text, round(w.start, 2)) for w in words] == [("new", 20.1)]
+    print("✅ Range re-transcription")
+
+
+def test_splice_keeps_rows_outside_range():
+    """Rows outside [t0, t1] (and manual edits, when asked) survive the splice"""
+    rows = [
+        WordRow("amazing", 1.0, 1.5, 1.0),
+        WordRow("grace", 2.0, 2.4, 0.3),
+        WordRow("how", 3.0, 3.2, 1.0),
+        WordRow("sweat", 3.5, 3.9, 0.2),
+        WordRow("the", 5.0, 5.2, 1.0),
+    ]
+    new_rows = [WordRow("grace", 2.05, 2.4, 0.9), WordRow("HOW", 3.0, 3.2, 0.8), WordRow("sweet", 3.5, 3.9, 0.9)]
+
+    first, count, replacement = pipeline.splice_rows(rows, new_rows, 1.8, 4.0)
+    assert (first, count) == (1, 3)
+    assert [r.text for r in replacement] == ["grace", "HOW", "sweet"]
+
+    first, count, replacement = pipeline.splice_rows(rows, new_rows, 1.8, 4.0, keep_manual=True)
+    assert [r.text for r in replacement] == ["grace", "how", "sweet"]
+    rows[first:first + count] = replacement
+    assert [r.text for r in rows] == ["amazing", "grace", "how", "sweet", "the"]
+    print("✅ Splice keeps rows outside the range")
+
+
+def test_splice_into_timeline():
+    """A WordTimeline splices like a list; kept manual edits are copied out of its columns"""
+    rows = [
+        WordRow("amazing", 1.0, 1.5, 1.0),
+        WordRow("grace", 2.0, 2.4, 0.3),
+        WordRow("how", 3.0, 3.2, 1.0, chord="G"),
+        WordRow("sweat", 3.5, 3.9, 0.2),
+        WordRow("the", 5.0, 5.2, 1.0),
+    ]
+    new_rows = [WordRow("grace", 2.05, 2.4, 0.9), WordRow("HOW", 3.0, 3.2, 0.8), WordRow("sweet", 3.5, 3.9, 0.9)]
+    timeline = WordTimeline.from_rows(rows)
+
+    for t0, t1 in ((1.8, 4.0), (0.0, 10.0), (4.5, 4.6), (6.0, 7.0), (4.0, 1.8)):
+        assert pipeline.splice_rows(timeline, new_rows, t0, t1)[:2] == pipeline.splice_rows(rows, new_rows, t0, t1)[:2]
+
+    first, count, replacement = pipeline.splice_rows(timeline, new_rows, 1.8, 4.0, keep_manual=True)
+    assert all(isinstance(r, WordRow) for r in replacement)
+    timeline.splice(first, count, replacement)
+    assert [(r.text, r.chord) for r in timeline] == [("amazing", None), ("grace", None), ("how", "G"), ("sweet", None), ("the", None)]
+    print("✅ Splice into a timeline")
+
+
+if __name__ == "__main__":
+    print("Testing range re-transcription...")
+    print("=" * 50)
+
+    test_retranscribe_range_only_decodes_slice()
+    test_splice_keeps_rows_outside_range()
+    test_splice_into_timeline()
+
+    print("\n✅ All tests completed!")
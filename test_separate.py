@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for stem output locations in separate_vocals_instrumental
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.processing.separate import separate_vocals_instrumental, stems_dir
+
+
+def test_stems_dir_is_per_content():
+    """Different inputs get different stem directories; identical bytes share one"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, payload in (("a.wav", b"a" * 64), ("b.wav", b"b" * 64), ("c.wav", b"a" * 64)):
+            path = os.path.join(tmp, name)
+            with open(path, "wb") as f:
+                f.write(payload)
+            paths.append(path)
+        a, b, c = (stems_dir(p) for p in paths)
+        assert a != b
+        assert a == c
+        assert stems_dir(paths[0], model="mdx") != a
+    print("✅ Stem directories are keyed by content")
+
+
+def test_existing_stems_are_reused():
+    """Existing stems are returned directly without running Demucs"""
+    with tempfile.TemporaryDirectory() as tmp:
+        song = os.path.join(tmp, "song.wav")
+        with open(song, "wb") as f:
+            f.write(os.urandom(256))
+        out_dir = stems_dir(song)
+        os.makedirs(out_dir, exist_ok=True)
+        try:
+            for name in ("vocals.wav", "no_vocals.wav"):
+                with open(os.path.join(out_dir, name), "wb") as f:
+                    f.write(b"stem")
+            voc, inst = separate_vocals_instrumental(song)
+            assert voc == os.path.join(out_dir, "vocals.wav")
+            assert inst == os.path.join(out_dir, "no_vocals.wav")
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    print("✅ Existing stems reused")
+
+
+def test_stems_moved_into_cache():
+    """With a cache the stems are moved into the cache entry and the temp directory removed"""
+    from song_editor.core.analysis_cache import AnalysisCache
+    from song_editor.processing import pipeline
+
+    with tempfile.TemporaryDirectory() as tmp:
+        song = os.path.join(tmp, "song.wav")
+        with open(song, "wb") as f:
+            f.write(os.urandom(256))
+        out_dir = stems_dir(song)
+        os.makedirs(out_dir, exist_ok=True)
+        try:
+            for name in ("vocals.wav", "no_vocals.wav"):
+                with open(os.path.join(out_dir, name), "wb") as f:
+                    f.write(b"stem")
+            cache = AnalysisCache(root=os.path.join(tmp, "cache"))
+            voc, inst, hit = pipeline.run_separation(song, cache)
+            assert not hit
+            assert voc.startswith(str(cache.root)) and inst.startswith(str(cache.root))
+            assert open(voc, "rb").read() == b"stem"
+            assert not os.path.exists(out_dir)
+            assert pipeline.run_separation(song, cache) == (voc, inst, True)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    print("✅ Stems moved into the cache")
+
+
+if __name__ == "__main__":
+    print("Testing stem separation paths...")
+    print("=" * 50)
+
+    test_stems_dir_is_per_content()
+    test_existing_stems_are_reused()
+    test_stems_moved_into_cache()
+
+    print("\n✅ All tests completed!")
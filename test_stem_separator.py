@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script for in-process StemSeparator with a stand-in Demucs model
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+import torch
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.processing.separate import StemSeparator, separate_vocals_instrumental, stems_dir
+
+SR = 8000
+# drums, bass, other, vocals: vocals take half the mix, the other sources share the rest
+WEIGHTS = (1 / 6, 1 / 6, 1 / 6, 0.5)
+
+
+class FakeModel:
+    samplerate = SR
+    audio_channels = 2
+    sources = ["drums", "bass", "other", "vocals"]
+
+    def __init__(self):
+        self.device = None
+
+    def to(self, device):
+        self.device = device
+        return self
+
+    def eval(self):
+        return self
+
+
+class ModelLoadingError(Exception):
+    pass
+
+
+class FakeDemucs:
+    """Installs demucs.pretrained / demucs.apply modules that record their calls"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.loaded = []
+        self.calls = []
+        self._saved = {}
+
+    def get_model(self, name):
+        if name == "missing":
+            raise ModelLoadingError(f"Could not find a pretrained model with signature {name}.")
+        self.loaded.append(name)
+        return FakeModel()
+
+    def apply_model(self, model, mix, **kwargs):
+        if self.error is not None:
+            raise self.error
+        self.calls.append((tuple(mix.shape), kwargs))
+        return torch.stack([mix * w for w in WEIGHTS], dim=1)
+
+    def __enter__(self):
+        pretrained = types.ModuleType("demucs.pretrained")
+        pretrained.get_model = self.get_model
+        pretrained.ModelLoadingError = ModelLoadingError
+        apply = types.ModuleType("demucs.apply")
+        apply.apply_model = self.apply_model
+        package = types.ModuleType("demucs")
+        package.pretrained, package.apply = pretrained, apply
+        for name, module in (("demucs", package), ("demucs.pretrained", pretrained), ("demucs.apply", apply)):
+            self._saved[name] = sys.modules.get(name)
+            sys.modules[name] = module
+        return self
+
+    def __exit__(self, *exc):
+        for name, module in self._saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def _song(path, channels):
+    t = np.arange(SR) / SR  # one second, whole cycles so the mix has zero mean
+    tone = 0.4 * np.sin(2 * np.pi * 220 * t)
+    data = np.stack([tone * (1 - 0.2 * c) for c in range(channels)], axis=1).astype(np.float32)
+    sf.write(path, data, SR, subtype="FLOAT")
+    return data
+
+
+def test_separate_shapes_and_channels():
+    """Mono is repeated to the model's channels, extra channels are dropped, stems sum to the mix"""
+    with tempfile.TemporaryDirectory() as tmp, FakeDemucs() as demucs:
+        separator = StemSeparator("fake", segment=7.8, overlap=0.1)
+        for channels in (1, 2, 3):
+            song = os.path.join(tmp, f"song{channels}.wav")
+            data = _song(song, channels)
+            stems = separator.separate(song)
+            expected = np.repeat(data, 2, axis=1) if channels == 1 else data[:, :2]
+            assert stems.sr == SR
+            assert stems.vocals.shape == stems.instrumental.shape == (SR, 2)
+            assert stems.vocals.dtype == stems.instrumental.dtype == np.float32
+            assert np.allclose(stems.vocals, 0.5 * expected, atol=1e-4)
+            assert np.allclose(stems.vocals + stems.instrumental, expected, atol=1e-4)
+
+        # The model is loaded once and the split settings reach apply_model
+        assert demucs.loaded == ["fake"]
+        assert [shape for shape, _ in demucs.calls] == [(1, 2, SR)] * 3
+        assert demucs.calls[0][1] == {"split": True, "overlap": 0.1, "progress": False, "device": "cpu", "segment": 7.8}
+    print("✅ Stem shapes and channel handling")
+
+
+def test_separate_to_files_writes_pcm16():
+    """Stems are written as 16-bit WAVs at the model rate and reused on the next call"""
+    with tempfile.TemporaryDirectory() as tmp, FakeDemucs() as demucs:
+        song = os.path.join(tmp, "song.wav")
+        _song(song, 2)
+        separator = StemSeparator("fake")
+        out_dir = stems_dir(song, "fake")
+        try:
+            voc, inst = separator.separate_to_files(song)
+            stems = separator.separate(song)
+            assert (voc, inst) == (os.path.join(out_dir, "vocals.wav"), os.path.join(out_dir, "no_vocals.wav"))
+            assert sorted(os.listdir(out_dir)) == ["no_vocals.wav", "vocals.wav"]
+            for path, expected in ((voc, stems.vocals), (inst, stems.instrumental)):
+                info = sf.info(path)
+                assert (info.subtype, info.samplerate, info.channels, info.frames) == ("PCM_16", SR, 2, SR)
+                data, _ = sf.read(path, dtype="float32", always_2d=True)
+                assert np.allclose(data, expected, atol=1 / 16384)
+
+            calls = len(demucs.calls)
+            assert separator.separate_to_files(song) == (voc, inst)
+            assert len(demucs.calls) == calls
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    print("✅ PCM_16 stem files")
+
+
+def test_only_unavailable_separation_falls_back():
+    """An unknown model gives (None, None); any other failure is raised"""
+    with tempfile.TemporaryDirectory() as tmp:
+        song = os.path.join(tmp, "song.wav")
+        _song(song, 2)
+        with FakeDemucs():
+            assert separate_vocals_instrumental(song, model="missing") == (None, None)
+        with FakeDemucs(error=RuntimeError("out of memory")):
+            try:
+                separate_vocals_instrumental(song, model="broken")
+            except RuntimeError as e:
+                assert "out of memory" in str(e)
+            else:
+                raise AssertionError("separation error was swallowed")
+        assert not os.path.exists(stems_dir(song, "broken"))
+        try:
+            separate_vocals_instrumental(os.path.join(tmp, "absent.wav"))
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError("missing input was swallowed")
+    print("✅ Separation errors")
+
+
+if __name__ == "__main__":
+    print("Testing stem separator...")
+    print("=" * 50)
+
+    test_separate_shapes_and_channels()
+    test_separate_to_files_writes_pcm16()
+    test_only_unavailable_separation_falls_back()
+
+    print("\n✅ All tests completed!")
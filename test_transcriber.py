@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental word emission from the Transcriber
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.processing.transcriber import Transcriber, WhisperEngineConfig, WhisperModelPool
+
+
+class _LazyModel:
+    """Stands in for WhisperModel: segments are produced only when iterated"""
+
+    def __init__(self):
+        self.decoded = 0
+
+    def transcribe(self, audio, **options):
+        def segments():
+            for i in range(3):
+                self.decoded += 1
+                words = [SimpleNamespace(word=f" w{i}{j}", start=i + j * 0.5, end=i + j * 0.5 + 0.4, probability=0.9) for j in range(2)]
+                yield SimpleNamespace(words=words)
+        return segments(), SimpleNamespace(duration=3.0)
+
+
+def test_words_stream_per_segment():
+    """Each segment's words are handed out before the next segment is decoded"""
+    model = _LazyModel()
+    transcriber = Transcriber(WhisperEngineConfig(), WhisperModelPool(loader=lambda size, cfg: model))
+    audio = np.zeros(16000 * 3, dtype=np.float32)
+
+    batches = transcriber.iter_transcribe_audio(audio, 16000, model_size="tiny")
+    first = next(batches)
+    assert [w.text for w in first] == ["w00", "w01"]
+    assert model.decoded == 1
+
+    seen = []
+    words = transcriber.transcribe_audio(audio, 16000, model_size="tiny", on_words=lambda batch: seen.append([w.text for w in batch]))
+    assert seen == [["w00", "w01"], ["w10", "w11"], ["w20", "w21"]]
+    assert [w.text for w in words] == [t for batch in seen for t in batch]
+    print("✅ Words stream per segment")
+
+
+def test_model_pool_shares_and_evicts():
+    """Concurrent leases share one model per size; idle sizes are evicted"""
+    loads = []
+
+    def loader(size, cfg):
+        loads.append(size)
+        return object()
+
+    pool = WhisperModelPool(idle_seconds=60, loader=loader)
+    cfg = WhisperEngineConfig()
+    with pool.lease("tiny", cfg) as a, pool.lease("tiny", cfg) as b:
+        assert a is b
+        # Leased models are never evicted
+        assert pool.evict_idle(0.0) == []
+    with pool.lease("small", cfg):
+        pass
+    assert loads == ["tiny", "small"]
+    assert sorted(pool.loaded()) == ["small", "tiny"]
+    assert sorted(pool.evict_idle(0.0)) == ["small", "tiny"]
+    assert pool.loaded() == []
+
+    # Switching size drops idle models of other sizes at once, but not leased ones
+    with pool.lease("tiny", cfg), pool.lease("medium", cfg):
+        pass
+    with pool.lease("small", cfg):
+        assert pool.select_size("medium") == ["tiny"]
+    assert sorted(pool.loaded()) == ["medium", "small"]
+    pool.clear()
+
+    # Different load settings need their own instance
+    with pool.lease("tiny", cfg) as a, pool.lease("tiny", WhisperEngineConfig(cpu_threads=2)) as b:
+        assert a is not b
+    assert WhisperEngineConfig().cache_params() == {}
+    assert WhisperEngineConfig(beam_size=1, cpu_threads=4).cache_params() == {"beam_size": 1}
+    print("✅ Model pool sharing and eviction")
+
+
+if __name__ == "__main__":
+    print("Testing transcriber streaming...")
+    print("=" * 50)
+
+    test_words_stream_per_segment()
+    test_model_pool_shares_and_evicts()
+
+    print("\n✅ All tests completed!")
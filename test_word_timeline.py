@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar WordTimeline and its WordRow-compatible proxies
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from song_editor.export.ccli import export_ccli
+from song_editor.models.lyrics import WordRow
+from song_editor.models.timeline import WordTimeline
+from song_editor.processing.alignment import annotate_words_with_chords
+from song_editor.processing.chords import DetectedChord
+from song_editor.processing.transcriber import Word
+
+
+def _rows(n):
+    rows = [
+        WordRow(f"w{i % 7}", i * 0.5, i * 0.5 + 0.3, 0.9, chord="G" if i % 2 else None, line_break=i % 3 == 0)
+        for i in range(n)
+    ]
+    rows[3].alt_text, rows[3].alt_start, rows[3].alt_end = "alt", 1.4, 1.8
+    rows[4].gemini_text = "gem"
+    return rows
+
+
+def test_round_trip_and_proxies():
+    """Rows survive the round trip; proxies read and write the columns"""
+    rows = _rows(20)
+    timeline = WordTimeline.from_rows(rows)
+    assert len(timeline) == 20
+    assert timeline.to_rows() == rows
+    assert timeline[3].alt_start == 1.4 and timeline[2].alt_start is None
+    assert timeline[4].gemini_text == "gem" and timeline[5].gemini_text is None
+    assert timeline[-1] == rows[-1]
+    assert [w.text for w in timeline[2:5]] == ["w2", "w3", "w4"]
+
+    view = timeline[7]
+    view.text, view.confidence, view.line_break = "edited", 1.0, True
+    view.alt_end = None
+    assert timeline.texts()[7] == "edited" and timeline.confidences[7] == 1.0
+    assert timeline.line_breaks()[7] and not timeline.line_breaks()[8]
+    view.line_break = False
+    assert not timeline[7].line_break
+
+    # Repeated words share one interned string
+    assert len(timeline.strings) < len(timeline) + 1
+    print("✅ Round trip and proxies")
+
+
+def test_splice_matches_list():
+    """splice/extend follow the same edits made to a plain list"""
+    rng = np.random.default_rng(0)
+    rows = _rows(30)
+    timeline = WordTimeline.from_rows(rows)
+    for _ in range(50):
+        first = int(rng.integers(0, len(rows) + 1))
+        count = int(rng.integers(0, len(rows) - first + 1))
+        new = [WordRow(f"n{k}", 100.0 + k, 100.5 + k, 0.5, line_break=bool(k % 2)) for k in range(int(rng.integers(0, 12)))]
+        rows[first:first + count] = new
+        timeline.splice(first, count, new)
+        assert timeline.to_rows() == rows
+    more = _rows(5)
+    rows.extend(more)
+    timeline.extend(more)
+    assert timeline.to_rows() == rows
+    print("✅ Splice")
+
+
+def test_join_and_export_from_columns():
+    """Transcriber words go straight into columns, get chords and export like rows"""
+    words = [Word("Amazing", 0.0, 0.6, 0.9), Word("grace", 0.7, 1.2, None), Word("how", 3.0, 3.4, 0.8)]
+    chords = [DetectedChord("G", 0.0, 0.65, 0.9), DetectedChord("C", 0.65, 2.0, 0.9)]
+    timeline = WordTimeline.from_words(words)
+    annotate_words_with_chords(timeline, chords)
+    rows = [WordRow(w.text, w.start, w.end, w.confidence or 0.0) for w in words]
+    annotate_words_with_chords(rows, chords)
+    assert timeline.to_rows() == rows
+    assert timeline.texts("chord") == ["G", "C", None]
+    assert timeline.between(0.0, 1.5).tolist() == [0, 1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = os.path.join(tmp, "a.cho"), os.path.join(tmp, "b.cho")
+        export_ccli(a, timeline)
+        export_ccli(b, rows)
+        assert Path(a).read_text() == Path(b).read_text() == "[G] Amazing [C] grace\nhow\n"
+    print("✅ Join and export")
+
+
+def test_smaller_than_rows():
+    """Columns take far less memory than one WordRow object per word"""
+    timeline = WordTimeline.from_rows([WordRow(f"w{i % 50}", i * 0.3, i * 0.3 + 0.2, 0.8) for i in range(10_000)])
+    assert timeline.nbytes < 10_000 * 100
+    print("✅ Memory")
+
+
+if __name__ == "__main__":
+    print("Testing word timeline...")
+    print("=" * 50)
+
+    test_round_trip_and_proxies()
+    test_splice_matches_list()
+    test_join_and_export_from_columns()
+    test_smaller_than_rows()
+
+    print("\n✅ All tests completed!")